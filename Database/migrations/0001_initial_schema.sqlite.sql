@@ -0,0 +1,93 @@
+/*
+SQLite version of 0001_initial_schema.sql, for the sqlite backend.
+*/
+
+CREATE TABLE IF NOT EXISTS `Worlds` (
+    `id` INTEGER PRIMARY KEY AUTOINCREMENT,
+    `name` VARCHAR(32) NOT NULL UNIQUE,
+    `created` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS `Savegames` (
+    `id` INTEGER PRIMARY KEY AUTOINCREMENT,
+    `server_id` BIGINT NOT NULL UNIQUE,
+    `savefile` VARCHAR(64) NOT NULL UNIQUE,
+    `world_id` BIGINT NOT NULL,
+    `gamerulefile` VARCHAR(64) NOT NULL,
+    `created` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT `Savegames_ibfk_1` FOREIGN KEY (`world_id`) REFERENCES `Worlds` (`id`)
+);
+
+CREATE TABLE IF NOT EXISTS `Players` (
+    `id` INTEGER PRIMARY KEY AUTOINCREMENT,
+    `player_discord_id` BIGINT NOT NULL UNIQUE,
+    `created` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS `Roles` (
+    `id` INTEGER PRIMARY KEY AUTOINCREMENT,
+    `role_discord_id` BIGINT NOT NULL UNIQUE,
+    `name` VARCHAR(32) NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS `WorldMaps` (
+    `id` INTEGER PRIMARY KEY AUTOINCREMENT,
+    `world_id` BIGINT NOT NULL,
+    `savegame_id` BIGINT NOT NULL,
+    `role_id` BIGINT,
+    `turn_no` INT NOT NULL,
+    `turn_map_no` INT NOT NULL,
+    `filename` VARCHAR(128),
+    `link` VARCHAR(128) UNIQUE,
+    `created` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT `WorldMaps_ibfk_1` FOREIGN KEY (`world_id`) REFERENCES `Worlds` (`id`),
+    CONSTRAINT `WorldMaps_ibfk_2` FOREIGN KEY (`savegame_id`) REFERENCES `Savegames` (`id`),
+    CONSTRAINT `WorldMaps_ibfk_3` FOREIGN KEY (`role_id`) REFERENCES `Roles` (`id`),
+    UNIQUE(`world_id`, `savegame_id`, `turn_no`, `role_id`)
+);
+
+CREATE TABLE IF NOT EXISTS `PlayerGames` (
+    `player_id` BIGINT NOT NULL,
+    `game_id` BIGINT NOT NULL,
+    `role_id` BIGINT NOT NULL,
+    `created` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (`player_id`, `game_id`),
+    CONSTRAINT `PlayerGames_ibfk_1` FOREIGN KEY (`player_id`) REFERENCES `Players` (`id`),
+    CONSTRAINT `PlayerGames_ibfk_2` FOREIGN KEY (`game_id`) REFERENCES `Savegames` (`id`),
+    CONSTRAINT `PlayerGames_ibfk_3` FOREIGN KEY (`role_id`) REFERENCES `Roles` (`id`)
+);
+
+CREATE TABLE IF NOT EXISTS `SavefileDownloads` (
+    `id` INTEGER PRIMARY KEY AUTOINCREMENT,
+    `game_id` BIGINT NOT NULL,
+    `player_id` BIGINT NOT NULL,
+    `created` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT `SavefileDownloads_ibfk_1` FOREIGN KEY (`game_id`) REFERENCES `Savegames` (`id`),
+    CONSTRAINT `SavefileDownloads_ibfk_2` FOREIGN KEY (`player_id`) REFERENCES `Players` (`id`)
+);
+
+CREATE TABLE IF NOT EXISTS `GameruleEditPermissions` (
+    `player_id` BIGINT NOT NULL,
+    `game_id` BIGINT NOT NULL,
+    `created` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (`player_id`, `game_id`),
+    CONSTRAINT `GameruleEditPermissions_ibfk_1` FOREIGN KEY (`player_id`) REFERENCES `Players` (`id`),
+    CONSTRAINT `GameruleEditPermissions_ibfk_2` FOREIGN KEY (`game_id`) REFERENCES `Savegames` (`id`)
+);
+
+CREATE TABLE IF NOT EXISTS `WorldEditPermissions` (
+    `player_id` BIGINT NOT NULL,
+    `world_id` BIGINT NOT NULL,
+    `created` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT `WorldmapEditPermissions_ibfk_1` FOREIGN KEY (`player_id`) REFERENCES `Players` (`id`),
+    CONSTRAINT `WorldmapEditPermissions_ibfk_2` FOREIGN KEY (`world_id`) REFERENCES `Worlds` (`id`)
+);
+
+CREATE TABLE IF NOT EXISTS `NewTurns` (
+    `id` INTEGER PRIMARY KEY AUTOINCREMENT,
+    `game_id` BIGINT NOT NULL,
+    `turn_no` INT NOT NULL,
+    `date` VARCHAR(16),
+    `created` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT `NewTurns_ibfk_1` FOREIGN KEY (`game_id`) REFERENCES `Savegames` (`id`)
+);
@@ -0,0 +1,12 @@
+/*
+Indexes for the lookups made on every map and player command.
+
+dbget_worldMap resolves the world, savegame and role through their unique columns, then filters WorldMaps by
+savegame, turn, map number, world and role. WorldMaps gains rows every turn, so this lookup must not scan a savegame's whole history.
+
+get_PlayerGames lists every player in a game, which the primary key (player_id, game_id) can't be searched by.
+*/
+
+CREATE INDEX IF NOT EXISTS `WorldMaps_lookup` ON `WorldMaps` (`savegame_id`, `turn_no`, `turn_map_no`, `world_id`, `role_id`);
+
+CREATE INDEX IF NOT EXISTS `PlayerGames_game` ON `PlayerGames` (`game_id`, `player_id`, `role_id`);
@@ -42,7 +42,7 @@ class AdminCommands(commands.Cog):
         """
         logInfo(f"n.givebuilding({ctx.guild.id}, {terrID}, {buildingName})")
 
-        savegame = get_SavegameFromCtx(ctx)
+        savegame = await aget_SavegameFromCtx(ctx)
         if not (savegame): 
             return #Error will already have been handled
 
@@ -109,7 +109,7 @@ class AdminCommands(commands.Cog):
 
         buildingIndex = int(buildingIndex)
 
-        savegame = get_SavegameFromCtx(ctx)
+        savegame = await aget_SavegameFromCtx(ctx)
         if not (savegame): 
             return #Error will already have been handled
 
@@ -162,7 +162,7 @@ class AdminCommands(commands.Cog):
 
         buildingIndex = int(buildingIndex)
 
-        savegame = get_SavegameFromCtx(ctx)
+        savegame = await aget_SavegameFromCtx(ctx)
         if not (savegame): 
             return #Error will already have been handled
 
@@ -221,7 +221,7 @@ class AdminCommands(commands.Cog):
             raise InputError(f"Invalid population size {size}, must be positive integer")
         size = int(size)
 
-        savegame = get_SavegameFromCtx(ctx)
+        savegame = await aget_SavegameFromCtx(ctx)
         if not (savegame): 
             return #Error will already have been handled
 
@@ -297,7 +297,7 @@ class AdminCommands(commands.Cog):
         
         logInfo(f"change_population_growth({ctx.guild.id}, {terrID}, {growthrate}, {occupation}, {identifiers})")
 
-        savegame = get_SavegameFromCtx(ctx)
+        savegame = await aget_SavegameFromCtx(ctx)
         if not (savegame): 
             return #Error will already have been handled
 
@@ -359,7 +359,7 @@ class AdminCommands(commands.Cog):
 
         amount = int(amount)
 
-        savegame = get_SavegameFromCtx(ctx)
+        savegame = await aget_SavegameFromCtx(ctx)
         if not (savegame): 
             return #Error will already have been handled
 
@@ -433,7 +433,7 @@ class AdminCommands(commands.Cog):
 
         amount = int(amount)
 
-        savegame = get_SavegameFromCtx(ctx)
+        savegame = await aget_SavegameFromCtx(ctx)
         if not (savegame): 
             return #Error will already have been handled
 
@@ -505,14 +505,14 @@ class AdminCommands(commands.Cog):
         """
         logInfo(f"giveTerritory({ctx.guild.id}, {roleid}, {terrIDs})")
 
-        savegame = get_SavegameFromCtx(ctx)
+        savegame = await aget_SavegameFromCtx(ctx)
         if not (savegame): 
             return #Error will already have been handled
 
-        nation = get_NationFromRole(ctx, roleid, savegame)
+        nation = await aget_NationFromRole(ctx, roleid, savegame)
         
         for terrID in terrIDs:
-            transferred_terr =  savegame.transfer_territory(terrID, nation)
+            transferred_terr = savegame.transfer_territory(terrID, nation)
             if not transferred_terr:
                 raise InputError(f"Territory {terrID} transfer to {nation.name} did not work")
 
@@ -536,11 +536,11 @@ class AdminCommands(commands.Cog):
 
         logInfo(f"giveResources({ctx.guild.id}, {roleid}, {args})")
 
-        savegame = get_SavegameFromCtx(ctx)
+        savegame = await aget_SavegameFromCtx(ctx)
         if not (savegame): 
             return #Error will already have been handled
 
-        nation = get_NationFromRole(ctx, roleid, savegame)
+        nation = await aget_NationFromRole(ctx, roleid, savegame)
         
 
         if len(args) < 1:
@@ -585,11 +585,11 @@ class AdminCommands(commands.Cog):
 
         logInfo(f"change_capacity({ctx.guild.id}, {roleid}, {category}, {amount})")
 
-        savegame = get_SavegameFromCtx(ctx)
+        savegame = await aget_SavegameFromCtx(ctx)
         if not (savegame): 
             return #Error will already have been handled
 
-        nation = get_NationFromRole(ctx, roleid, savegame)
+        nation = await aget_NationFromRole(ctx, roleid, savegame)
         
 
         if not(category in nation.bureaucracy.keys()):
@@ -617,11 +617,11 @@ class AdminCommands(commands.Cog):
 
         logInfo(f"change_capacity({ctx.guild.id}, {roleid}, {amount})")
 
-        savegame = get_SavegameFromCtx(ctx)
+        savegame = await aget_SavegameFromCtx(ctx)
         if not (savegame): 
             return #Error will already have been handled
 
-        nation = get_NationFromRole(ctx, roleid, savegame)
+        nation = await aget_NationFromRole(ctx, roleid, savegame)
 
         if not (ops.isFloat(amount)):
             raise InputError(f"Tax modifier cannot have value \"{amount}\"")
@@ -654,7 +654,7 @@ class AdminCommands(commands.Cog):
 
         amount = int(amount)
 
-        savegame = get_SavegameFromCtx(ctx)
+        savegame = await aget_SavegameFromCtx(ctx)
         if not (savegame): 
             return #Error will already have been handled
 
@@ -672,7 +672,7 @@ class AdminCommands(commands.Cog):
 
         territoryName = world_terr.name
 
-        nation = get_NationFromRole(ctx, roleid, savegame)
+        nation = await aget_NationFromRole(ctx, roleid, savegame)
 
         gamerule = savegame.getGamerule()
 
@@ -706,13 +706,13 @@ class AdminCommands(commands.Cog):
         """
         logInfo(f"change_forcestatus({ctx.guild.id}, {roleid}, {forceName}, {newstatus})")
 
-        savegame = get_SavegameFromCtx(ctx)
+        savegame = await aget_SavegameFromCtx(ctx)
         if not (savegame): 
             return #Error will already have been handled
             
         gamerule = savegame.getGamerule()
 
-        nation = get_NationFromRole(ctx, roleid, savegame)
+        nation = await aget_NationFromRole(ctx, roleid, savegame)
 
         if not(forceName in nation.military.keys()):
             raise InputError(f"{nation.name} does not own force \"{forceName}\"")
@@ -738,12 +738,12 @@ class AdminCommands(commands.Cog):
         """
         logInfo(f"rename_force({ctx.guild.id}, {roleid}, {old_forcename}, {new_forcename})")
 
-        savegame = get_SavegameFromCtx(ctx)
+        savegame = await aget_SavegameFromCtx(ctx)
         if not (savegame): 
             return #Error will already have been handled
 
         #Validate that the player owns this force
-        nation = get_NationFromRole(ctx, roleid, savegame)
+        nation = await aget_NationFromRole(ctx, roleid, savegame)
 
         if not (old_forcename in nation.military.keys()):
             raise InputError(f"{nation.name} does not own the force {old_forcename}. If the name has spaces, use quotation marks like this: \"name of force\"")
@@ -773,12 +773,12 @@ class AdminCommands(commands.Cog):
         """
         logInfo(f"rename_unit_unit({ctx.guild.id}, {roleid}, {old_unitname}, {new_unitname})")
 
-        savegame = get_SavegameFromCtx(ctx)
+        savegame = await aget_SavegameFromCtx(ctx)
         if not (savegame): 
             return #Error will already have been handled
 
         #Validate that the player owns this force
-        nation = get_NationFromRole(ctx, roleid, savegame)
+        nation = await aget_NationFromRole(ctx, roleid, savegame)
 
         if not (base_forcename in nation.military.keys()):
             raise InputError(f"{nation.name} does not own the force {base_forcename}. If the name has spaces, use quotation marks like this: \"name of force\"")
@@ -815,13 +815,13 @@ class AdminCommands(commands.Cog):
         """
         logInfo(f"combine_forces({ctx.guild.id}, {base_forcename}, {additional_forcenames})")
 
-        savegame = get_SavegameFromCtx(ctx)
+        savegame = await aget_SavegameFromCtx(ctx)
         if not (savegame): 
             return #Error will already have been handled
 
         #Validate that the player owns these forces
 
-        nation = get_NationFromRole(ctx, roleid, savegame)
+        nation = await aget_NationFromRole(ctx, roleid, savegame)
 
         if not (base_forcename in nation.military.keys()):
             raise InputError(f"{roleid} does not own the force {base_forcename}. If the name has spaces, use quotation marks like this: \"name of force\"")
@@ -856,13 +856,13 @@ class AdminCommands(commands.Cog):
         """
         logInfo(f"combine_units({ctx.guild.id}, {roleid}, {base_forcename}, {base_unitname}, {additional_unitnames})")
 
-        savegame = get_SavegameFromCtx(ctx)
+        savegame = await aget_SavegameFromCtx(ctx)
         if not (savegame): 
             return #Error will already have been handled
 
         #Validate that the player owns these forces
 
-        nation = get_NationFromRole(ctx, roleid, savegame)
+        nation = await aget_NationFromRole(ctx, roleid, savegame)
 
         if not (base_forcename in nation.military.keys()):
             raise InputError(f"{roleid} does not own the force {base_forcename}. If the name has spaces, use quotation marks like this: \"name of force\"")
@@ -910,11 +910,11 @@ class AdminCommands(commands.Cog):
 
         new_unitsizes = [int(unitsize) for unitsize in new_unitsizes]
 
-        savegame = get_SavegameFromCtx(ctx)
+        savegame = await aget_SavegameFromCtx(ctx)
         if not (savegame): 
             return #Error will already have been handled
 
-        nation = get_NationFromRole(ctx, roleid, savegame)
+        nation = await aget_NationFromRole(ctx, roleid, savegame)
 
         if not (base_forcename in nation.military.keys()):
             raise InputError(f"<@&{roleid}> does not own the force {base_forcename}. If the name has spaces, use quotation marks like this: \"name of force\"")
@@ -950,11 +950,11 @@ class AdminCommands(commands.Cog):
         if (len(units_toSplit) < 1):
             raise InputError(f"Must have at least one unit to transfer")
 
-        savegame = get_SavegameFromCtx(ctx)
+        savegame = await aget_SavegameFromCtx(ctx)
         if not (savegame): 
             return #Error will already have been handled
 
-        nation = get_NationFromRole(ctx, roleid, savegame)
+        nation = await aget_NationFromRole(ctx, roleid, savegame)
 
         if not (base_forcename in nation.military.keys()):
             raise InputError(f"<@&{roleid}> does not own the force {base_forcename}. If the name has spaces, use quotation marks like this: \"name of force\"")
@@ -985,12 +985,12 @@ class AdminCommands(commands.Cog):
         if (len(units_toDisband) < 1):
             raise InputError(f"Must have at least one unit to disband")
 
-        savegame = get_SavegameFromCtx(ctx)
+        savegame = await aget_SavegameFromCtx(ctx)
         if not (savegame): 
             return #Error will already have been handled
 
         #Validate that the player owns these forces
-        nation = get_NationFromRole(ctx, roleid, savegame)
+        nation = await aget_NationFromRole(ctx, roleid, savegame)
 
         if not (base_forcename in nation.military.keys()):
             raise InputError(f"{roleid} does not own the force {base_forcename}. If the name has spaces, use quotation marks like this: \"name of force\"")
@@ -1020,12 +1020,12 @@ class AdminCommands(commands.Cog):
         """
         logInfo(f"disband_units({ctx.guild.id}, {roleid}, {base_forcename})")
 
-        savegame = get_SavegameFromCtx(ctx)
+        savegame = await aget_SavegameFromCtx(ctx)
         if not (savegame): 
             return #Error will already have been handled
 
         #Validate that the player owns these forces
-        nation = get_NationFromRole(ctx, roleid, savegame)
+        nation = await aget_NationFromRole(ctx, roleid, savegame)
 
         if not (base_forcename in nation.military.keys()):
             raise InputError(f"<@&{roleid}> does not own the force {base_forcename}. If the name has spaces, use quotation marks like this: \"name of force\"")
@@ -1048,7 +1048,7 @@ class AdminCommands(commands.Cog):
         """
         logInfo(f"admin_move_force({ctx.guild.id}, {roleid}, {base_forcename}, {terrIDs})")
 
-        savegame = get_SavegameFromCtx(ctx)
+        savegame = await aget_SavegameFromCtx(ctx)
         if not (savegame): 
             return #Error will already have been handled
 
@@ -1070,7 +1070,7 @@ class AdminCommands(commands.Cog):
 
             territories.append(world_terr.name)
 
-        nation = get_NationFromRole(ctx, roleid, savegame)
+        nation = await aget_NationFromRole(ctx, roleid, savegame)
 
         if not (base_forcename in nation.military.keys()):
             raise InputError(f"<@&{roleid}> does not own the force {base_forcename}. If the name has spaces, use quotation marks like this: \"name of force\"")
@@ -1097,7 +1097,7 @@ class AdminCommands(commands.Cog):
         """
         logInfo(f"admin_change_force_location({ctx.guild.id}, {roleid}, {base_forcename}, {terrID})")
 
-        savegame = get_SavegameFromCtx(ctx)
+        savegame = await aget_SavegameFromCtx(ctx)
         if not (savegame): 
             return #Error will already have been handled
 
@@ -1115,7 +1115,7 @@ class AdminCommands(commands.Cog):
 
         territoryName = world_terr.name
 
-        nation = get_NationFromRole(ctx, roleid, savegame)
+        nation = await aget_NationFromRole(ctx, roleid, savegame)
 
         if not (base_forcename in nation.military.keys()):
             raise InputError(f"<@&{roleid}> does not own the force {base_forcename}. If the name has spaces, use quotation marks like this: \"name of force\"")
@@ -1143,12 +1143,12 @@ class AdminCommands(commands.Cog):
         """
         logInfo(f"set_battle({ctx.guild.id}, {roleid0}, {forcename0}, {roleid1}, {forcename1})")
 
-        savegame = get_SavegameFromCtx(ctx)
+        savegame = await aget_SavegameFromCtx(ctx)
         if not (savegame): 
             return #Error will already have been handled
 
         # First force
-        nation0 = get_NationFromRole(ctx, roleid0, savegame)
+        nation0 = await aget_NationFromRole(ctx, roleid0, savegame)
 
         if not (forcename0 in nation0.military.keys()):
             raise InputError(f"<@&{roleid0}> does not own the force {forcename0}. If the name has spaces, use quotation marks like this: \"name of force\"")
@@ -1157,7 +1157,7 @@ class AdminCommands(commands.Cog):
 
 
         # Second force
-        nation1 = get_NationFromRole(ctx, roleid1, savegame)
+        nation1 = await aget_NationFromRole(ctx, roleid1, savegame)
 
         if not (forcename1 in nation1.military.keys()):
             raise InputError(f"<@&{roleid1}> does not own the force {forcename1}. If the name has spaces, use quotation marks like this: \"name of force\"")
@@ -1186,11 +1186,11 @@ class AdminCommands(commands.Cog):
         """
         logInfo(f"exit_battle({ctx.guild.id}, {roleid}, {base_forcename})")
 
-        savegame = get_SavegameFromCtx(ctx)
+        savegame = await aget_SavegameFromCtx(ctx)
         if not (savegame): 
             return #Error will already have been handled
 
-        nation = get_NationFromRole(ctx, roleid, savegame)
+        nation = await aget_NationFromRole(ctx, roleid, savegame)
 
         if not (base_forcename in nation.military.keys()):
             raise InputError(f"<@&{roleid}> does not own the force {base_forcename}. If the name has spaces, use quotation marks like this: \"name of force\"")
@@ -1224,11 +1224,11 @@ class AdminCommands(commands.Cog):
         if (len(set(roleids)) <= 1):
             raise InputError("Must have multiple unique nations to set relation for")
 
-        savegame = get_SavegameFromCtx(ctx)
+        savegame = await aget_SavegameFromCtx(ctx)
         if not (savegame): 
             return #Error will already have been handled
         
-        nations = [get_NationFromRole(ctx, roleid, savegame) for roleid in roleids]
+        nations = [await aget_NationFromRole(ctx, roleid, savegame) for roleid in roleids]
 
         if not(diplomacy.validate_relation(relation)):
             raise InputError(f"Invalid diplomatic relation {relation}. Valid relations: {', '.join(statuspattern[:-1] for statuspattern in diplomacy.valid_statuspatterns)}")
@@ -1261,7 +1261,7 @@ class AdminCommands(commands.Cog):
 
         numMonths = int(numMonths)
 
-        savegame = get_SavegameFromCtx(ctx)
+        savegame = await aget_SavegameFromCtx(ctx)
         if not (savegame): 
             return #Error will already have been handled
 
@@ -1269,7 +1269,8 @@ class AdminCommands(commands.Cog):
 
         await ctx.send(f"Advanced turn to turn {savegame.turn}, new date is {savegame.date['m']}/{savegame.date['y']}!")
 
-        save_saveGame(savegame)
+        #Every nation changes on a new turn, so rewrite the whole savefile instead of journaling
+        save_saveGame(savegame, compact = True)
 
     @commands.command(aliases = ["removePlayer", "remove-player", "removeplayer"])
     @commands.has_permissions(administrator = True)
@@ -1281,13 +1282,13 @@ class AdminCommands(commands.Cog):
         """
         logInfo(f"remove_player({ctx.guild.id}, {playerid})")
 
-        savegame = get_SavegameFromCtx(ctx)
+        savegame = await aget_SavegameFromCtx(ctx)
         if not (savegame): 
             return #Error will already have been handled
 
         player = ctx.guild.get_member(get_PlayerID(playerid))
 
-        remove_player_fromGame(savegame, player.id)
+        await dbcall(remove_player_fromGame, savegame, player.id)
 
         logInfo(f"Successfully removed player")
 
@@ -1306,13 +1307,13 @@ class AdminCommands(commands.Cog):
 
         logInfo(f"on_member_remove(server: {server_id}, player: {player_id})")
 
-        savegame = load_saveGame_from_server(server_id)
+        savegame = await dbcall(load_saveGame_from_server, server_id)
 
         if not (savegame): 
             logInfo(f"Player {player_id} left non-game server {server_id}") #Error will already have been handled
             return
 
-        remove_player_fromGame(savegame, player_id)
+        await dbcall(remove_player_fromGame, savegame, player_id)
 
         logInfo(f"Successfully removed player info!")
 
@@ -1336,12 +1337,12 @@ class AdminCommands(commands.Cog):
 
         logInfo(f"on_member_update(server: {server_id}, player: {player_id}, roles removed: {[role.name for role in roles_removed]})")
 
-        savegame = load_saveGame_from_server(server_id)
+        savegame = await dbcall(load_saveGame_from_server, server_id)
 
         if not (savegame): 
             return
         
-        playerinfo = get_player_byGame(savegame, player_id)
+        playerinfo = await dbcall(get_player_byGame, savegame, player_id)
 
         if not (playerinfo):
             return
@@ -1351,7 +1352,7 @@ class AdminCommands(commands.Cog):
         if roleid not in [role.id for role in roles_removed]:
             return
 
-        remove_player_fromGame(savegame, player_id)
+        await dbcall(remove_player_fromGame, savegame, player_id)
 
         logInfo(f"Successfully removed player from role!")
 
@@ -1370,7 +1371,7 @@ class AdminCommands(commands.Cog):
 
         logInfo(f"addNation({ctx.guild.id}, {roleid}, {playerid})")
 
-        savegame = get_SavegameFromCtx(ctx)
+        savegame = await aget_SavegameFromCtx(ctx)
         if not (savegame): 
             return #Error will already have been handled
 
@@ -1390,7 +1391,7 @@ class AdminCommands(commands.Cog):
             savegame.nations[role.name].mapcolor = (role.color.r, role.color.g, role.color.b)
 
         #Try adding the nation to the database - including player, role, and playergame tables
-        db_nation = add_Nation(
+        db_nation = await dbcall(add_Nation, 
                 savegame, 
                 savegame.nations[role.name], 
                 player.id
@@ -1434,7 +1435,7 @@ class AdminCommands(commands.Cog):
         )
 
         try:
-            setupNew_saveGame(
+            await dbcall(setupNew_saveGame, 
                 savegame, 
                 "Test World", 
                 "Test Gamerule"
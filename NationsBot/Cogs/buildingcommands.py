@@ -36,11 +36,10 @@ class BuildingCommands(commands.Cog):
         """
         logInfo(f"buy_building(({ctx.guild.id}, {terrID}, {buildingName})")
 
-        savegame = get_SavegameFromCtx(ctx)
-        if not (savegame): 
-            return #Error will already have been handled
+        context = await aget_CommandContext(ctx)
+        savegame = context.savegame
 
-        world = savegame.getWorld()
+        world = context.world
         if not (world):
             raise InputError("Savegame's world could not be retrieved")
 
@@ -55,14 +54,8 @@ class BuildingCommands(commands.Cog):
         territoryName = world_terrInfo.name
 
         #Validate that the player owns this territory
-        playerinfo = get_player_byGame(savegame, ctx.author.id)
-
-        if not (playerinfo):
-            raise InputError(f"Could not get a nation for player <@{ctx.author.id}>")
-
-        roleid = playerinfo['role_discord_id']
-
-        nation = get_NationFromRole(ctx, roleid, savegame)
+        playerinfo = context.playerinfo
+        nation = context.nation
 
         if not (territoryName in nation.territories.keys()):
             raise InputError(f"<@&{playerinfo['role_discord_id']}> does not own the territory {territoryName}")
@@ -95,11 +88,10 @@ class BuildingCommands(commands.Cog):
 
         buildingIndex = int(buildingIndex)
 
-        savegame = get_SavegameFromCtx(ctx)
-        if not (savegame): 
-            return #Error will already have been handled
+        context = await aget_CommandContext(ctx)
+        savegame = context.savegame
 
-        world = savegame.getWorld()
+        world = context.world
         if not (world):
             raise InputError("Savegame's world could not be retrieved")
 
@@ -113,14 +105,8 @@ class BuildingCommands(commands.Cog):
         
         territoryName = world_terrInfo.name
 
-        playerinfo = get_player_byGame(savegame, ctx.author.id)
-
-        if not (playerinfo):
-            raise InputError(f"Could not get a nation for player <@{ctx.author.id}>")
-
-        roleid = playerinfo['role_discord_id']
-
-        nation = get_NationFromRole(ctx, roleid, savegame)
+        playerinfo = context.playerinfo
+        nation = context.nation
         
         if (territoryName not in nation.territories.keys()):
             raise InputError(f"<@&{playerinfo['role_discord_id']}> does not own the territory {territoryName}")
@@ -151,11 +137,10 @@ class BuildingCommands(commands.Cog):
 
         buildingIndex = int(buildingIndex)
 
-        savegame = get_SavegameFromCtx(ctx)
-        if not (savegame): 
-            return #Error will already have been handled
+        context = await aget_CommandContext(ctx)
+        savegame = context.savegame
 
-        world = savegame.getWorld()
+        world = context.world
         if not (world):
             raise InputError("Savegame's world could not be retrieved")
 
@@ -170,14 +155,8 @@ class BuildingCommands(commands.Cog):
         territoryName = world_terrInfo.name
 
         #Nation info
-        playerinfo = get_player_byGame(savegame, ctx.author.id)
-
-        if not (playerinfo):
-            raise InputError(f"Could not get a nation for player <@{ctx.author.id}>")
-
-        roleid = playerinfo['role_discord_id']
-
-        nation = get_NationFromRole(ctx, roleid, savegame)
+        playerinfo = context.playerinfo
+        nation = context.nation
         
         #Can we do the operation on this territory
 
@@ -1,4 +1,4 @@
-import json, datetime, pprint, traceback, re
+import json, datetime, pprint, traceback, re, io
 
 import discord
 from discord.ext import commands
@@ -16,6 +16,8 @@ from ConcertOfNationsEngine.concertofnations_exceptions import *
 
 from GameUtils.filehandling import *
 import GameUtils.operations as ops
+from GameUtils import caching
+import querystats
 
 #The cog itself
 class DeveloperCommands(commands.Cog):
@@ -33,7 +35,8 @@ class DeveloperCommands(commands.Cog):
 
         #Get every world file
     
-        worlds = [world.split('.json')[0] for world in os.listdir(worldsDir) if world.endswith('.json')]
+        #Landmark files are saved alongside the worlds they belong to
+        worlds = [world.split('.json')[0] for world in os.listdir(worldsDir) if world.endswith('.json') and not world.endswith('.landmarks.json')]
 
         menu = MenuEmbed(
             f"World Maps", 
@@ -141,7 +144,7 @@ class DeveloperCommands(commands.Cog):
 
         new_world_json = None
 
-        if not(validate_world_edit_permissions(get_PlayerID(ctx.author.id), world_name)):
+        if not(await dbcall(validate_world_edit_permissions, get_PlayerID(ctx.author.id), world_name)):
             raise InputError(f"User <@{ctx.author.id}> does not have permission to edit this world file.")
 
         try:
@@ -151,10 +154,40 @@ class DeveloperCommands(commands.Cog):
             logError(e)
             raise InputError("Input file is not valid JSON.")
 
-        validate_modified_world(world_name, new_world_json)
+        await dbcall(validate_modified_world, world_name, new_world_json)
 
         logInfo(f"Validated and saved world {world_name}!")
         await ctx.send(f"Validated and saved world {world_name}!")
+
+    @commands.command(aliases = ["preprocessworld", "preprocess-world", "preprocessWorld"])
+    async def preprocess_world(self, ctx, world_name, landmark_count = 8):
+        """
+        Pick landmark territories for a world, which make finding paths for moving forces faster on maps with long detours.
+        Must be run again after the world's territories or edges are changed, until then the old landmarks are ignored.
+        Args:
+            world_name: The name of the world (without the .json file extension)
+            landmark_count (Optional): How many landmarks to pick
+        """
+        logInfo(f"preprocess_world({ctx.guild.id}, {world_name}, {landmark_count})")
+
+        filepath = worldsDir + "/" + world_name + ".json"
+
+        if not(os.path.isfile(filepath)):
+            raise InputError(f"\"{world_name}\" is not a valid world")
+
+        if not (str(landmark_count).isdigit()) or (int(landmark_count) < 1):
+            raise InputError("The number of landmarks must be a whole number of at least 1")
+
+        if not(await dbcall(validate_world_edit_permissions, get_PlayerID(ctx.author.id), world_name)):
+            raise InputError(f"User <@{ctx.author.id}> does not have permission to edit this world file.")
+
+        world = await dbcall(load_world, world_name)
+        worldLandmarks = await dbcall(world.preprocessLandmarks, int(landmark_count))
+
+        landmarkNames = ", ".join(world[terrID].name for terrID in worldLandmarks.landmarks)
+
+        logInfo(f"Preprocessed world {world_name}", details = {"Landmarks": landmarkNames})
+        await ctx.send(f"Picked {len(worldLandmarks.landmarks)} landmarks for world {world_name}: {landmarkNames}")
         
     @commands.command(aliases = ["modifygamerule", "modify-gamerule", "modifyGamerule"])
     async def modify_gamerule(self, ctx, gamerule_name): 
@@ -175,7 +208,7 @@ class DeveloperCommands(commands.Cog):
 
         new_gamerule_json = None
 
-        if not(validate_gamerule_edit_permissions(get_PlayerID(ctx.author.id), gamerule_name)):
+        if not(await dbcall(validate_gamerule_edit_permissions, get_PlayerID(ctx.author.id), gamerule_name)):
             raise InputError(f"User <@{ctx.author.id}> does not have permission to edit this gamerule file.")
 
         try:
@@ -185,10 +218,124 @@ class DeveloperCommands(commands.Cog):
             logError(e)
             raise InputError("Input file is not valid JSON.")
 
-        validate_modified_gamerule(gamerule_name, new_gamerule_json)
+        await dbcall(validate_modified_gamerule, gamerule_name, new_gamerule_json)
 
         logInfo(f"Validated and saved gamerule {gamerule_name}!")
         await ctx.send(f"Validated and saved gamerule {gamerule_name}!")
+
+    @commands.command(aliases = ["loglevel", "log-level", "logLevel"])
+    @commands.is_owner()
+    async def log_level(self, ctx, level = None):
+        """
+        See or change the lowest level of log that the bot writes
+        Args:
+            level: Optional. One of DEBUG, INFO, WARNING or ERROR. If not specified, the current level is shown.
+        """
+        logInfo(f"log_level({ctx.guild.id}, {level})")
+
+        if not (level):
+            await ctx.send(f"Current log level: {getLogLevel()}")
+            return
+
+        try: level = setLogLevel(level)
+        except ValueError as e:
+            raise InputError(str(e))
+
+        logInfo(f"Log level set to {level}")
+        await ctx.send(f"Log level set to {level}")
+
+    @commands.command(aliases = ["errorlog", "error-log", "errorLog"])
+    @commands.is_owner()
+    async def error_log(self, ctx, *errorTime):
+        """
+        Retrieve the part of the log surrounding an error
+        Args:
+            errorTime: The "Error Time" that was shown when the error occurred, e.g. 2024-01-31 12:00:00.000000
+        """
+        errorTime = ' '.join(errorTime).strip("[]")
+
+        logInfo(f"error_log({ctx.guild.id}, {errorTime})")
+
+        context = await dbcall(getLogContext, errorTime)
+
+        if not (context):
+            raise InputError(f"No error was logged at \"{errorTime}\"")
+
+        await ctx.send(f"Log context for error at {errorTime}", file = discord.File(io.BytesIO(context.encode()), filename = "errorlog.txt"))
+
+        logInfo(f"Sent log context for error at {errorTime}")
+
+    @commands.command(aliases = ["savefileformat", "savefile-format", "savefileFormat"])
+    @commands.is_owner()
+    async def savefile_format(self, ctx, savefileFormat):
+        """
+        Convert this server's savefile to another format
+        Args:
+            savefileFormat: json, or binary to only decode the nations each command uses
+        """
+        logInfo(f"savefile_format({ctx.guild.id}, {savefileFormat})")
+
+        savegameInfo = await dbcall(dbget_saveGame_byServer, ctx.guild.id)
+
+        if not (savegameInfo):
+            raise InputError("This server has no savegame")
+
+        await dbcall(convert_saveGame, savegameInfo["savefile"], savefileFormat.lower())
+
+        logInfo(f"Converted savefile for server {ctx.guild.id} to {savefileFormat}")
+        await ctx.send(f"Converted this server's savefile to {savefileFormat}!")
+
+    @commands.command(aliases = ["cachestats", "cache-stats", "cacheStats"])
+    @commands.is_owner()
+    async def cache_stats(self, ctx):
+        """
+        See how well the bot's caches of game files and database rows are working
+        """
+        logInfo(f"cache_stats({ctx.guild.id})")
+
+        stats = caching.allCacheStats()
+
+        #Discord messages are limited to 2000 characters, so each cache is sent on its own
+        for name, cacheStats in stats.items():
+            message = pprint.pformat({name: cacheStats}, sort_dicts = False, width = 120)
+
+            for i in range(0, len(message), 1900):
+                await ctx.send("```\n" + message[i : i + 1900] + "\n```")
+
+        logInfo("Sent cache statistics", details = stats)
+
+    @commands.command(aliases = ["dbpool", "db-pool", "dbPool"])
+    @commands.is_owner()
+    async def db_pool(self, ctx):
+        """
+        See how busy the bot's database connections are
+        """
+        logInfo(f"db_pool({ctx.guild.id})")
+
+        stats = getpool().stats()
+
+        await ctx.send("```\n" + pprint.pformat(stats, sort_dicts = False) + "\n```")
+
+        logInfo("Sent database connection pool statistics", details = stats)
+
+    @commands.command(aliases = ["dbstats", "db-stats", "dbStats"])
+    @commands.is_owner()
+    async def db_stats(self, ctx, command_name = None):
+        """
+        See which commands spend the most time in the database, and which statements they run too often
+        Args:
+            command_name (Optional): Only show statistics for this command
+        """
+        logInfo(f"db_stats({ctx.guild.id}, {command_name})")
+
+        stats = querystats.summary(command_name)
+        message = pprint.pformat(stats, sort_dicts = False, width = 120)
+
+        #Discord messages are limited to 2000 characters
+        for i in range(0, len(message), 1900):
+            await ctx.send("```\n" + message[i : i + 1900] + "\n```")
+
+        logInfo("Sent database query statistics", details = stats)
         
 
 async def setup(client):
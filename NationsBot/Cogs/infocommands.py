@@ -34,7 +34,7 @@ class InfoCommands(commands.Cog):
         """
         logInfo(f"giveTerritory({ctx.guild.id})")
 
-        savegame = get_SavegameFromCtx(ctx)
+        savegame = await aget_SavegameFromCtx(ctx)
 
         menu = MenuEmbed(
             f"{savegame.name} Game State", 
@@ -60,7 +60,7 @@ class InfoCommands(commands.Cog):
         """
         logInfo(f"nationinfo({ctx.guild.id}, {roleid})")
 
-        savegame = get_SavegameFromCtx(ctx)
+        savegame = await aget_SavegameFromCtx(ctx)
         if not (savegame): 
             return #Error will already have been handled
 
@@ -68,7 +68,7 @@ class InfoCommands(commands.Cog):
 
         if (not roleid):
 
-            playerinfo = get_player_byGame(savegame, ctx.author.id)
+            playerinfo = await dbcall(get_player_byGame, savegame, ctx.author.id)
 
             if not (playerinfo):
                 raise InputError(f"Could not get a nation for player <@{ctx.author.id}>")
@@ -76,15 +76,17 @@ class InfoCommands(commands.Cog):
             roleid = playerinfo['role_discord_id']
             logInfo(f"Got default role id {roleid} for this player")
 
-        nation = get_NationFromRole(ctx, roleid, savegame)
+        nation = await aget_NationFromRole(ctx, roleid, savegame)
         
+        revenue = nation.get_TurnRevenue(savegame, onlyestimate = True)
+
         menu = MenuEmbed(
             f"{nation.name} Information", 
             None, 
             None,
             fields = [
                 ("Resources", nation.resources),
-                ("Revenue", ops.combineDicts(nation.get_TurnRevenue(savegame, onlyestimate = True), {"Money": nation.get_taxincome(gamerule)})),
+                ("Revenue", ops.combineDicts(revenue, {"Money": nation.get_taxincome(gamerule)})),
                 ("Bureaucracy", {f"{category}": f"{cap[0]}/{cap[1]}" for category, cap in nation.bureaucracy.items()}),
                 ("Modifiers", nation.modifiers)
             ]
@@ -103,13 +105,13 @@ class InfoCommands(commands.Cog):
         """
         logInfo(f"nationinfo({ctx.guild.id})")
 
-        savegame = get_SavegameFromCtx(ctx)
+        savegame = await aget_SavegameFromCtx(ctx)
         if not (savegame): 
             return #Error will already have been handled
 
         gamerule = savegame.getGamerule()
 
-        nations = get_PlayerGames(savegame.server_id)
+        nations = await dbcall(get_PlayerGames, savegame.server_id)
 
         if not(nations):
             await ctx.send("No nations in this game yet! An admin can use the command add_nation.")
@@ -142,13 +144,13 @@ class InfoCommands(commands.Cog):
         """
         logInfo(f"forces({ctx.guild.id}, {roleid})")
 
-        savegame = get_SavegameFromCtx(ctx)
+        savegame = await aget_SavegameFromCtx(ctx)
         if not (savegame): 
             return #Error will already have been handled
 
         if (not roleid):
 
-            playerinfo = get_player_byGame(savegame, ctx.author.id)
+            playerinfo = await dbcall(get_player_byGame, savegame, ctx.author.id)
 
             if not (playerinfo):
                 raise InputError(f"Could not get a nation for player <@{ctx.author.id}>")
@@ -156,7 +158,7 @@ class InfoCommands(commands.Cog):
             roleid = playerinfo['role_discord_id']
             logInfo(f"Got default role id {roleid} for this player")
 
-        nation = get_NationFromRole(ctx, roleid, savegame)
+        nation = await aget_NationFromRole(ctx, roleid, savegame)
 
         menu = MenuEmbed(
             f"{nation.name} Military Forces", 
@@ -192,7 +194,7 @@ class InfoCommands(commands.Cog):
         """
         logInfo(f"force({ctx.guild.id}, {forcename})")
 
-        savegame = get_SavegameFromCtx(ctx)
+        savegame = await aget_SavegameFromCtx(ctx)
         if not (savegame): 
             return #Error will already have been handled
             
@@ -235,7 +237,7 @@ class InfoCommands(commands.Cog):
         """
         logInfo(f"units({ctx.guild.id})")
 
-        savegame = get_SavegameFromCtx(ctx)
+        savegame = await aget_SavegameFromCtx(ctx)
         if not (savegame): 
             return #Error will already have been handled
 
@@ -274,13 +276,13 @@ class InfoCommands(commands.Cog):
         """
         logInfo(f"territories({ctx.guild.id}, {roleid})")
 
-        savegame = get_SavegameFromCtx(ctx)
+        savegame = await aget_SavegameFromCtx(ctx)
         if not (savegame): 
             return #Error will already have been handled
 
         if (not roleid):
 
-            playerinfo = get_player_byGame(savegame, ctx.author.id)
+            playerinfo = await dbcall(get_player_byGame, savegame, ctx.author.id)
 
             if not (playerinfo):
                 raise InputError(f"Could not get a nation for player <@{ctx.author.id}>")
@@ -288,7 +290,7 @@ class InfoCommands(commands.Cog):
             roleid = playerinfo['role_discord_id']
             logInfo(f"Got default role id {roleid} for this player")
 
-        nation = get_NationFromRole(ctx, roleid, savegame)
+        nation = await aget_NationFromRole(ctx, roleid, savegame)
         
 
         world = savegame.getWorld()
@@ -296,8 +298,8 @@ class InfoCommands(commands.Cog):
             raise InputError("Savegame's world could not be retrieved")
 
         #Handles getting the world map if one exists that represents the current gamestate, or creating a new one otherwise.
-        savegame.world_toImage(mapScale = (100, 100))
-        worldMapInfo = dbget_worldMap(world, savegame, savegame.turn)
+        await aworld_toImage(savegame, mapScale = (100, 100))
+        worldMapInfo = await dbcall(dbget_worldMap, world, savegame, savegame.turn)
 
         logInfo("Got a matching world map for this game.", details = {k: v for k, v in worldMapInfo.items() if k != 'created'})
 
@@ -336,7 +338,7 @@ class InfoCommands(commands.Cog):
         """
         logInfo(f"territory({ctx.guild.id, terrID})")
 
-        savegame = get_SavegameFromCtx(ctx)
+        savegame = await aget_SavegameFromCtx(ctx)
         if not (savegame): 
             return
 
@@ -394,7 +396,7 @@ class InfoCommands(commands.Cog):
         """
         logInfo(f"territory_buildings({ctx.guild.id}, {terrID})")
 
-        savegame = get_SavegameFromCtx(ctx)
+        savegame = await aget_SavegameFromCtx(ctx)
         if not (savegame): 
             return #Error will already have been handled
 
@@ -447,7 +449,7 @@ class InfoCommands(commands.Cog):
         """
         logInfo(f"buildings({ctx.guild.id})")
 
-        savegame = get_SavegameFromCtx(ctx)
+        savegame = await aget_SavegameFromCtx(ctx)
         if not (savegame): 
             return #Error will already have been handled
 
@@ -551,7 +553,7 @@ class InfoCommands(commands.Cog):
         """
         logInfo(f"population({ctx.guild.id}, {optionalID})")
 
-        savegame = get_SavegameFromCtx(ctx)
+        savegame = await aget_SavegameFromCtx(ctx)
         if not (savegame): 
             return #Error will already have been handled
 
@@ -559,7 +561,7 @@ class InfoCommands(commands.Cog):
 
         if not (roleid):
 
-            playerinfo = get_player_byGame(savegame, ctx.author.id)
+            playerinfo = await dbcall(get_player_byGame, savegame, ctx.author.id)
 
             if not (playerinfo):
                 raise InputError(f"Could not get a nation for player <@{ctx.author.id}>")
@@ -567,7 +569,7 @@ class InfoCommands(commands.Cog):
             roleid = playerinfo['role_discord_id']
             logInfo(f"Got default role id {roleid} for this player")
 
-        nation = get_NationFromRole(ctx, roleid, savegame, isOptionalArg=True)
+        nation = await aget_NationFromRole(ctx, roleid, savegame, isOptionalArg=True)
 
         if (nation): 
             menu = self.nation_population(ctx, nation)
@@ -589,7 +591,7 @@ class InfoCommands(commands.Cog):
         """
         logInfo(f"population_info({ctx.guild.id})")
 
-        savegame = get_SavegameFromCtx(ctx)
+        savegame = await aget_SavegameFromCtx(ctx)
         if not (savegame): 
             return #Error will already have been handled
 
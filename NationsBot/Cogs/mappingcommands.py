@@ -30,7 +30,7 @@ class MappingCommands(commands.Cog):
         """
         logInfo(f"worldmap({ctx.guild.id})")
 
-        savegame = get_SavegameFromCtx(ctx)
+        savegame = await aget_SavegameFromCtx(ctx)
         if not (savegame): 
             raise NonFatalError("No savegame attached to this server")
 
@@ -39,8 +39,8 @@ class MappingCommands(commands.Cog):
             raise InputError("Savegame's world could not be retrieved")
 
         #Handles getting the world map if one exists that represents the current gamestate, or creating a new one otherwise.
-        savegame.world_toImage(mapScale = (100, 100))
-        worldMapInfo = dbget_worldMap(world, savegame, savegame.turn)
+        await aworld_toImage(savegame, mapScale = (100, 100))
+        worldMapInfo = await dbcall(dbget_worldMap, world, savegame, savegame.turn)
 
         logInfo("Got a matching world map for this game.", details = {k: v for k, v in worldMapInfo.items() if k != 'created'})
         
@@ -84,7 +84,7 @@ class MappingCommands(commands.Cog):
         """
         logInfo(f"worldmap_full({ctx.guild.id})")
 
-        savegame = get_SavegameFromCtx(ctx)
+        savegame = await aget_SavegameFromCtx(ctx)
         if not (savegame): 
             raise NonFatalError("No savegame attached to this server")
 
@@ -93,8 +93,8 @@ class MappingCommands(commands.Cog):
             raise InputError("Savegame's world could not be retrieved")
 
         #Handles getting the world map if one exists that represents the current gamestate, or creating a new one otherwise.
-        savegame.world_toImage(mapScale = (100, 100))
-        worldMapInfo = dbget_worldMap(world, savegame, savegame.turn)
+        await aworld_toImage(savegame, mapScale = (100, 100))
+        worldMapInfo = await dbcall(dbget_worldMap, world, savegame, savegame.turn)
 
         logInfo("Got a matching world map for this game.", details = {k: v for k, v in worldMapInfo.items() if k != 'created'})
         
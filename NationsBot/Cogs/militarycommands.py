@@ -39,11 +39,10 @@ class MilitaryCommands(commands.Cog):
 
         amount = int(amount)
 
-        savegame = get_SavegameFromCtx(ctx)
-        if not (savegame): 
-            return #Error will already have been handled
+        context = await aget_CommandContext(ctx)
+        savegame = context.savegame
 
-        world = savegame.getWorld()
+        world = context.world
         if not (world):
             raise InputError("Savegame's world could not be retrieved")
 
@@ -58,14 +57,8 @@ class MilitaryCommands(commands.Cog):
         territoryName = world_terr.name
 
         #Validate that the player owns this territory
-        playerinfo = get_player_byGame(savegame, ctx.author.id)
-
-        if not (playerinfo):
-            raise InputError(f"Could not get a nation for player <@{ctx.author.id}>")
-
-        roleid = playerinfo['role_discord_id']
-
-        nation = get_NationFromRole(ctx, roleid, savegame)
+        playerinfo = context.playerinfo
+        nation = context.nation
 
         if not (territoryName in nation.territories.keys()):
             raise InputError(f"<@&{playerinfo['role_discord_id']}> does not own the territory {territoryName}")
@@ -100,11 +93,10 @@ class MilitaryCommands(commands.Cog):
 
         amount = int(amount)
 
-        savegame = get_SavegameFromCtx(ctx)
-        if not (savegame): 
-            return #Error will already have been handled
+        context = await aget_CommandContext(ctx)
+        savegame = context.savegame
 
-        world = savegame.getWorld()
+        world = context.world
         if not (world):
             raise InputError("Savegame's world could not be retrieved")
 
@@ -119,14 +111,8 @@ class MilitaryCommands(commands.Cog):
         territoryName = world_terr.name
 
         #Validate that the player owns this territory
-        playerinfo = get_player_byGame(savegame, ctx.author.id)
-
-        if not (playerinfo):
-            raise InputError(f"Could not get a nation for player <@{ctx.author.id}>")
-
-        roleid = playerinfo['role_discord_id']
-
-        nation = get_NationFromRole(ctx, roleid, savegame)
+        playerinfo = context.playerinfo
+        nation = context.nation
 
         if not (territoryName in nation.territories.keys()):
             raise InputError(f"<@&{playerinfo['role_discord_id']}> does not own the territory {territoryName}")
@@ -161,19 +147,12 @@ class MilitaryCommands(commands.Cog):
         """
         logInfo(f"rename_force({ctx.guild.id}, {old_forcename}, {new_forcename})")
 
-        savegame = get_SavegameFromCtx(ctx)
-        if not (savegame): 
-            return #Error will already have been handled
+        context = await aget_CommandContext(ctx)
+        savegame = context.savegame
 
         #Validate that the player owns these forces
-        playerinfo = get_player_byGame(savegame, ctx.author.id)
-
-        if not (playerinfo):
-            raise InputError(f"Could not get a nation for player <@{ctx.author.id}>")
-
-        roleid = playerinfo['role_discord_id']
-
-        nation = get_NationFromRole(ctx, roleid, savegame)
+        playerinfo = context.playerinfo
+        nation = context.nation
 
         if not (old_forcename in nation.military.keys()):
             raise InputError(f"<@&{playerinfo['role_discord_id']}> does not own the force {old_forcename}. If the name has spaces, use quotation marks like this: \"name of force\"")
@@ -201,19 +180,12 @@ class MilitaryCommands(commands.Cog):
         """
         logInfo(f"rename_unit_unit({ctx.guild.id}, {old_unitname}, {new_unitname})")
 
-        savegame = get_SavegameFromCtx(ctx)
-        if not (savegame): 
-            return #Error will already have been handled
+        context = await aget_CommandContext(ctx)
+        savegame = context.savegame
 
         #Validate that the player owns these forces
-        playerinfo = get_player_byGame(savegame, ctx.author.id)
-
-        if not (playerinfo):
-            raise InputError(f"Could not get a nation for player <@{ctx.author.id}>")
-
-        roleid = playerinfo['role_discord_id']
-
-        nation = get_NationFromRole(ctx, roleid, savegame)
+        playerinfo = context.playerinfo
+        nation = context.nation
 
         if not (base_forcename in nation.military.keys()):
             raise InputError(f"<@&{playerinfo['role_discord_id']}> does not own the force {base_forcename}. If the name has spaces, use quotation marks like this: \"name of force\"")
@@ -256,11 +228,10 @@ class MilitaryCommands(commands.Cog):
 
         amount = int(amount)
 
-        savegame = get_SavegameFromCtx(ctx)
-        if not (savegame): 
-            return #Error will already have been handled
+        context = await aget_CommandContext(ctx)
+        savegame = context.savegame
 
-        world = savegame.getWorld()
+        world = context.world
         if not (world):
             raise InputError("Savegame's world could not be retrieved")
 
@@ -275,19 +246,13 @@ class MilitaryCommands(commands.Cog):
         territoryName = world_terr.name
 
         #Validate that the player owns this territory
-        playerinfo = get_player_byGame(savegame, ctx.author.id)
-
-        if not (playerinfo):
-            raise InputError(f"Could not get a nation for player <@{ctx.author.id}>")
-
-        roleid = playerinfo['role_discord_id']
-
-        nation = get_NationFromRole(ctx, roleid, savegame)
+        playerinfo = context.playerinfo
+        nation = context.nation
 
         if not (territoryName in nation.territories.keys()):
             raise InputError(f"<@&{playerinfo['role_discord_id']}> does not own the territory {territoryName}")
 
-        gamerule = savegame.getGamerule()
+        gamerule = context.gamerule
 
         blueprint = military.get_blueprint(unitType, gamerule)
 
@@ -318,11 +283,10 @@ class MilitaryCommands(commands.Cog):
 
         amount = int(amount)
 
-        savegame = get_SavegameFromCtx(ctx)
-        if not (savegame): 
-            return #Error will already have been handled
+        context = await aget_CommandContext(ctx)
+        savegame = context.savegame
 
-        world = savegame.getWorld()
+        world = context.world
         if not (world):
             raise InputError("Savegame's world could not be retrieved")
 
@@ -337,19 +301,13 @@ class MilitaryCommands(commands.Cog):
         territoryName = world_terr.name
 
         #Validate that the player owns this territory
-        playerinfo = get_player_byGame(savegame, ctx.author.id)
-
-        if not (playerinfo):
-            raise InputError(f"Could not get a nation for player <@{ctx.author.id}>")
-
-        roleid = playerinfo['role_discord_id']
-
-        nation = get_NationFromRole(ctx, roleid, savegame)
+        playerinfo = context.playerinfo
+        nation = context.nation
 
         if not (territoryName in nation.territories.keys()):
             raise InputError(f"<@&{playerinfo['role_discord_id']}> does not own the territory {territoryName}")
 
-        gamerule = savegame.getGamerule()
+        gamerule = context.gamerule
 
         blueprint = military.get_blueprint(vehicleType, gamerule)
 
@@ -374,19 +332,12 @@ class MilitaryCommands(commands.Cog):
         """
         logInfo(f"combine_forces({ctx.guild.id}, {base_forcename}, {additional_forcenames})")
 
-        savegame = get_SavegameFromCtx(ctx)
-        if not (savegame): 
-            return #Error will already have been handled
+        context = await aget_CommandContext(ctx)
+        savegame = context.savegame
 
         #Validate that the player owns these forces
-        playerinfo = get_player_byGame(savegame, ctx.author.id)
-
-        if not (playerinfo):
-            raise InputError(f"Could not get a nation for player <@{ctx.author.id}>")
-
-        roleid = playerinfo['role_discord_id']
-
-        nation = get_NationFromRole(ctx, roleid, savegame)
+        playerinfo = context.playerinfo
+        nation = context.nation
 
         if not (base_forcename in nation.military.keys()):
             raise InputError(f"<@&{playerinfo['role_discord_id']}> does not own the force {base_forcename}. If the name has spaces, use quotation marks like this: \"name of force\"")
@@ -421,19 +372,12 @@ class MilitaryCommands(commands.Cog):
         
         logInfo(f"combine_units({ctx.guild.id}, {base_forcename}, {base_unitname}, {additional_unitnames})")
 
-        savegame = get_SavegameFromCtx(ctx)
-        if not (savegame): 
-            return #Error will already have been handled
+        context = await aget_CommandContext(ctx)
+        savegame = context.savegame
 
         #Validate that the player owns these forces
-        playerinfo = get_player_byGame(savegame, ctx.author.id)
-
-        if not (playerinfo):
-            raise InputError(f"Could not get a nation for player <@{ctx.author.id}>")
-
-        roleid = playerinfo['role_discord_id']
-
-        nation = get_NationFromRole(ctx, roleid, savegame)
+        playerinfo = context.playerinfo
+        nation = context.nation
 
         if not (base_forcename in nation.military.keys()):
             raise InputError(f"<@&{playerinfo['role_discord_id']}> does not own the force {base_forcename}. If the name has spaces, use quotation marks like this: \"name of force\"")
@@ -483,19 +427,12 @@ class MilitaryCommands(commands.Cog):
 
         new_unitsizes = [int(unitsize) for unitsize in new_unitsizes]
 
-        savegame = get_SavegameFromCtx(ctx)
-        if not (savegame): 
-            return #Error will already have been handled
+        context = await aget_CommandContext(ctx)
+        savegame = context.savegame
 
         #Validate that the player owns these forces
-        playerinfo = get_player_byGame(savegame, ctx.author.id)
-
-        if not (playerinfo):
-            raise InputError(f"Could not get a nation for player <@{ctx.author.id}>")
-
-        roleid = playerinfo['role_discord_id']
-
-        nation = get_NationFromRole(ctx, roleid, savegame)
+        playerinfo = context.playerinfo
+        nation = context.nation
 
         if not (base_forcename in nation.military.keys()):
             raise InputError(f"<@&{playerinfo['role_discord_id']}> does not own the force {base_forcename}. If the name has spaces, use quotation marks like this: \"name of force\"")
@@ -533,19 +470,12 @@ class MilitaryCommands(commands.Cog):
         if (len(units_toSplit) < 1):
             raise InputError(f"Must have at least one unit to transfer")
 
-        savegame = get_SavegameFromCtx(ctx)
-        if not (savegame): 
-            return #Error will already have been handled
+        context = await aget_CommandContext(ctx)
+        savegame = context.savegame
 
         #Validate that the player owns these forces
-        playerinfo = get_player_byGame(savegame, ctx.author.id)
-
-        if not (playerinfo):
-            raise InputError(f"Could not get a nation for player <@{ctx.author.id}>")
-
-        roleid = playerinfo['role_discord_id']
-
-        nation = get_NationFromRole(ctx, roleid, savegame)
+        playerinfo = context.playerinfo
+        nation = context.nation
 
         if not (base_forcename in nation.military.keys()):
             raise InputError(f"<@&{playerinfo['role_discord_id']}> does not own the force {base_forcename}. If the name has spaces, use quotation marks like this: \"name of force\"")
@@ -576,19 +506,12 @@ class MilitaryCommands(commands.Cog):
         if (len(units_toDisband) < 1):
             raise InputError(f"Must have at least one unit to disband")
 
-        savegame = get_SavegameFromCtx(ctx)
-        if not (savegame): 
-            return #Error will already have been handled
+        context = await aget_CommandContext(ctx)
+        savegame = context.savegame
 
         #Validate that the player owns these forces
-        playerinfo = get_player_byGame(savegame, ctx.author.id)
-
-        if not (playerinfo):
-            raise InputError(f"Could not get a nation for player <@{ctx.author.id}>")
-
-        roleid = playerinfo['role_discord_id']
-
-        nation = get_NationFromRole(ctx, roleid, savegame)
+        playerinfo = context.playerinfo
+        nation = context.nation
 
         if not (base_forcename in nation.military.keys()):
             raise InputError(f"<@&{playerinfo['role_discord_id']}> does not own the force {base_forcename}. If the name has spaces, use quotation marks like this: \"name of force\"")
@@ -617,19 +540,12 @@ class MilitaryCommands(commands.Cog):
 
         logInfo(f"disband_units({ctx.guild.id}, {base_forcename})")
 
-        savegame = get_SavegameFromCtx(ctx)
-        if not (savegame): 
-            return #Error will already have been handled
+        context = await aget_CommandContext(ctx)
+        savegame = context.savegame
 
         #Validate that the player owns these forces
-        playerinfo = get_player_byGame(savegame, ctx.author.id)
-
-        if not (playerinfo):
-            raise InputError(f"Could not get a nation for player <@{ctx.author.id}>")
-
-        roleid = playerinfo['role_discord_id']
-
-        nation = get_NationFromRole(ctx, roleid, savegame)
+        playerinfo = context.playerinfo
+        nation = context.nation
 
         if not (base_forcename in nation.military.keys()):
             raise InputError(f"<@&{playerinfo['role_discord_id']}> does not own the force {base_forcename}. If the name has spaces, use quotation marks like this: \"name of force\"")
@@ -651,15 +567,14 @@ class MilitaryCommands(commands.Cog):
 
         logInfo(f"move_force({ctx.guild.id}, {base_forcename}, {terrIDs})")
 
-        savegame = get_SavegameFromCtx(ctx)
-        if not (savegame): 
-            return #Error will already have been handled
+        context = await aget_CommandContext(ctx)
+        savegame = context.savegame
 
-        world = savegame.getWorld()
+        world = context.world
         if not (world):
             raise InputError("Savegame's world could not be retrieved")
 
-        gamerule = savegame.getGamerule()
+        gamerule = context.gamerule
 
         if not (gamerule):
             raise InputError("Savegame's gamerule could not be retrieved")
@@ -679,14 +594,8 @@ class MilitaryCommands(commands.Cog):
             territories.append(world_terr.name)
 
         #Validate that the player owns these forces
-        playerinfo = get_player_byGame(savegame, ctx.author.id)
-
-        if not (playerinfo):
-            raise InputError(f"Could not get a nation for player <@{ctx.author.id}>")
-
-        roleid = playerinfo['role_discord_id']
-
-        nation = get_NationFromRole(ctx, roleid, savegame)
+        playerinfo = context.playerinfo
+        nation = context.nation
 
         if not (base_forcename in nation.military.keys()):
             raise InputError(f"<@&{playerinfo['role_discord_id']}> does not own the force {base_forcename}. If the name has spaces, use quotation marks like this: \"name of force\"")
@@ -28,7 +28,7 @@ def validate_status(newstatus):
 def get_allbuildings(savegame):
     """ Return the information relating to all buildings in a savegame's gamerule """
 
-    logInfo(f"Getting all building blueprints from {savegame.name} gamerule")
+    logDebug(lambda: f"Getting all building blueprints from {savegame.name} gamerule", sampleEvery = 100)
 
     gamerule = savegame.getGamerule()
 
@@ -37,7 +37,7 @@ def get_allbuildings(savegame):
 def get_blueprint(buildingName, savegame):
     """ Return the information relating to this building in a savegame's gamerule """
 
-    logInfo(f"Getting {buildingName} info from {savegame.name} gamerule")
+    logDebug(lambda: f"Getting {buildingName} info from {savegame.name} gamerule", sampleEvery = 100)
 
     allbuildings = get_allbuildings(savegame)
 
@@ -131,7 +131,7 @@ def building_newturn(buildingName, allbuildings, resourcesLeft = None):
 def get_territories_buildingincome(territoryInfo, savegame):
     """ Get the net income of a territory from all of the buildings in it """
 
-    logInfo(f"Getting net income from all buildings for {territoryInfo['Name']}")
+    logDebug(lambda: f"Getting net income from all buildings for {territoryInfo['Name']}", sampleEvery = 100)
 
     allbuildings = get_allbuildings(savegame)
     
@@ -1,31 +1,96 @@
-import json
-from functools import lru_cache
+import json, os, contextvars
 
 from logger import *
 
 from database import *
 from common import *
-from GameUtils import filehandling, schema
+from GameUtils import caching, filehandling, journaling, savecontainer, schema, writebehind
 from Schemas.schema_world import schema_world
 from Schemas.schema_gamerule import schema_gamerule
 
 from ConcertOfNationsEngine.gameobjects import *
 from ConcertOfNationsEngine.concertofnations_exceptions import *
 
+#Savegames loaded by each server, keyed by server id
+savegameCache = caching.FileCache("Savegames", int(os.getenv("SAVEGAME_CACHE_MB", 256)) * 1024 * 1024)
+
+#Rough number of bytes a loaded savegame takes up in memory per byte of its savefile, by savefile format
+savegameMemoryFactor = {"json": 4, "binary": 20}
+
+#Parsed gamerules, keyed by gamerule name. Every command and turn that uses the same gamerule shares one parsed copy.
+gameruleCache = caching.FileCache("Gamerules", int(os.getenv("GAMERULE_CACHE_MB", 64)) * 1024 * 1024, checkSeconds = 1)
+
+#Name of the gamerule each server's savegame uses, keyed by server id
+savegameGameruleNames = caching.FileCache("Savegame Gamerules", 1024 * 1024)
+
+#Rough number of bytes a parsed gamerule takes up in memory per byte of its file
+gameruleMemoryFactor = 6
+
+#Loaded worlds, keyed by world name
+worldCache = caching.FileCache("Worlds", int(os.getenv("WORLD_CACHE_MB", 128)) * 1024 * 1024, checkSeconds = 1)
+
+#Name of the world each server's savegame uses, keyed by server id
+savegameWorldNames = caching.FileCache("Savegame Worlds", 1024 * 1024)
+
+#Rough number of bytes a loaded world takes up in memory per byte of its file
+worldMemoryFactor = 6
+
+#Database rows that are looked up on almost every command but rarely change
+#Savegames rows, keyed by server id
+savegameRowCache = caching.LookupCache("Savegame Rows", 4096)
+
+#Players rows, keyed by player discord id
+playerRowCache = caching.LookupCache("Player Rows", 16384)
+
+#Roles rows, keyed by role discord id
+roleRowCache = caching.LookupCache("Role Rows", 16384)
+
+#get_player_byGame rows, keyed by (server id, player discord id)
+playerGameRowCache = caching.LookupCache("Player Game Rows", 16384)
+
+#WorldMaps rows, keyed by (server id, turn, map number, role discord id or None). A map's link never changes once it has been uploaded.
+worldMapCache = caching.LookupCache("World Map Links", 4096, ttlSeconds = 24 * 60 * 60)
+
+#The world and gamerule of the savegame the running command works on, as (server id, world, gamerule), once use_commandGameFiles has been called.
+#Game logic that changes a savegame runs on the event loop, so that no other command sees the savegame half changed. The files are loaded
+#in a worker thread beforehand, and Savegame.getWorld and getGamerule find them here instead of loading them on the event loop.
+commandGameFiles = contextvars.ContextVar("commandGameFiles", default = None)
+
+#Columns of each table read by dbget_commandContext, in the order get_player_byGame's SELECT * returns them
+commandContextColumns = {
+    "PlayerGames": ["player_id", "game_id", "role_id", "created"],
+    "Players": ["id", "player_discord_id", "created"],
+    "Savegames": ["id", "server_id", "savefile", "world_id", "gamerulefile", "created"],
+    "Roles": ["id", "role_discord_id", "name"],
+    "Worlds": ["name"]
+}
+
 # Deal with worlds
 
 def save_world(world):
-    with open(f"{worldsDir}/{world.name}.json", 'w') as f:
-        json.dump(filehandling.saveObject(world), f, indent = 4)
+    filehandling.easySave(world, world.name, worldsDir)
+    worldCache.invalidate(world.name)
 
     logInfo(f"Successfully saved world {world.name}")
 
-@lru_cache(maxsize=16)
+def world_version(world_name):
+    return caching.fileVersion(f"{worldsDir}/{world_name}.json")
+
 def load_world(world_name):
     """
     Load a world from a .json file representing a map without nations, buildings etc; only terrain, resources etc.
+    The world is cached and shared between callers.
     """
+
+    world = worldCache.get(world_name, lambda: world_version(world_name))
+    if (world != None): return world
+
+    #Read the version before loading, so that a change made while loading is noticed next time
+    version = world_version(world_name)
+
     world = filehandling.easyLoad(world_name, worldsDir)
+    worldCache.put(world_name, world, version, version[0][1] * worldMemoryFactor if version[0] else 0)
+
     logInfo(f"World {world.name} successfully loaded")
     return world
 
@@ -34,13 +99,13 @@ def dbget_world_byName(world_name):
     Get the row in the database table Worlds with this name
     """
 
-    db = getdb()
-    cursor = db.cursor(buffered=True)
+    with dbconnection() as db:
+        cursor = db.cursor(buffered=True)
 
-    stmt = "SELECT * FROM Worlds WHERE name=%s LIMIT 1;"
-    params = [world_name]
-    cursor.execute(stmt, params)
-    result = fetch_assoc(cursor)
+        stmt = "SELECT * FROM Worlds WHERE name=%s LIMIT 1;"
+        params = [world_name]
+        cursor.execute(stmt, params)
+        result = fetch_assoc(cursor)
 
     if not (result): return False
     logInfo(f"Retrieved world {world_name} from database")
@@ -48,22 +113,27 @@ def dbget_world_byName(world_name):
 
 def dbget_world_bysavegame(server_id):
     """
-    Get the row in the database table Worlds associated with this savegame
+    Get the world associated with this savegame
     """
-        
+
+    world_name = savegameWorldNames.get(server_id)
+    if (world_name): return gamehandling.load_world(world_name)
+
     logInfo(f"Getting world for savegame {server_id} from database")
-    db = getdb()
-    cursor = db.cursor()
+    with dbconnection() as db:
+        cursor = db.cursor()
 
-    stmt = "SELECT Worlds.* FROM Savegames JOIN Worlds ON Savegames.world_id = Worlds.id WHERE Savegames.server_id=%s LIMIT 1;"
-    params = [server_id]
-    cursor.execute(stmt, params)
-    result = fetch_assoc(cursor)
+        stmt = "SELECT Worlds.* FROM Savegames JOIN Worlds ON Savegames.world_id = Worlds.id WHERE Savegames.server_id=%s LIMIT 1;"
+        params = [server_id]
+        cursor.execute(stmt, params)
+        result = fetch_assoc(cursor)
 
     if not (result):
         return False
 
     logInfo("Got worldfile info")
+    savegameWorldNames.put(server_id, result["name"], size = len(result["name"]))
+
     return gamehandling.load_world(result["name"])
 
 def setupNew_world(world):
@@ -77,13 +147,13 @@ def setupNew_world(world):
 
     #Update database
     try:
-        db = getdb()
-        cursor = db.cursor(buffered=True)
+        with dbconnection() as db:
+            cursor = db.cursor(buffered=True)
 
-        stmt = "INSERT INTO Worlds (name) VALUES (%s)"
-        params = [world.name]
-        cursor.execute(stmt, params)
-        db.commit()
+            stmt = "INSERT INTO Worlds (name) VALUES (%s)"
+            params = [world.name]
+            cursor.execute(stmt, params)
+            db.commit()
     except Exception as e:
         logError(e)
         raise LogicError(f"World could not be inserted!")
@@ -117,44 +187,67 @@ def insert_worldMap(world, savegame, filename, link, nation = None):
         if not (roleInfo):
             raise InputError(f"Nation {nation.name} does not exist in the database as a role")
 
+    generation = worldMapCache.generation
+
      #Update database
     try:
-        db = getdb()
-        cursor = db.cursor(buffered=True)
+        with dbconnection() as db:
+            cursor = db.cursor(buffered=True)
 
-        if (nation):
-            stmt = "INSERT INTO WorldMaps (world_id, savegame_id, turn_no, turn_map_no, role_id, filename, link) VALUES (%s, %s, %s, %s, %s, %s, %s)"
-            params = [worldInfo['id'], savegameInfo['id'], savegame.turn, savegame.gamestate["mapNum"], roleInfo['id'], filename, link]
+            if (nation):
+                stmt = "INSERT INTO WorldMaps (world_id, savegame_id, turn_no, turn_map_no, role_id, filename, link) VALUES (%s, %s, %s, %s, %s, %s, %s)"
+                params = [worldInfo['id'], savegameInfo['id'], savegame.turn, savegame.gamestate["mapNum"], roleInfo['id'], filename, link]
 
-        else:
-            stmt = "INSERT INTO WorldMaps (world_id, savegame_id, turn_no, turn_map_no, filename, link) VALUES (%s, %s, %s, %s, %s, %s)"
-            params = [worldInfo['id'], savegameInfo['id'], savegame.turn, savegame.gamestate["mapNum"], filename, link]
+            else:
+                stmt = "INSERT INTO WorldMaps (world_id, savegame_id, turn_no, turn_map_no, filename, link) VALUES (%s, %s, %s, %s, %s, %s)"
+                params = [worldInfo['id'], savegameInfo['id'], savegame.turn, savegame.gamestate["mapNum"], filename, link]
 
-        cursor.execute(stmt, params)
-        db.commit()
+            cursor.execute(stmt, params)
+            row_id = cursor.lastrowid
+            db.commit()
     except Exception as e:
         logError(e)
         raise LogicError(f"World could not be inserted!")
 
+    #The map can be shown right away without looking it up again
+    row = {
+        "id": row_id,
+        "world_id": worldInfo['id'],
+        "savegame_id": savegameInfo['id'],
+        "role_id": roleInfo['id'] if nation else None,
+        "turn_no": savegame.turn,
+        "turn_map_no": savegame.gamestate["mapNum"],
+        "filename": filename,
+        "link": link
+    }
+
+    worldMapCache.putIfCurrent((savegame.server_id, savegame.turn, savegame.gamestate["mapNum"], nation.role_id if nation else None), row, generation)
+
 def dbget_worldMap(world, savegame, turn, nation = None):
     """
     Get the row in the database table WorldMaps pertaining to the information provided
     """
-    logInfo(f"Retrieving a world map with the world {world.name} and the game {savegame.name} from the database")
 
-    db = getdb()
-    cursor = db.cursor(buffered=True)
+    mapNum = savegame.gamestate["mapNum"] - int(savegame.gamestate["mapChanged"])
 
-    if (nation):
-        stmt = "SELECT WorldMaps.* FROM WorldMaps JOIN Worlds on WorldMaps.world_id = Worlds.id JOIN Savegames on WorldMaps.savegame_id = Savegames.id JOIN Roles on WorldMaps.role_id = Roles.id WHERE Worlds.name=%s AND Savegames.server_id=%s AND WorldMaps.turn_no=%s AND WorldMaps.turn_map_no=%s AND Roles.role_discord_id=%s"
-        params = [world.name, savegame.server_id, turn, savegame.gamestate["mapNum"] - int(savegame.gamestate["mapChanged"]), nation.role_id]
+    def query():
+        logInfo(f"Retrieving a world map with the world {world.name} and the game {savegame.name} from the database")
+
+        with dbconnection() as db:
+            cursor = db.cursor(buffered=True)
+
+            if (nation):
+                stmt = "SELECT WorldMaps.* FROM WorldMaps JOIN Worlds on WorldMaps.world_id = Worlds.id JOIN Savegames on WorldMaps.savegame_id = Savegames.id JOIN Roles on WorldMaps.role_id = Roles.id WHERE Worlds.name=%s AND Savegames.server_id=%s AND WorldMaps.turn_no=%s AND WorldMaps.turn_map_no=%s AND Roles.role_discord_id=%s"
+                params = [world.name, savegame.server_id, turn, mapNum, nation.role_id]
+
+            else:
+                stmt = "SELECT WorldMaps.* FROM WorldMaps JOIN Worlds on WorldMaps.world_id = Worlds.id JOIN Savegames on WorldMaps.savegame_id = Savegames.id WHERE Worlds.name=%s AND Savegames.server_id=%s AND WorldMaps.turn_no=%s AND WorldMaps.turn_map_no=%s"
+                params = [world.name, savegame.server_id, turn, mapNum]
 
-    else:
-        stmt = "SELECT WorldMaps.* FROM WorldMaps JOIN Worlds on WorldMaps.world_id = Worlds.id JOIN Savegames on WorldMaps.savegame_id = Savegames.id WHERE Worlds.name=%s AND Savegames.server_id=%s AND WorldMaps.turn_no=%s AND WorldMaps.turn_map_no=%s"
-        params = [world.name, savegame.server_id, turn, savegame.gamestate["mapNum"] - int(savegame.gamestate["mapChanged"])]
+            cursor.execute(stmt, params)
+            return fetch_assoc(cursor)
 
-    cursor.execute(stmt, params)
-    result = fetch_assoc(cursor)
+    result = worldMapCache.getOrLoad((savegame.server_id, turn, mapNum, nation.role_id if nation else None), query)
 
     if not (result): return False
 
@@ -168,15 +261,19 @@ def dbget_saveGame_byServer(server_id):
         """
         Get the row in the database table Savegames pertaining to this server
         """
-        logInfo(f"Getting a savegame with the id {server_id} from the database")
 
-        db = getdb()
-        cursor = db.cursor(buffered=True)
+        def query():
+            logInfo(f"Getting a savegame with the id {server_id} from the database")
 
-        stmt = "SELECT * FROM Savegames WHERE server_id=%s LIMIT 1;"
-        params = [server_id]
-        cursor.execute(stmt, params)
-        result = fetch_assoc(cursor)
+            with dbconnection() as db:
+                cursor = db.cursor(buffered=True)
+
+                stmt = "SELECT * FROM Savegames WHERE server_id=%s LIMIT 1;"
+                params = [server_id]
+                cursor.execute(stmt, params)
+                return fetch_assoc(cursor)
+
+        result = savegameRowCache.getOrLoad(server_id, query)
 
         if not (result): return False
         logInfo("Successfully retrieved savegame!")
@@ -186,13 +283,21 @@ def insert_savegame(savegame, worldInfo, gamerule_name):
     """
     Try to put a savegame in the database
     """
-    db = getdb()
-    cursor = db.cursor(buffered=True)
+    with dbconnection() as db:
+        cursor = db.cursor(buffered=True)
+
+        stmt = "INSERT INTO Savegames (server_id, savefile, world_id, gamerulefile) VALUES (%s, %s, %s, %s)"
+        params = [savegame.server_id, savegame.name, worldInfo['id'], gamerule_name]
+        cursor.execute(stmt, params)
+        db.commit()
+
+    savegameGameruleNames.invalidate(savegame.server_id)
+    savegameWorldNames.invalidate(savegame.server_id)
+    savegameRowCache.invalidate(savegame.server_id)
 
-    stmt = "INSERT INTO Savegames (server_id, savefile, world_id, gamerulefile) VALUES (%s, %s, %s, %s)"
-    params = [savegame.server_id, savegame.name, worldInfo['id'], gamerule_name]
-    cursor.execute(stmt, params)
-    db.commit()
+    #Rows joined from the server's previous savegame, if it had one
+    playerGameRowCache.invalidate()
+    worldMapCache.invalidate()
 
 
 def setupNew_saveGame(savegame, world_name, gamerule_name):
@@ -219,22 +324,102 @@ def setupNew_saveGame(savegame, world_name, gamerule_name):
         raise LogicError(f"Savegame could not be inserted!")
 
     #Generate savefile for the game
-    save_saveGame(savegame)
+    save_saveGame(savegame, immediate = True)
+
+    #The server may have had a different savegame cached before this one
+    savegameCache.invalidate(server_id)
+
+def save_saveGame(savegame, compact = False, immediate = False):
+    """
+    Save the savegame to its file based on its id.
+    Only the changes since the last save are appended to the savegame's journal, unless compact is True, in which case the whole savefile is rewritten.
+
+    Saves are written shortly after they are requested, so that a burst of commands on the same savegame results in a single write.
+    Args:
+        compact (bool): Rewrite the whole savefile. Always written immediately.
+        immediate (bool): Write now instead of waiting for other saves to coalesce with.
+    """
+
+    #The nations this command accessed are the ones it may have changed
+    if (isinstance(savegame.nations, savecontainer.LazyNations)): savegame.nations.touchCommandAccesses()
+
+    if (compact or immediate):
+        writebehind.writeNow(savegame.name, lambda: prepare_saveGame(savegame, compact))
+        return
+
+    writebehind.schedule(savegame.name, lambda: prepare_saveGame(savegame))
+    logInfo(f"Scheduled saving {savegame.name} to the savefiles in {savesDir}")
+
+def prepare_saveGame(savegame, compact = False):
+    """
+    Encode what has changed in the savegame now, so that it can be written to its files in the background while the savegame goes on changing.
+
+    Returns:
+        (function): Writes the savegame's files when called with no arguments, or None if nothing has changed
+    """
+
+    save = journaling.prepareSave(savegame, savesDir, compact)
+    if not (save): return None
+
+    def write():
+        save()
+
+        #The cached savegame is what was just written, so the new files aren't a change from outside the bot
+        savegameCache.revalidate(savegame.server_id, saveGame_version(savegame.name), saveGame_memorySize(savegame.name))
+
+        logInfo(f"Saved {savegame.name} to the savefiles in {savesDir}")
+
+    return write
+
+def flush_saveGame(savegame_name = None):
+    """
+    Write any saves that are still waiting to be written, for one savegame or for all of them
+    """
+    writebehind.flush(savegame_name)
+
+def saveGame_version(savegame_name):
+    """
+    Identify the current contents of every file a savegame is loaded from
+    """
+    return caching.fileVersion(f"{savesDir}/{savegame_name}.json", savecontainer.containerPath(savegame_name, savesDir), journaling.journalPath(savegame_name, savesDir))
 
-def save_saveGame(savegame):
+def saveGame_memorySize(savegame_name):
     """
-    Save the savegame to its file based on its id
+    Estimate how many bytes of memory a savegame takes up once loaded, based on the size of its files
     """
-    filehandling.easySave(savegame, savegame.name, savesDir)
-    logInfo(f"Saved {savegame.name} to file: {savesDir}/{savegame.name}.json")
 
-@lru_cache(maxsize=16)
+    savefileFormat = journaling.snapshotFormat(savegame_name, savesDir) or "json"
+    fileSizes = sum(fileVersion[1] for fileVersion in saveGame_version(savegame_name) if fileVersion)
+
+    return fileSizes * savegameMemoryFactor[savefileFormat]
+
 def load_saveGame(savegame_name):
     """
-    Load a savegame object from its savefile
+    Load a savegame object from its savefile and journal, without using the cache
     """
-    savegame = filehandling.easyLoad(savegame_name, savesDir)
-    logInfo(f"Savegame {savegame.name} successfully loaded and added to cache")
+
+    #A save could still be waiting for a copy of this savegame that has since left the cache
+    writebehind.flush(savegame_name)
+
+    savegame = journaling.load(savegame_name, savesDir)
+    logInfo(f"Savegame {savegame.name} successfully loaded")
+    return savegame
+
+def convert_saveGame(savegame_name, savefileFormat):
+    """
+    Rewrite a savegame's savefile as either "json" or "binary". The savefile in the other format is kept as a backup.
+    """
+
+    if (savefileFormat not in ("json", "binary")):
+        raise InputError(f"Unknown savefile format {savefileFormat}, must be json or binary")
+
+    writebehind.flush(savegame_name)
+    savegame = journaling.convert(savegame_name, savesDir, savefileFormat)
+
+    #Any cached copy of the savegame may now be out of date with its journal state
+    savegameCache.invalidate()
+
+    logInfo(f"Converted savegame {savegame_name} to {savefileFormat}")
     return savegame
 
 def load_saveGame_from_server(server_id):
@@ -243,29 +428,43 @@ def load_saveGame_from_server(server_id):
     """
     
     savegameInfo = dbget_saveGame_byServer(server_id)
+    savegame_name = savegameInfo["savefile"]
 
-    savegame = load_saveGame(savegameInfo["savefile"])
+    savegame = savegameCache.get(server_id, saveGame_version(savegame_name))
+
+    if (savegame and savegame.name == savegame_name):
+        logInfo(f"Savegame {savegame.name} retrieved from cache")
+        return savegame
+
+    #Read the version before loading, so that a save made while loading is noticed next time
+    version = saveGame_version(savegame_name)
+
+    savegame = load_saveGame(savegame_name)
+    savegameCache.put(server_id, savegame, version, saveGame_memorySize(savegame_name))
 
     logInfo(f"Savegame {savegame.name} successfully loaded and added to cache")
     return savegame
 
 def get_player_byGame(savegame, player_id):
 
-    db = getdb()
-    cursor = db.cursor(buffered=True)
+    def query():
+        with dbconnection() as db:
+            cursor = db.cursor(buffered=True)
 
-    stmt = """
-    SELECT *, Players.player_discord_id, Roles.role_discord_id FROM 
-        PlayerGames 
-            INNER JOIN Players ON PlayerGames.player_id=Players.id
-            INNER JOIN Savegames ON PlayerGames.game_id=Savegames.id
-            INNER JOIN Roles ON PlayerGames.role_id=Roles.id
-    WHERE Savegames.server_id=%s AND Players.player_discord_id=%s LIMIT 1;
-    """
+            stmt = """
+            SELECT *, Players.player_discord_id, Roles.role_discord_id FROM 
+                PlayerGames 
+                    INNER JOIN Players ON PlayerGames.player_id=Players.id
+                    INNER JOIN Savegames ON PlayerGames.game_id=Savegames.id
+                    INNER JOIN Roles ON PlayerGames.role_id=Roles.id
+            WHERE Savegames.server_id=%s AND Players.player_discord_id=%s LIMIT 1;
+            """
+
+            params = [savegame.server_id, player_id]
+            cursor.execute(stmt, params)
+            return fetch_assoc(cursor)
 
-    params = [savegame.server_id, player_id]
-    cursor.execute(stmt, params)
-    result = fetch_assoc(cursor)
+    result = playerGameRowCache.getOrLoad((savegame.server_id, str(player_id)), query)
 
     if not (result): return False
     logInfo(f"Player {player_id} info for game {savegame.server_id} retrieved")
@@ -273,55 +472,135 @@ def get_player_byGame(savegame, player_id):
 
 def remove_player_fromGame(savegame, player_id):
 
-    db = getdb()
-    cursor = db.cursor(buffered=True)
+    with dbconnection() as db:
+        cursor = db.cursor(buffered=True)
+
+        stmt = """
+        DELETE FROM PlayerGames
+        WHERE game_id IN (SELECT id FROM Savegames WHERE server_id=%s) AND player_id IN (SELECT id FROM Players WHERE player_discord_id=%s);
+        """
 
-    stmt = """
-    DELETE PlayerGames.* FROM PlayerGames
-        INNER JOIN Players ON PlayerGames.player_id=Players.id
-        INNER JOIN Savegames ON PlayerGames.game_id=Savegames.id
-    WHERE Savegames.server_id=%s AND Players.player_discord_id=%s;
+        params = [savegame.server_id, player_id]
+        cursor.execute(stmt, params)
+        db.commit()
+
+    playerGameRowCache.invalidate((savegame.server_id, str(player_id)))
+
+def dbget_commandContext(server_id, player_id):
+    """
+    Make sure that everything a player's command needs from the database is cached: the server's Savegames row, the names of its world and gamerule,
+    and the player's Players, Roles and get_player_byGame rows. Whatever is missing is read with one joined query.
+    The usual lookup functions, like dbget_saveGame_byServer and get_player_byGame, then find their rows in the caches.
     """
 
-    params = [savegame.server_id, player_id]
-    cursor.execute(stmt, params)
-    db.commit()
+    playerGameKey = (server_id, str(player_id))
+
+    if (savegameRowCache.get(server_id) and savegameWorldNames.get(server_id) and savegameGameruleNames.get(server_id) and playerGameRowCache.get(playerGameKey)):
+        return
+
+    #Each column is selected as "Table.column", so that columns with the same name in different tables can be told apart
+    columns = ", ".join(f"{table}.{column} AS `{table}.{column}`" for table, tableColumns in commandContextColumns.items() for column in tableColumns)
+
+    generations = {cache: cache.generation for cache in (savegameRowCache, playerRowCache, roleRowCache, playerGameRowCache)}
+
+    logInfo(f"Getting command context for player {player_id} in savegame {server_id} from database")
+
+    with dbconnection() as db:
+        cursor = db.cursor(buffered=True)
+
+        stmt = f"""
+        SELECT {columns} FROM
+            Savegames
+                INNER JOIN Worlds ON Savegames.world_id=Worlds.id
+                LEFT JOIN Players ON Players.player_discord_id=%s
+                LEFT JOIN PlayerGames ON PlayerGames.game_id=Savegames.id AND PlayerGames.player_id=Players.id
+                LEFT JOIN Roles ON PlayerGames.role_id=Roles.id
+        WHERE Savegames.server_id=%s LIMIT 1;
+        """
+
+        params = [player_id, server_id]
+        cursor.execute(stmt, params)
+        result = fetch_assoc(cursor)
+
+    if not (result): return
+
+    rows = {table: {column: result[f"{table}.{column}"] for column in tableColumns} for table, tableColumns in commandContextColumns.items()}
+
+    savegameRowCache.putIfCurrent(server_id, rows["Savegames"], generations[savegameRowCache])
+    savegameWorldNames.put(server_id, rows["Worlds"]["name"], size = len(rows["Worlds"]["name"]))
+    savegameGameruleNames.put(server_id, rows["Savegames"]["gamerulefile"], size = len(rows["Savegames"]["gamerulefile"]))
+
+    #The player may not be in the database, or not be playing in this game
+    if (rows["Players"]["id"] == None): return
+    playerRowCache.putIfCurrent(str(player_id), rows["Players"], generations[playerRowCache])
+
+    if (rows["PlayerGames"]["player_id"] == None): return
+    roleRowCache.putIfCurrent(str(rows["Roles"]["role_discord_id"]), rows["Roles"], generations[roleRowCache])
+
+    #Same columns, in the same order of precedence, as get_player_byGame's SELECT *
+    playerGame = {**rows["PlayerGames"], **rows["Players"], **rows["Savegames"], **rows["Roles"]}
+    playerGameRowCache.putIfCurrent(playerGameKey, playerGame, generations[playerGameRowCache])
 
 
 # Deal with gamerules
 
 def save_gamerule(gamerule_name, gamerule):
-    with open(f"{gameruleDir}/{gamerule_name}.json", 'w') as f:
-        json.dump(filehandling.saveObject(gamerule), f, indent = 4)
+    filehandling.easySave(gamerule, gamerule_name, gameruleDir)
+    gameruleCache.invalidate(gamerule_name)
 
     logInfo(f"Successfully saved gamerule {gamerule_name}")
 
+def gamerule_version(gamerule_name):
+    return caching.fileVersion(f"{gameruleDir}/{gamerule_name}.json")
+
 def load_gamerule(gamerule_name):
     """
-    Load a dictionary from a .json file representing a game's ruleset
+    Load a dictionary from a .json file representing a game's ruleset.
+    The parsed gamerule is cached and shared between callers, so it must not be modified.
     """
+
+    gamerule = gameruleCache.get(gamerule_name, lambda: gamerule_version(gamerule_name))
+    if (gamerule != None): return gamerule
+
+    #Read the version before loading, so that a change made while loading is noticed next time
+    version = gamerule_version(gamerule_name)
+
     gamerule = filehandling.easyLoad(gamerule_name, gameruleDir)
+    gameruleCache.put(gamerule_name, gamerule, version, version[0][1] * gameruleMemoryFactor if version[0] else 0)
+
     logInfo("Gamerule successfully loaded")
     return gamerule
 
+def use_commandGameFiles(savegame, world, gamerule):
+    """
+    Have the savegame's getWorld and getGamerule return these for the rest of the running command. Must be called from the task running the command.
+    """
+
+    commandGameFiles.set((savegame.server_id, world, gamerule))
+
 def dbget_gamerule(server_id):
     """
-    Get the name of the gamerule associated with this savegame
+    Get the gamerule associated with this savegame
     """
-        
+
+    gamerule_name = savegameGameruleNames.get(server_id)
+    if (gamerule_name): return gamehandling.load_gamerule(gamerule_name)
+
     logInfo(f"Getting gamerule for savegame {server_id} from database")
-    db = getdb()
-    cursor = db.cursor()
+    with dbconnection() as db:
+        cursor = db.cursor()
 
-    stmt = "SELECT gamerulefile FROM Savegames WHERE server_id=%s LIMIT 1;"
-    params = [server_id]
-    cursor.execute(stmt, params)
-    result = fetch_assoc(cursor)
+        stmt = "SELECT gamerulefile FROM Savegames WHERE server_id=%s LIMIT 1;"
+        params = [server_id]
+        cursor.execute(stmt, params)
+        result = fetch_assoc(cursor)
 
     if not (result):
         return False
 
     logInfo("Got gamerule info")
+    savegameGameruleNames.put(server_id, result["gamerulefile"], size = len(result["gamerulefile"]))
+
     return gamehandling.load_gamerule(result["gamerulefile"])
 
 
@@ -332,13 +611,13 @@ def gamerule_connected_files(gamerule_name):
     Get all savegames and worlds that use this gamerule
     """
 
-    db = getdb()
-    cursor = db.cursor(buffered=True)
+    with dbconnection() as db:
+        cursor = db.cursor(buffered=True)
 
-    stmt = "SELECT Savegames.savefile, Worlds.name as world_name FROM Savegames JOIN Worlds ON Savegames.world_id = Worlds.id WHERE gamerulefile=%s"
-    params = [gamerule_name]
-    cursor.execute(stmt, params)
-    result = cursor.fetchall()
+        stmt = "SELECT Savegames.savefile, Worlds.name as world_name FROM Savegames JOIN Worlds ON Savegames.world_id = Worlds.id WHERE gamerulefile=%s"
+        params = [gamerule_name]
+        cursor.execute(stmt, params)
+        result = cursor.fetchall()
 
     if not (result): return False
 
@@ -352,13 +631,13 @@ def world_connected_files(world_name):
     Get all savegames and gamerules that use this world
     """
 
-    db = getdb()
-    cursor = db.cursor(buffered=True)
+    with dbconnection() as db:
+        cursor = db.cursor(buffered=True)
 
-    stmt = "SELECT Savegames.server_id, Savegames.gamerulefile FROM Savegames JOIN Worlds ON Savegames.world_id = Worlds.id WHERE Worlds.name=%s"
-    params = [world_name]
-    cursor.execute(stmt, params)
-    result = cursor.fetchall()
+        stmt = "SELECT Savegames.server_id, Savegames.gamerulefile FROM Savegames JOIN Worlds ON Savegames.world_id = Worlds.id WHERE Worlds.name=%s"
+        params = [world_name]
+        cursor.execute(stmt, params)
+        result = cursor.fetchall()
 
     if not (result): return False
 
@@ -420,14 +699,15 @@ def validate_modified_world(world_name, world_contents):
         logError(e)
         raise InputError(f"World could not be converted to the World class.")
     
+    #Save first, so that the savegames sync with the modified world instead of a cached copy of the old one
+    save_world(world)
+
     for savegame_server_id in [files["savefile_server_id"] for files in connected_files]:
         savegame = load_saveGame_from_server(savegame_server_id)
         savegame.sync_withWorld()
 
     logInfo(f"Successfully validated modified world {world.name} and synced related savegames.")
 
-    save_world(world)
-
 
 # Edit game files
 
@@ -436,13 +716,13 @@ def validate_gamerule_edit_permissions(player_id, gamerule_name):
     Validate that a player is able to edit a gamerule file
     """
 
-    db = getdb()
-    cursor = db.cursor(buffered=True)
+    with dbconnection() as db:
+        cursor = db.cursor(buffered=True)
 
-    stmt = "SELECT player_id, game_id FROM GameruleEditPermissions AS Perms JOIN Players ON Perms.player_id = Players.id JOIN Savegames ON Perms.game_id = Savegames.id WHERE Players.player_discord_id = %s AND Savegames.gamerulefile=%s LIMIT 1"
-    params = [player_id, gamerule_name]
-    cursor.execute(stmt, params)
-    result = fetch_assoc(cursor)
+        stmt = "SELECT player_id, game_id FROM GameruleEditPermissions AS Perms JOIN Players ON Perms.player_id = Players.id JOIN Savegames ON Perms.game_id = Savegames.id WHERE Players.player_discord_id = %s AND Savegames.gamerulefile=%s LIMIT 1"
+        params = [player_id, gamerule_name]
+        cursor.execute(stmt, params)
+        result = fetch_assoc(cursor)
 
     if not (result): return False
 
@@ -454,13 +734,13 @@ def validate_world_edit_permissions(player_id, world_name):
     Validate that a player is able to edit a gamerule file
     """
 
-    db = getdb()
-    cursor = db.cursor(buffered=True)
+    with dbconnection() as db:
+        cursor = db.cursor(buffered=True)
 
-    stmt = "SELECT player_id, world_id FROM WorldEditPermissions AS Perms JOIN Players ON Perms.player_id = Players.id JOIN Worlds ON Perms.world_id = Worlds.id WHERE Players.player_discord_id = %s AND Worlds.name=%s LIMIT 1"
-    params = [player_id, world_name]
-    cursor.execute(stmt, params)
-    result = fetch_assoc(cursor)
+        stmt = "SELECT player_id, world_id FROM WorldEditPermissions AS Perms JOIN Players ON Perms.player_id = Players.id JOIN Worlds ON Perms.world_id = Worlds.id WHERE Players.player_discord_id = %s AND Worlds.name=%s LIMIT 1"
+        params = [player_id, world_name]
+        cursor.execute(stmt, params)
+        result = fetch_assoc(cursor)
 
     if not (result): return False
 
@@ -473,16 +753,18 @@ def add_Player(playerID):
     """
     Add a player by discord ID to the database
     """
-    db = getdb()
-    cursor = db.cursor(buffered=True)
+    with dbconnection() as db:
+        cursor = db.cursor(buffered=True)
 
-    try:
-        stmt = "INSERT INTO Players (player_discord_id) VALUES (%s)"
-        params = [playerID]
-        cursor.execute(stmt, params)
-        db.commit()
-    except Exception as e:
-        raise Exception(f"Could not insert player into database: <{e}>")
+        try:
+            stmt = "INSERT INTO Players (player_discord_id) VALUES (%s)"
+            params = [playerID]
+            cursor.execute(stmt, params)
+            db.commit()
+        except Exception as e:
+            raise Exception(f"Could not insert player into database: <{e}>")
+
+    playerRowCache.invalidate(str(playerID))
 
     logInfo(f"Added player <{playerID}> to the database")
 
@@ -491,13 +773,16 @@ def get_Player(playerID):
         Get the row in the database table Players pertaining to this player
         """
 
-        db = getdb()
-        cursor = db.cursor(buffered=True)
+        def query():
+            with dbconnection() as db:
+                cursor = db.cursor(buffered=True)
 
-        stmt = "SELECT * FROM Players WHERE player_discord_id=%s LIMIT 1;"
-        params = [playerID]
-        cursor.execute(stmt, params)
-        result = fetch_assoc(cursor)
+                stmt = "SELECT * FROM Players WHERE player_discord_id=%s LIMIT 1;"
+                params = [playerID]
+                cursor.execute(stmt, params)
+                return fetch_assoc(cursor)
+
+        result = playerRowCache.getOrLoad(str(playerID), query)
 
         if not (result): return False
 
@@ -510,16 +795,18 @@ def add_Role(roleID, roleName):
     """
     Add a role by discord ID to the database
     """
-    db = getdb()
-    cursor = db.cursor(buffered=True)
+    with dbconnection() as db:
+        cursor = db.cursor(buffered=True)
 
-    try:
-        stmt = "INSERT INTO Roles (role_discord_id, name) VALUES (%s, %s)"
-        params = [roleID, roleName]
-        cursor.execute(stmt, params)
-        db.commit()
-    except Exception as e:
-        raise Exception(f"Could not insert role into database: <{e}>")
+        try:
+            stmt = "INSERT INTO Roles (role_discord_id, name) VALUES (%s, %s)"
+            params = [roleID, roleName]
+            cursor.execute(stmt, params)
+            db.commit()
+        except Exception as e:
+            raise Exception(f"Could not insert role into database: <{e}>")
+
+    roleRowCache.invalidate(str(roleID))
 
     logInfo(f"Added role <{roleID}> to the database")
 
@@ -528,13 +815,16 @@ def get_Role(roleID):
         Get the row in the database table Roles pertaining to this role
         """
 
-        db = getdb()
-        cursor = db.cursor(buffered=True)
+        def query():
+            with dbconnection() as db:
+                cursor = db.cursor(buffered=True)
 
-        stmt = "SELECT * FROM Roles WHERE role_discord_id=%s LIMIT 1;"
-        params = [roleID]
-        cursor.execute(stmt, params)
-        result = fetch_assoc(cursor)
+                stmt = "SELECT * FROM Roles WHERE role_discord_id=%s LIMIT 1;"
+                params = [roleID]
+                cursor.execute(stmt, params)
+                return fetch_assoc(cursor)
+
+        result = roleRowCache.getOrLoad(str(roleID), query)
 
         if not (result): return False
 
@@ -548,18 +838,18 @@ def get_PlayerGames(server_id):
     Get the row in the database table Roles pertaining to this role
     """
 
-    db = getdb()
-    cursor = db.cursor(buffered=True)
+    with dbconnection() as db:
+        cursor = db.cursor(buffered=True)
 
-    stmt = "SELECT Savegames.*, Players.*, Roles.* FROM Savegames \
-        JOIN PlayerGames ON Savegames.id = PlayerGames.game_id \
-        JOIN Players ON PlayerGames.player_id = Players.id \
-        JOIN Roles ON PlayerGames.role_id = Roles.id \
-        WHERE Savegames.server_id=%s"
+        stmt = "SELECT Savegames.*, Players.*, Roles.* FROM Savegames \
+            JOIN PlayerGames ON Savegames.id = PlayerGames.game_id \
+            JOIN Players ON PlayerGames.player_id = Players.id \
+            JOIN Roles ON PlayerGames.role_id = Roles.id \
+            WHERE Savegames.server_id=%s"
     
-    params = [server_id]
-    cursor.execute(stmt, params)
-    result = fetch_assoc_all(cursor)
+        params = [server_id]
+        cursor.execute(stmt, params)
+        result = fetch_assoc_all(cursor)
 
     if not (result): return False
 
@@ -569,7 +859,11 @@ def get_PlayerGames(server_id):
 # Nation
 def add_Nation(savegame, nation, playerID):
     """
-    Add a nation as a role to the database
+    Add a nation as a role to the database, binding it to a player. If the player was already playing another nation in this game, they are moved to this one.
+    The player, role and binding are all written in one transaction. Players that are already cached, and roles already cached under this nation's name, are not written at all.
+
+    Returns:
+        (dict): The binding, with the columns of the PlayerGames, Players, Savegames and Roles rows involved, or False if it could not be written
     """
 
     logInfo(f"Adding nation {nation.name} to savegame {savegame.name} with player {playerID}")
@@ -577,66 +871,55 @@ def add_Nation(savegame, nation, playerID):
     nation_name = nation.name
     roleID = nation.role_id
 
-    db = getdb()
-    cursor = db.cursor(buffered=True)
+    savegameInfo = savegame.getRow()
 
-    #Fail if player is already tracked to a nation
-    playerExists = get_player_byGame(savegame, playerID)
-    if (playerExists):
-        logInfo(f"Player {playerID} exists in game {savegame.name} already, removing player")
-        remove_player_fromGame(savegame, playerID)
-        logInfo(f"Removed player {playerID} from previous role in game {savegame.name}")
-    
-    else: logInfo("Player is not already tracked to a nation")
+    if not (savegameInfo):
+        logInfo(f"Savegame for server {savegame.server_id} is not in the database, could not add nation {nation.name}")
+        return False
 
-    #Insert player if need be
-    playerInfo = get_Player(playerID)
+    playerInfo = playerRowCache.get(str(playerID))
+    roleInfo = roleRowCache.get(str(roleID))
 
-    if not (playerInfo):
-        add_Player(playerID)
-        playerInfo = get_Player(playerID)
+    #Rows written here are only cached if nothing invalidated the caches while they were being written
+    playerGeneration = playerRowCache.generation
+    roleGeneration = roleRowCache.generation
 
-    logInfo("Got player")
+    newPlayer = not playerInfo
 
-    #Insert role if need be
-    roleInfo = get_Role(roleID)
+    #A role left over from a nation it was bound to before is renamed, since nations are found by their role's name
+    writeRole = not roleInfo or roleInfo["name"] != nation_name
 
-    if not (get_Role(roleID)):
-        add_Role(roleID, nation_name)
-        roleInfo = get_Role(roleID)
-        logInfo(f"Created new role for \"{nation_name}\"")
+    try:
+        with dbconnection() as db:
+            cursor = db.cursor(buffered=True)
 
-    else: 
-        logInfo(f"Role <{roleID}> for \"{nation_name}\" already exists in the database")
+            if (newPlayer):
+                playerInfo = {"player_discord_id": playerID}
+                playerInfo["id"] = insert_orGetId(cursor, "Players", playerInfo, "player_discord_id")
 
-    savegameInfo = savegame.getRow()
+            if (writeRole):
+                roleInfo = {**(roleInfo or dict()), "role_discord_id": roleID, "name": nation_name}
+                roleInfo["id"] = insert_orGetId(cursor, "Roles", {"role_discord_id": roleID, "name": nation_name}, "role_discord_id", ["name"])
 
-    if not(savegameInfo and playerInfo and roleInfo):
-        logInfo(
-            f"Something went wrong when adding nation {nation.name}", 
-            {
-                "savegameInfo": bool(savegameInfo) * "Exists", 
-                "playerInfo": bool(playerInfo) * "Exists", 
-                "roleInfo": bool(roleInfo) * "Exists"
-            }
-            )
-        return False
+            #A player has at most one nation per game, so a player who is already playing has their role replaced
+            binding = {"player_id": playerInfo["id"], "game_id": savegameInfo["id"], "role_id": roleInfo["id"]}
+            upsert(cursor, "PlayerGames", binding, ["player_id", "game_id"], ["role_id"])
+
+            db.commit()
 
-    try:
-        stmt = "INSERT INTO PlayerGames (player_id, game_id, role_id) VALUES (%s, %s, %s)"
-        params = [playerInfo["id"], savegameInfo["id"], roleInfo["id"]]
-        cursor.execute(stmt, params)
-        db.commit()
     except Exception as e:
         logError(e, errorInfo = {"Message": "Could not insert nation into database"})
         return False
 
-    result = get_player_byGame(savegame, playerID)
+    finally:
+        playerGameRowCache.invalidate((savegame.server_id, str(playerID)))
 
-    if not (result): 
-        logInfo(f"Adding nation \"{nation_name}\" to database failed")
-        return False
+    #The ids are known now, so looking the player and role up right after doesn't query them again.
+    #Players.created is left out, since only the database sets it.
+    if (newPlayer): playerRowCache.putIfCurrent(str(playerID), dict(playerInfo), playerGeneration)
+    if (writeRole): roleRowCache.putIfCurrent(str(roleID), dict(roleInfo), roleGeneration)
 
     logInfo(f"Added nation \"{nation_name}\" to database")
-    return result
-    
\ No newline at end of file
+
+    #Same column precedence as get_player_byGame's SELECT *
+    return {"player_id": playerInfo["id"], "game_id": savegameInfo["id"], "role_id": roleInfo["id"], **playerInfo, **savegameInfo, **roleInfo}
@@ -21,6 +21,7 @@ import ConcertOfNationsEngine.military as military
 import ConcertOfNationsEngine.diplomacy as diplomacy
 
 
+@filehandling.loadable
 class Savegame:
     """
     Encapsulates everything in a game, including nations, the map, etc.
@@ -102,11 +103,17 @@ class Savegame:
     def getWorld(self):
         """Get the world object that is associated with this game"""
 
+        commandFiles = gamehandling.commandGameFiles.get()
+        if (commandFiles and commandFiles[0] == self.server_id): return commandFiles[1]
+
         return gamehandling.dbget_world_bysavegame(self.server_id)
 
     def getGamerule(self):
         """Get the gamerule that is associated with this game"""
 
+        commandFiles = gamehandling.commandGameFiles.get()
+        if (commandFiles and commandFiles[0] == self.server_id): return commandFiles[2]
+
         return gamehandling.dbget_gamerule(self.server_id)
 
     def sync_withWorld(self):
@@ -287,10 +294,31 @@ class Savegame:
             mapScale(tuple): Format (x,y). Multiply literal distances between territories by these dimensions to enlarge the map image.
         """
 
+        render = self.prepare_worldImage(mapScale)
+        if not (render): return
+
+        try: render()
+        except Exception:
+            self.gamestate["mapChanged"] = True
+            raise
+
+    def prepare_worldImage(self, mapScale = None):
+        """
+        Read what an image of the world based on the game state this turn needs, and mark the map as up to date.
+        The function returned draws the image, uploads it and records it in the database using only what was read here,
+        so it can run in a worker thread while the savegame goes on changing. If it fails, mapChanged has to be set back to True.
+
+        Args:
+            mapScale(tuple): Format (x,y). Multiply literal distances between territories by these dimensions to enlarge the map image.
+
+        Returns:
+            (function): Makes the image when called with no arguments, or None if one already exists
+        """
+
         #Check if the map has changed since the last time an image was generated
         if (not self.gamestate["mapChanged"]):
             logInfo("Tried to create world image but one should already exist.")
-            return
+            return None
 
         logInfo("Creating new world map image")
 
@@ -305,23 +333,33 @@ class Savegame:
         logInfo("Retrieved nation colors")
 
         filename = f"{worldsDir}/{self.name}_{self.turn}-{self.gamestate['mapNum']}"
-        worldfile = world.toImage(mapScale = mapScale, colorRules = colorRules, filename = filename)
-
-        link = imgur.upload(worldfile)
 
-        logInfo("Created map image of the world and uploaded it")
+        #The turn and map number the image is recorded under
+        state = copy(self)
+        state.gamestate = copy(self.gamestate)
 
-        gamehandling.insert_worldMap(world, self, worldfile, link, None)
-        
+        #Any change to the map from here on is newer than the image, and marks the map as changed again
         self.gamestate["mapChanged"] = False
 
-        logInfo("Successfully generated, uploaded and saved world map")
+        def render():
+            worldfile = world.toImage(mapScale = mapScale, colorRules = colorRules, filename = filename)
+
+            link = imgur.upload(worldfile)
+
+            logInfo("Created map image of the world and uploaded it")
+
+            gamehandling.insert_worldMap(world, state, worldfile, link, None)
+
+            logInfo("Successfully generated, uploaded and saved world map")
+
+        return render
 
 
 nationmodifiers_template = {
     "Tax": 0
 }
 
+@filehandling.loadable
 class Nation:
     """
     Represents a nation, which controls a number of territories and ingame objects such as buildings and armies, as well as having an economy, meaning resources and their production.
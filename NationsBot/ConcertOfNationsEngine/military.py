@@ -75,7 +75,7 @@ def get_allunits(gamerule):
 def get_blueprint(unitType, gamerule):
     """ Get the blueprint of a unit from the gamerule """
 
-    logInfo(f"Getting {unitType} info from gamerule")
+    logDebug(lambda: f"Getting {unitType} info from gamerule", sampleEvery = 100)
 
     allunits = get_allunits(gamerule)
 
@@ -557,6 +557,7 @@ class MilitaryPiece:
     def get_fields(self): pass
 
 
+@filehandling.loadable
 class Unit (MilitaryPiece):
     """
     Represents a division of a military force with a certain size and type.
@@ -590,6 +591,7 @@ class Unit (MilitaryPiece):
         }
 
         
+@filehandling.loadable
 class Vehicle (MilitaryPiece):
     """
     Represents a space which can be used to hold other units.
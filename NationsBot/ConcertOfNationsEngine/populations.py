@@ -52,6 +52,7 @@ def validate_population(gamerule, size, occupation, identifiers, growth = 0):
     return True
     
 
+@filehandling.loadable
 class Population:
     """
     Represents a group of people sharing certain identifiers and an occupation.
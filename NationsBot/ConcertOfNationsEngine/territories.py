@@ -300,7 +300,7 @@ def advanceconstruction(territoryInfo, savegame, bureaucracy):
 
     neweffects = []
 
-    logInfo(f"Advancing construction for buildings in {territoryInfo['Name']}")
+    logDebug(lambda: f"Advancing construction for buildings in {territoryInfo['Name']}", sampleEvery = 100)
 
     for building, oldstatus in territoryInfo["Savegame"]["Buildings"].items():
 
@@ -1,4 +1,4 @@
-import re
+import re, asyncio
 import discord
 from discord.ext import commands
 from discord.utils import get
@@ -34,15 +34,20 @@ def get_RoleID(roleid):
 
     raise InputError(f"\"{roleid}\" is not a valid role")
 
-def get_NationFromRole(ctx, roleid, savegame, isOptionalArg = False):
-    """Get nation info"""
+def get_NationFromRole(ctx, roleid, savegame, isOptionalArg = False, role = None):
+    """
+    Get nation info
+
+    Args:
+        role (dict): The role's row from get_Role, if it has already been looked up
+    """
 
     roleObj = ctx.guild.get_role(int(get_RoleID(roleid)))
     if not(roleObj):
         if isOptionalArg: return False
         raise InputError(f"Unknown role {roleid}")
 
-    role = get_Role(roleObj.id)
+    if (role == None): role = get_Role(roleObj.id)
     
     if not(role):
         if isOptionalArg: return False
@@ -67,7 +72,7 @@ def get_SavegameFromCtx(ctx):
     """Get savegame info from database"""
 
     try:
-        savegame = filehandling.loadObject(load_saveGame(dbget_saveGame_byServer(ctx.guild.id)["savefile"]))
+        savegame = load_saveGame_from_server(ctx.guild.id)
     except Exception as e:
         logInfo("Could not load a game for this server.")
         logError(e)
@@ -76,4 +81,140 @@ def get_SavegameFromCtx(ctx):
 
     logInfo(f"Successfully got savegame {savegame.name} from ctx")
     
-    return savegame
\ No newline at end of file
+    return savegame
+
+def load_SavegameFromCtx(ctx):
+    """
+    Returns:
+        (tuple): (savegame, its world, its gamerule)
+    """
+
+    savegame = get_SavegameFromCtx(ctx)
+    return savegame, savegame.getWorld(), savegame.getGamerule()
+
+class CommandContext:
+    """
+    Everything a player's command needs to know about the game it was sent in, loaded together so that nothing is fetched twice during the command.
+    The player's info and nation are only checked when they are first used, so commands report problems in the same order they always have.
+
+    Attributes:
+        savegame (Savegame): The server's savegame
+        world (World): The savegame's world
+        gamerule (dict): The savegame's gamerule
+        playerinfo (dict): The command author's row from get_player_byGame. Raises InputError if they are not playing a nation.
+        nation (Nation): The command author's nation. Raises InputError if it could not be found.
+    """
+
+    def __init__(self, savegame, world, gamerule, playerinfo, nation, nationError = None):
+        self.savegame = savegame
+        self.world = world
+        self.gamerule = gamerule
+        self._playerinfo = playerinfo
+        self._nation = nation
+        self.nationError = nationError
+
+    @property
+    def playerinfo(self):
+        if not (self._playerinfo): raise self.nationError
+        return self._playerinfo
+
+    @property
+    def nation(self):
+        if not (self._nation): raise self.nationError
+        return self._nation
+
+    def findNation(self, ctx):
+        """Look up the author's nation in the savegame"""
+
+        try:
+            if not (self._playerinfo):
+                raise InputError(f"Could not get a nation for player <@{ctx.author.id}>")
+
+            self._nation = get_NationFromRole(ctx, self._playerinfo['role_discord_id'], self.savegame)
+
+        except InputError as e: self.nationError = e
+
+def load_CommandContext(ctx):
+    """
+    Load the savegame, world, gamerule and the author's player info for a command, reading whatever isn't cached from the database in one query.
+    The author's nation is not looked up yet; see CommandContext.findNation.
+    """
+
+    try: dbget_commandContext(ctx.guild.id, ctx.author.id)
+    except Exception as e:
+        #The lookups below will each try again on their own
+        logError(e, {"Message": "Could not prefetch command context"})
+
+    savegame = get_SavegameFromCtx(ctx)
+
+    #Looked up here so that finding the nation later finds the role's row cached
+    playerinfo = get_player_byGame(savegame, ctx.author.id)
+    if (playerinfo): get_Role(playerinfo['role_discord_id'])
+
+    return CommandContext(savegame, savegame.getWorld(), savegame.getGamerule(), playerinfo, None)
+
+def get_CommandContext(ctx):
+    """Load the savegame, world, gamerule and the author's nation for a command, reading whatever isn't cached from the database in one query"""
+
+    context = load_CommandContext(ctx)
+    context.findNation(ctx)
+
+    return context
+
+# Async versions, which load game information in a worker thread instead of blocking the event loop.
+# Savegames are only read and changed on the event loop, so that no command sees another's changes half made; only the database and files are read in the worker thread.
+# The world and gamerule they load are kept for the rest of the command, so that game logic run on the event loop finds them without loading them there.
+
+#World map images being made, keyed by savegame name
+worldImageTasks = dict()
+
+async def aget_NationFromRole(ctx, roleid, savegame, isOptionalArg = False):
+    """Get nation info without blocking the event loop"""
+
+    #Only the role's row is read in a worker thread; the nation is looked up in the savegame on the event loop
+    roleObj = ctx.guild.get_role(int(get_RoleID(roleid)))
+    role = await dbcall(get_Role, roleObj.id) if roleObj else None
+
+    return get_NationFromRole(ctx, roleid, savegame, isOptionalArg, role)
+
+async def aget_SavegameFromCtx(ctx):
+    """Get savegame info from database without blocking the event loop"""
+
+    savegame, world, gamerule = await dbcall(load_SavegameFromCtx, ctx)
+    use_commandGameFiles(savegame, world, gamerule)
+
+    return savegame
+
+async def aget_CommandContext(ctx):
+    """Get a command's context without blocking the event loop"""
+
+    context = await dbcall(load_CommandContext, ctx)
+    use_commandGameFiles(context.savegame, context.world, context.gamerule)
+
+    context.findNation(ctx)
+
+    return context
+
+async def aworld_toImage(savegame, mapScale = None):
+    """
+    Make an image of the world based on the game state this turn, as Savegame.world_toImage does, if the map has changed since the last one.
+    The image is drawn, uploaded and recorded in a worker thread. A command which asks for the map while it is being made waits for the same image.
+    """
+
+    render = savegame.prepare_worldImage(mapScale)
+
+    if not (render):
+        task = worldImageTasks.get(savegame.name)
+        if (task): await asyncio.shield(task)
+        return
+
+    task = worldImageTasks[savegame.name] = asyncio.ensure_future(dbcall(render))
+
+    try: await asyncio.shield(task)
+    except Exception:
+        #No image was made, so the next command to ask for the map tries again
+        savegame.gamestate["mapChanged"] = True
+        raise
+
+    finally:
+        if (worldImageTasks.get(savegame.name) is task): worldImageTasks.pop(savegame.name)
@@ -0,0 +1,251 @@
+import os, threading, time
+from collections import OrderedDict
+
+from logger import *
+
+#Every cache that has been created, so that their statistics can be reported together
+caches = dict()
+
+
+def fileVersion(*paths):
+    """
+    Identify the current contents of some files by their modification times and sizes, without reading them.
+
+    Returns:
+        (tuple): One (mtime in ns, size) pair per path, or None for paths that don't exist
+    """
+
+    version = []
+
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            version.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            version.append(None)
+
+    return tuple(version)
+
+
+class CacheEntry:
+    """
+    Attributes:
+        value: The cached object
+        version: Identifies the version of the object's source that value was loaded from, e.g. from fileVersion
+        size (int): Estimated number of bytes the value takes up in memory
+        checked (float): time.monotonic() when the version was last compared against the files
+    """
+
+    def __init__(self, value, version, size):
+        self.value = value
+        self.version = version
+        self.size = size
+        self.checked = time.monotonic()
+
+
+class FileCache:
+    """
+    A least recently used cache of objects loaded from files. Each entry remembers the version of the files it was loaded from,
+    and is discarded if the files have a different version when it is next accessed. Entries are evicted once their total estimated size exceeds maxBytes.
+
+    Attributes:
+        name (str): Shown in the cache's statistics
+        maxBytes (int): Maximum total estimated size of every entry
+        checkSeconds (float): An entry's version is compared against its files at most this often, so lookups in a tight loop don't each stat the files
+        entries (OrderedDict): Keys mapped to CacheEntry objects, from least to most recently used
+    """
+
+    def __init__(self, name, maxBytes, checkSeconds = 0):
+        self.name = name
+        self.maxBytes = maxBytes
+        self.checkSeconds = checkSeconds
+        self.entries = OrderedDict()
+        self.totalBytes = 0
+
+        self.lock = threading.RLock()
+
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+        caches[name] = self
+
+    def get(self, key, version = None):
+        """
+        Get a cached value.
+
+        Args:
+            version: If given, the value is only returned if it was loaded from this version of its files.
+                Can be a function returning the version, which is only called once checkSeconds have passed since the last check.
+
+        Returns:
+            The value, or None if it is not cached or out of date
+        """
+
+        with self.lock:
+            entry = self.entries.get(key)
+
+            if (entry == None):
+                self.misses += 1
+                return None
+
+            if (callable(version)):
+                if (time.monotonic() - entry.checked < self.checkSeconds): version = None
+                else: version = version()
+
+            if (version != None): entry.checked = time.monotonic()
+
+            if (version != None and entry.version != version):
+                logInfo(f"{self.name} cache entry {key} is out of date with its files, reloading")
+                self.stale += 1
+                self.misses += 1
+                self.remove(key)
+                return None
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry.value
+
+    def put(self, key, value, version = None, size = 0):
+        """
+        Cache a value, evicting the least recently used entries if the cache is now too large.
+        """
+
+        with self.lock:
+            self.remove(key)
+
+            self.entries[key] = CacheEntry(value, version, size)
+            self.totalBytes += size
+
+            #Always keep the newest entry, even if it is larger than the whole cache
+            while (self.totalBytes > self.maxBytes and len(self.entries) > 1):
+                evictedKey, evicted = self.entries.popitem(last = False)
+                self.totalBytes -= evicted.size
+                self.evictions += 1
+
+                logInfo(f"Evicted {evictedKey} from the {self.name} cache")
+
+    def revalidate(self, key, version, size = None):
+        """
+        Record that a cached value's files were rewritten from the value itself, so that they are not mistaken for outside changes.
+        """
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if (entry == None): return
+
+            entry.version = version
+
+            if (size != None):
+                self.totalBytes += size - entry.size
+                entry.size = size
+
+    def invalidate(self, key = None):
+        """
+        Discard a cached value so that it is reloaded the next time it is needed, or every value if no key is given.
+        """
+
+        with self.lock:
+            keys = [key] if key != None else list(self.entries.keys())
+
+            for key in keys:
+                if (self.remove(key)): self.invalidations += 1
+
+    def remove(self, key):
+
+        with self.lock:
+            entry = self.entries.pop(key, None)
+            if (entry): self.totalBytes -= entry.size
+
+            return entry
+
+    def stats(self):
+
+        with self.lock:
+            lookups = self.hits + self.misses
+
+            return {
+                "Entries": len(self.entries),
+                "Estimated Size (bytes)": self.totalBytes,
+                "Hits": self.hits,
+                "Misses": self.misses,
+                "Hit Rate": round(self.hits / lookups, 4) if lookups else None,
+                "Out of Date": self.stale,
+                "Evictions": self.evictions,
+                "Invalidations": self.invalidations
+            }
+
+class LookupCache(FileCache):
+    """
+    A least recently used cache of database rows, which are not backed by files. Entries are dropped by the functions that write the rows,
+    and in case the database is edited by hand, they also expire after ttlSeconds.
+
+    Attributes:
+        maxEntries (int): Maximum number of rows kept
+        ttlSeconds (float): Maximum number of seconds a row is kept for
+        generation (int): Incremented on every invalidation, so that a row read from the database while it was being changed is not cached
+    """
+
+    def __init__(self, name, maxEntries, ttlSeconds = 300):
+        super().__init__(name, maxEntries)
+        self.maxEntries = maxEntries
+        self.ttlSeconds = ttlSeconds
+        self.generation = 0
+
+    def get(self, key, version = None):
+
+        with self.lock:
+            entry = self.entries.get(key)
+
+            if (entry != None and time.monotonic() - entry.checked > self.ttlSeconds):
+                self.stale += 1
+                self.remove(key)
+
+            return super().get(key)
+
+    def getOrLoad(self, key, load):
+        """
+        Get a cached row, or load it with load() and cache it if it is not cached. Rows that don't exist (load returned something falsy) are not cached.
+
+        Returns:
+            A copy of the row, so callers can't modify the cached one
+        """
+
+        row = self.get(key)
+
+        if (row == None):
+            generation = self.generation
+
+            row = load()
+            if not (row): return row
+
+            self.putIfCurrent(key, row, generation)
+
+        return dict(row)
+
+    def putIfCurrent(self, key, row, generation):
+        """
+        Cache a row that was read from the database, unless the cache has been invalidated since generation, in which case the row may already be out of date.
+        """
+
+        with self.lock:
+            if (generation == self.generation): self.put(key, row, size = 1)
+
+    def invalidate(self, key = None):
+
+        with self.lock:
+            self.generation += 1
+            super().invalidate(key)
+
+    def stats(self):
+
+        stats = super().stats()
+        stats.pop("Estimated Size (bytes)")
+        stats["Max Entries"] = self.maxEntries
+
+        return stats
+
+def allCacheStats():
+    return {name: cache.stats() for name, cache in caches.items()}
@@ -1,7 +1,22 @@
-import json, os, inspect, pprint, copy
+import json, os, tempfile
+from collections.abc import Mapping
+from contextlib import contextmanager
 
 from logger import *
 
+#Classes that can be loaded from files, keyed by (module, class name). Each class adds itself with the @loadable decorator when its module is imported.
+loadableClasses = dict()
+
+def loadable(class_):
+    """Class decorator which allows objects of this class to be saved to and loaded from files"""
+
+    loadableClasses[(class_.__module__, class_.__name__)] = class_
+    return class_
+
+#Permissions new files get, which files written through a temporary file are given too, since temporary files are only readable by their owner
+umask = os.umask(0)
+os.umask(umask)
+
 #General methods
 
 def easyLoad(fileName, dir = ""):
@@ -12,12 +27,7 @@ def easyLoad(fileName, dir = ""):
 
     with open(f"{dir}{fileName}.json", 'r') as f:
         logInfo("File found, loading")
-        loaded = json.load(f)
-
-    if ("__class__" in loaded.keys()):
-        return loadObject(loaded)
-
-    return loaded
+        return json.load(f, object_hook = toObject)
 
 def easySave(contents, fileName, dir = ""):
 
@@ -25,51 +35,67 @@ def easySave(contents, fileName, dir = ""):
 
     logInfo(f"Saving to file: {dir}{fileName}.json")
 
-    with open(f"{dir}{fileName}.json", 'w') as f:
+    with atomicOpen(f"{dir}{fileName}.json", 'w') as f:
         logInfo("File found")
-        json.dump(saveObject(contents), f, indent = 4)
+        json.dump(contents, f, indent = 4, cls = GameEncoder)
         logInfo("Successfully saved")
 
-def saveObject(originalThing): #recursively turns a custom object, with object parameters and subparameters, into a dictionary
+@contextmanager
+def atomicOpen(path, mode = 'w'):
+    """
+    Open a temporary file to write in place of the file at path, which replaces it only once it has been completely written.
+    If the bot stops partway through, the original file is left as it was.
+    Every write gets its own temporary file, so writes of the same file from different threads never write into each other's.
+    """
+
+    fd, tempPath = tempfile.mkstemp(prefix = f"{os.path.basename(path)}.", suffix = ".tmp", dir = os.path.dirname(path) or ".")
+
+    try:
+        with os.fdopen(fd, mode) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.chmod(tempPath, os.stat(path).st_mode & 0o7777 if os.path.exists(path) else 0o666 & ~umask)
+        os.replace(tempPath, path)
+
+    finally:
+        if (os.path.exists(tempPath)): os.remove(tempPath)
+
+class GameEncoder(json.JSONEncoder):
+    """
+    Streams custom objects such as Savegame, Nation, Population, Unit and Vehicle to json straight from the live objects, without copying them first.
+    Each object is written in the same format as saveObject, with "__class__" and "__module__" keys alongside its attributes.
+    """
+
+    def default(self, thing):
+
+        #Mappings that aren't dicts, such as lazily loaded nations
+        if isinstance(thing, Mapping): return dict(thing)
+
+        try: return toDict(thing)
+        except AttributeError: return super().default(thing)
+
+def saveObject(thing): #recursively turns a custom object, with object parameters and subparameters, into a dictionary
+    """
+    Dicts and lists are rebuilt with their contents converted, so the original objects are never copied or modified.
+    """
+
+    if isinstance(thing, Mapping):
+        return {key: saveObject(value) for key, value in thing.items()}
+
+    if isinstance(thing, list):
+        return [saveObject(item) for item in thing]
+
+    if isinstance(thing, tuple):
+        return tuple(saveObject(item) for item in thing)
 
-    thing = copy.deepcopy(originalThing)
-    
-    #Define the dictionary we should return
-    rtnDict = {}
-    
     #If thing is a custom class, this should work
-    try: rtnDict = toDict(thing)
-        
-    except:
-        
-        if isinstance(thing, dict):
-            rtnDict = thing
-            
-        elif isinstance(thing, list):
-            rtnList = []
-            for item in thing:
-                rtnList.append(saveObject[item])
-            return rtnList
-        
-        else: #Primitive data type
-            return thing
-            
-    #Save each value in the rtnDict recursively
-    for param in rtnDict.keys(): #For each thing in this new dictionary:
-        
-        if isinstance(rtnDict[param], list): #If thing is a list
-            temp, rtnDict[param] = rtnDict[param], [] #Makes the list empty and refills it with built-in data types.
-            for item in temp:
-                rtnDict[param].append(saveObject(item))
-                
-        elif isinstance(rtnDict[param], dict): #If thing is a dict
-            rtnDict[param] = saveObject(rtnDict[param])
-            
-        else:
-            try: rtnDict[param] = saveObject(rtnDict[param]) #Tries to saveObject the thing, assuming it is a custom object
-            except: pass
-    
-    return rtnDict
+    if hasattr(thing, "__dict__"):
+        return saveObject(toDict(thing))
+
+    #Primitive data type
+    return thing
 
 def toDict(thing): #Turns object into dict for json
 
@@ -78,7 +104,9 @@ def toDict(thing): #Turns object into dict for json
     "__module__": thing.__module__
     }
 
-    rtnDict.update(thing.__dict__) #converts object parameters to a dict, combines with current dict
+    #converts object parameters to a dict, combines with current dict
+    #Attributes starting with _ are caches rebuilt at runtime, and aren't saved
+    rtnDict.update({key: value for key, value in thing.__dict__.items() if not key.startswith("_")})
 
     return rtnDict
 
@@ -97,35 +125,18 @@ def loadObject(thing):
 
 def toObject(thing): #Turns dict from json into object
 
-    if (isinstance(thing, dict)):
-        if ("__class__" in thing.keys()): #If dictionary and can be converted to non-dict object:
-            
-            class_name = thing.pop("__class__")
-            module_name = thing.pop("__module__")
-            
-            #For importing modules from packages. Not a perfect way of doing this, but it's the best way I can think of doing it for now.
-            if ('.' in module_name):
-                module_name_list = module_name.split('.')
-                module = __import__(module_name_list.pop(0))
-                
-                #Loop to go through the sub modules and keep importing.
-                for subModule in module_name_list:
-                    module = getattr(module, subModule)
-                
-            else:
-                pprint.pprint(thing)
-                module = __import__(module_name)
-                 
-            class_ = getattr(module,class_name)
-            
-            obj = class_(**thing) #generate object
-            
-            return obj
-        else:
-            obj = thing
-            return obj
-        
-    else: #if not a dictionary or is a dictionary but not convertable to non-dict object:
-        obj = thing
-        return obj
+    if (isinstance(thing, dict) and "__class__" in thing.keys()): #If dictionary and can be converted to non-dict object:
+
+        class_name = thing.pop("__class__")
+        module_name = thing.pop("__module__", None)
 
+        class_ = loadableClasses.get((module_name, class_name))
+
+        #Only classes registered with @loadable can be created, so a savefile can never cause a module to be imported
+        if not (class_):
+            raise ValueError(f"Cannot load unknown class {class_name} from module {module_name}")
+
+        return class_(**thing) #generate object
+
+    #if not a dictionary or is a dictionary but not convertable to non-dict object:
+    return thing
@@ -0,0 +1,411 @@
+import json, os
+
+from logger import *
+from GameUtils import filehandling, savecontainer
+
+#Rewrite the full savefile once a journal has had this many records appended to it
+journalCompactRecords = 256
+
+#Section journaled for a nation which has not been decoded from a binary savefile, since none of its contents are known yet
+pendingSection = '"pending"'
+
+#The journal state of every savegame that has been loaded or saved, keyed by savefile name
+journals = dict()
+
+
+class SaveJournal:
+    """
+    Tracks what a savegame looked like the last time it was persisted, so that only the changes need to be written.
+
+    Attributes:
+        sections (dict): Keys are paths (tuples of keys from the top of the savefile), values are the compact json last persisted at that path.
+            Holds every section outside of the nations themselves.
+        nations (dict): Nation names mapped to the sections of that nation last persisted, in the same form as sections
+        records (int): Number of records appended to the journal file since the savefile was last rewritten in full.
+    """
+
+    def __init__(self, sections, nations, records = 0):
+        self.sections = sections
+        self.nations = nations
+        self.records = records
+
+    def diff(self, sections, nations):
+        """
+        Compare the persisted sections against new ones.
+
+        Args:
+            sections (dict): Every section outside of the nations
+            nations (dict): The sections of only the nations that may have changed, by nation name. Nations that were removed are mapped to None.
+
+        Returns:
+            (tuple): (deleted paths, [(path, json) for every new or changed path])
+        """
+
+        deleted = [path for path in self.sections.keys() if path not in sections]
+        changed = [(path, encoded) for path, encoded in sections.items() if self.sections.get(path) != encoded]
+
+        for nationName, newSections in nations.items():
+            oldSections = self.nations.get(nationName, dict())
+            newSections = newSections or dict()
+
+            deleted += [path for path in oldSections.keys() if path not in newSections]
+            changed += [(path, encoded) for path, encoded in newSections.items() if oldSections.get(path) != encoded]
+
+        return deleted, changed
+
+    def update(self, sections, nations):
+        """Record new sections as persisted, taking the same arguments as diff"""
+
+        self.sections = sections
+
+        for nationName, newSections in nations.items():
+            if (newSections == None): self.nations.pop(nationName, None)
+            else: self.nations[nationName] = newSections
+
+
+def journalPath(fileName, dir):
+    return f"{dir}/{fileName}.journal"
+
+def savegameFormat():
+    """
+    Get the format full savefiles are written in, set by SAVEGAME_FORMAT in .env: "json" (default) or "binary"
+    """
+
+    savefileFormat = os.getenv("SAVEGAME_FORMAT", "json").lower()
+
+    if (savefileFormat not in ("json", "binary")):
+        raise ValueError(f"Unknown SAVEGAME_FORMAT {savefileFormat}, must be json or binary")
+
+    return savefileFormat
+
+def snapshotFormat(fileName, dir):
+    """
+    Get the format of a savegame's most recently written full savefile, or None if it has none
+    """
+
+    snapshots = {
+        savefileFormat: os.path.getmtime(path)
+        for savefileFormat, path in (("json", f"{dir}/{fileName}.json"), ("binary", savecontainer.containerPath(fileName, dir)))
+        if os.path.isfile(path)
+    }
+
+    return max(snapshots, key = snapshots.get, default = None)
+
+def encode(thing):
+    return json.dumps(thing, cls = filehandling.GameEncoder, separators = (',', ':'))
+
+def encodeHeader(thing):
+    """Encode only the metadata needed to recreate an object, without any of its attributes"""
+
+    return encode({"__class__": thing.__class__.__name__, "__module__": thing.__module__})
+
+def savegameSections(savegame, nationNames = None):
+    """
+    Split a savegame into the sections that are journaled separately: top level savegame values, nation values, and each territory and military force.
+
+    Args:
+        nationNames (set): Only split these nations. Defaults to every nation.
+
+    Returns:
+        (tuple): (sections outside of the nations, {nation name: the nation's sections, or None if it is not in the savegame}).
+            Sections are dicts whose keys are paths (tuples of keys from the top of the savefile) and values are the compact json of the object at that path.
+    """
+
+    sections = dict()
+
+    for attr, value in vars(savegame).items():
+        if (attr != "nations"): sections[(attr,)] = encode(value)
+
+    sections[("nations",)] = "{}"
+
+    nations = savegame.nations
+    rtnNations = dict()
+
+    for nationName in (nations.keys() if nationNames == None else nationNames):
+
+        if (nationName not in nations):
+            rtnNations[nationName] = None
+            continue
+
+        #Looked at without marking the nation as touched, since saving it doesn't change it
+        nation = nations.peek(nationName) if isinstance(nations, savecontainer.LazyNations) else nations[nationName]
+
+        #Nations that were never decoded cannot have changed
+        if (isinstance(nation, savecontainer.PendingNation)):
+            rtnNations[nationName] = {("nations", nationName): pendingSection}
+            continue
+
+        rtnNations[nationName] = nationSections(nationName, nation)
+
+    return sections, rtnNations
+
+def nationSections(nationName, nation):
+    """
+    Split a nation into its journaled sections, as in savegameSections
+    """
+
+    path = ("nations", nationName)
+    sections = {path: encodeHeader(nation)}
+
+    for attr, value in vars(nation).items():
+
+        if (attr in ("territories", "military")):
+            sections[path + (attr,)] = "{}"
+            for key, item in value.items():
+                sections[path + (attr, key)] = encode(item)
+
+        else:
+            sections[path + (attr,)] = encode(value)
+
+    return sections
+
+def applyRecord(raw, record):
+    """
+    Apply one journal record to a savefile that has been loaded as plain json, in place.
+    Parents are always set before their children and deleted before they could be set again, so applying a record twice has no further effect.
+    """
+
+    for path in sorted(record["del"], key = len):
+
+        parent = raw
+        for key in path[:-1]:
+            parent = parent.get(key) if isinstance(parent, dict) else None
+
+        if isinstance(parent, dict): parent.pop(path[-1], None)
+
+    for path, value in sorted(record["set"], key = lambda change: len(change[0])):
+
+        parent = raw
+        for key in path[:-1]:
+            parent = parent.get(key) if isinstance(parent, dict) else None
+
+        if not isinstance(parent, dict):
+            logInfo(f"Journal path {path} has no parent in the savefile, skipping")
+            continue
+
+        #A header only recreates the object itself; never replace an existing object's attributes with it
+        if (isinstance(value, dict) and value.keys() == {"__class__", "__module__"} and isinstance(parent.get(path[-1]), dict)):
+            continue
+
+        parent[path[-1]] = value
+
+def readJournal(fileName, dir, snapshotPath):
+    """
+    Read every record in a savegame's journal.
+
+    Args:
+        snapshotPath (str): The full savefile the journal is applied to
+
+    Returns:
+        (list): The records, in the order they were appended
+    """
+
+    if not (os.path.isfile(journalPath(fileName, dir))): return []
+
+    #Full savefiles are written before their journal is removed, so a journal older than the savefile is already contained in it
+    if (os.path.getmtime(journalPath(fileName, dir)) < os.path.getmtime(snapshotPath)):
+        logInfo(f"Ignoring journal for {fileName}, which is older than its savefile")
+        return []
+
+    records = []
+
+    with open(journalPath(fileName, dir), 'r') as f:
+        for line in f:
+
+            try: records.append(json.loads(line))
+            except json.JSONDecodeError:
+                #Only the last record can be incomplete, if the bot stopped while appending it
+                logInfo(f"Ignoring incomplete record at the end of the journal for {fileName}")
+                break
+
+    return records
+
+def recordNationLoaded(fileName, nationName, nation):
+    """
+    Add a nation that was just decoded from a binary savefile to its savegame's journal state, before anything can change it.
+    """
+
+    journal = journals.get(fileName)
+    if (journal): journal.nations[nationName] = nationSections(nationName, nation)
+
+def load(fileName, dir):
+    """
+    Load a savegame from its last full savefile with every journaled change since then applied.
+    Binary savefiles only decode the nations that the journal touches; the rest are decoded when first accessed.
+    """
+
+    if (snapshotFormat(fileName, dir) == "binary"):
+
+        snapshotPath = savecontainer.containerPath(fileName, dir)
+        logInfo(f"Loading from file: {snapshotPath}")
+
+        records = readJournal(fileName, dir, snapshotPath)
+
+        savegame = savecontainer.loadContainer(snapshotPath, records, applyRecord)
+        savegame.nations.onLoad.append(lambda nationName, nation: recordNationLoaded(fileName, nationName, nation))
+
+    else:
+
+        snapshotPath = f"{dir}/{fileName}.json"
+        logInfo(f"Loading from file: {snapshotPath}")
+
+        records = readJournal(fileName, dir, snapshotPath)
+
+        with open(snapshotPath, 'r') as f:
+
+            #Without a journal, objects can be created in the same pass that parses the savefile
+            if not (records): savegame = json.load(f, object_hook = filehandling.toObject)
+
+            else:
+                raw = json.load(f)
+                for record in records: applyRecord(raw, record)
+                savegame = filehandling.loadObject(raw)
+
+        #Every nation is already decoded, but the mapping keeps track of which ones are touched
+        savegame.nations = savecontainer.LazyNations(savegame.nations)
+
+    journals[fileName] = SaveJournal(*savegameSections(savegame), len(records))
+    savegame.nations.takeTouched()
+
+    logInfo(f"Loaded {fileName} and replayed {len(records)} journal records")
+
+    return savegame
+
+def prepareCompact(savegame, dir, savefileFormat = None):
+    """
+    Encode a savegame's full savefile now, to be written later by the function returned. The savegame can go on changing in the meantime.
+
+    Args:
+        savefileFormat (str): "json" or "binary". Defaults to SAVEGAME_FORMAT.
+
+    Returns:
+        (function): Rewrites the full savefile and empties the journal when called with no arguments
+    """
+
+    savefileFormat = savefileFormat or savegameFormat()
+
+    if (savefileFormat == "binary"):
+        path, mode = savecontainer.containerPath(savegame.name, dir), 'wb'
+        contents = savecontainer.encodeContainer(savegame)
+    else:
+        path, mode = f"{dir}/{savegame.name}.json", 'w'
+        contents = json.dumps(savegame, indent = 4, cls = filehandling.GameEncoder)
+
+    if not (isinstance(savegame.nations, savecontainer.LazyNations)):
+        savegame.nations = savecontainer.LazyNations(savegame.nations)
+
+    #Written json savefiles decode every nation, so only split the savegame into sections afterwards
+    journal = journals[savegame.name] = SaveJournal(*savegameSections(savegame))
+    savegame.nations.takeTouched()
+
+    def write():
+        try:
+            with filehandling.atomicOpen(path, mode) as f:
+                f.write(contents)
+
+            #The savefile already contains everything in the journal, so it is safe to lose the journal from here on
+            if (os.path.isfile(journalPath(savegame.name, dir))):
+                os.remove(journalPath(savegame.name, dir))
+
+        except Exception:
+            forceCompact(journal)
+            raise
+
+        logInfo(f"Wrote full savefile for {savegame.name}")
+
+    return write
+
+def compact(savegame, dir, savefileFormat = None):
+    """
+    Rewrite a savegame's full savefile and empty its journal now.
+
+    Args:
+        savefileFormat (str): "json" or "binary". Defaults to SAVEGAME_FORMAT.
+    """
+
+    prepareCompact(savegame, dir, savefileFormat)()
+
+def forceCompact(journal):
+    """
+    Rewrite the full savefile the next time a savegame is saved, because a write failed after its journal state had already been updated,
+    so what was persisted is no longer known.
+    """
+
+    journal.records = journalCompactRecords
+
+def convert(fileName, dir, savefileFormat):
+    """
+    Rewrite a savegame's full savefile, including its journal, in another format.
+    The savefile in the old format is kept, but since the new one is more recent it is the one that will be loaded.
+    """
+
+    savegame = load(fileName, dir)
+    compact(savegame, dir, savefileFormat)
+
+    logInfo(f"Converted savegame {fileName} to {savefileFormat}")
+
+    return savegame
+
+def prepareSave(savegame, dir, compactSave = False):
+    """
+    Find the sections of a savegame that changed since it was last persisted now, to be appended to its journal later by the function returned.
+    Only the nations that were touched since then are encoded again to look for changes.
+    Everything is encoded before this returns, so the savegame can go on changing while it is written.
+
+    Args:
+        compactSave (bool): Rewrite the full savefile instead. This also happens when the savegame has no journal yet or its journal has grown too long.
+
+    Returns:
+        (function): Writes the changes when called with no arguments, or None if nothing changed
+    """
+
+    journal = journals.get(savegame.name)
+
+    if (compactSave or not journal or journal.records >= journalCompactRecords):
+        return prepareCompact(savegame, dir)
+
+    nations = savegame.nations
+
+    if (isinstance(nations, savecontainer.LazyNations)):
+        #Removed nations are touched too, unless the whole mapping was replaced
+        nationNames = nations.takeTouched() | (journal.nations.keys() - nations.keys())
+    else:
+        nationNames = set(nations.keys()) | journal.nations.keys()
+
+    sections, nationsSections = savegameSections(savegame, nationNames)
+    deleted, changed = journal.diff(sections, nationsSections)
+
+    if not (deleted or changed):
+        logInfo(f"No changes to journal for {savegame.name}")
+        return None
+
+    record = '{"turn":%s,"del":%s,"set":[%s]}\n' % (
+        json.dumps(savegame.turn),
+        json.dumps(deleted),
+        ','.join(f"[{json.dumps(path)},{encoded}]" for path, encoded in changed)
+    )
+
+    #Later saves are compared against this one, whether or not it has been written yet
+    journal.update(sections, nationsSections)
+    journal.records += 1
+
+    def write():
+        try:
+            with open(journalPath(savegame.name, dir), 'a') as f:
+                f.write(record)
+
+        except Exception:
+            forceCompact(journal)
+            raise
+
+        logInfo(f"Journaled {len(changed)} changed and {len(deleted)} deleted sections for {savegame.name} ({len(record)} bytes)")
+
+    return write
+
+def save(savegame, dir, compactSave = False):
+    """
+    Persist a savegame now by appending the sections that changed since it was last persisted to its journal, as in prepareSave
+    """
+
+    write = prepareSave(savegame, dir, compactSave)
+    if (write): write()
@@ -0,0 +1,185 @@
+import heapq, hashlib, json, os
+
+from common import *
+from logger import *
+from GameUtils import filehandling, spatial
+
+#Number of landmarks picked for a world when none is given
+defaultLandmarkCount = 8
+
+
+@filehandling.loadable
+class Landmarks:
+    """
+    Shortest path distances from a few landmark territories to every territory of a world, for the ALT heuristic of A*.
+    By the triangle inequality, no path from t to target can be shorter than |dist(L, target) - dist(L, t)| for any landmark L,
+    which is much closer to the real distance than a straight line when paths have to go around missing edges.
+
+    Attributes:
+        world (str): Name of the world
+        signature (str): edgeSignature of the world the distances were computed on. If the world's edges change, the distances are no longer used.
+        landmarks (list): Ids of the landmark territories
+        distances (list): One list per landmark, where [i][t] is the length of the shortest path between landmarks[i] and territory t
+        symmetric (bool): Whether every edge has the same length both ways. If not, only the bounds that hold for one-way edges are used.
+    """
+
+    def __init__(self, world, signature, landmarks, distances, symmetric = True):
+        self.world = world
+        self.signature = signature
+        self.landmarks = landmarks
+        self.distances = distances
+        self.symmetric = symmetric
+
+        #distances as a numpy array, built when first needed
+        self._array = None
+
+    def bound(self, territory, target):
+        """
+        Returns:
+            (float): Lower bound on the length of the shortest path from territory to target.
+                Landmarks which can't reach both of them give no bound.
+        """
+
+        rtnBound = 0
+
+        for row in self.distances:
+            toTarget, toTerritory = row[target], row[territory]
+            if (toTarget == float("inf") or toTerritory == float("inf")): continue
+
+            rtnBound = max(rtnBound, abs(toTarget - toTerritory) if self.symmetric else toTarget - toTerritory)
+
+        return rtnBound
+
+    def bounds(self, target):
+        """
+        The bound for every territory at once. Needs numpy.
+
+        Returns:
+            (numpy.ndarray): [t] is the bound for territory t
+        """
+
+        numpy = spatial.numpy
+
+        if (self._array is None): self._array = numpy.array(self.distances, dtype = numpy.float64)
+
+        toTarget = self._array[:, target][:, None]
+
+        with numpy.errstate(invalid = "ignore"):
+            difference = toTarget - self._array
+            if (self.symmetric): difference = numpy.abs(difference)
+
+        difference[~numpy.isfinite(difference)] = 0
+        return numpy.maximum(difference.max(axis = 0), 0)
+
+
+def edgeSignature(world):
+    """
+    Returns:
+        (str): sha256 of every territory's edges, which changes whenever any edge is added, removed or has its length changed
+    """
+
+    edges = [sorted(territory.edges.items()) for territory in world.territories]
+    return hashlib.sha256(json.dumps(edges).encode()).hexdigest()
+
+def shortestDistances(world, source):
+    """
+    Dijkstra's algorithm over the world's edges.
+
+    Returns:
+        (list): [t] is the length of the shortest path from source to territory t, or infinity if there is none
+    """
+
+    territories = world.territories
+
+    distances = [float("inf")] * len(territories)
+    distances[source] = 0
+
+    queue = [(0, source)]
+
+    while (queue):
+        dist, current = heapq.heappop(queue)
+        if (dist > distances[current]): continue
+
+        for neighbor, edge in territories[current].edges.items():
+            if (dist + edge < distances[neighbor]):
+                distances[neighbor] = dist + edge
+                heapq.heappush(queue, (dist + edge, neighbor))
+
+    return distances
+
+def isSymmetric(world):
+
+    return all(
+        world.territories[neighbor].edges.get(territory.id) == edge
+        for territory in world.territories for neighbor, edge in territory.edges.items()
+    )
+
+def compute(world, count = defaultLandmarkCount):
+    """
+    Pick landmarks spread out across a world and find the distances from them to every territory.
+    Each landmark is the territory furthest along the edges from every landmark already picked, so they end up on the edges of the map,
+    where they give the best bounds. A territory that no landmark can reach yet is picked first, so every separate part of the map gets a landmark.
+
+    Args:
+        count (int): Most landmarks to pick. Fewer are picked if every territory with edges already is one.
+
+    Returns:
+        (Landmarks)
+    """
+
+    logInfo(f"Picking {count} landmarks for world {world.name}")
+
+    connected = [territory.id for territory in world.territories if territory.edges]
+
+    landmarks = []
+    distances = []
+
+    if (connected):
+
+        #The first landmark is the territory furthest from an arbitrary one
+        fromFirst = shortestDistances(world, connected[0])
+        nextLandmark = max(connected, key = lambda t: fromFirst[t] if fromFirst[t] != float("inf") else -1)
+
+        closest = [float("inf")] * len(world.territories)
+
+        while (len(landmarks) < count):
+
+            landmarks.append(nextLandmark)
+            distances.append(shortestDistances(world, nextLandmark))
+
+            closest = [min(a, b) for a, b in zip(closest, distances[-1])]
+
+            nextLandmark = max(connected, key = lambda t: closest[t])
+            if (closest[nextLandmark] == 0): break
+
+    rtnLandmarks = Landmarks(world.name, edgeSignature(world), landmarks, distances, isSymmetric(world))
+
+    logInfo(f"Picked landmarks for world {world.name}", details = {"Landmarks": [world.territories[t].name for t in landmarks]})
+    return rtnLandmarks
+
+def fileName(world_name):
+    return f"{world_name}.landmarks"
+
+def save(landmarks):
+    filehandling.easySave(landmarks, fileName(landmarks.world), worldsDir)
+
+def load(world):
+    """
+    Load the landmarks saved alongside a world, if they were computed on the world as it is now.
+
+    Returns:
+        (Landmarks): Or None if the world has no landmarks file, or its edges have changed since the landmarks were computed
+    """
+
+    if not (os.path.isfile(f"{worldsDir}/{fileName(world.name)}.json")): return None
+
+    try: landmarks = filehandling.easyLoad(fileName(world.name), worldsDir)
+    except Exception as e:
+        logError(e, {"Message": f"Landmarks for world {world.name} could not be loaded"})
+        return None
+
+    if (landmarks.signature != edgeSignature(world)):
+        logInfo(f"World {world.name} has changed since its landmarks were computed, they will not be used until they are computed again")
+        return None
+
+    return landmarks
@@ -1,13 +1,15 @@
-import json, pprint, random
+import json, pprint, random, heapq
 from PIL import Image, ImageDraw, ImageFont
 from math import *
 import operator
 
 from logger import *
 from common import *
+from GameUtils import filehandling, spatial, landmarks
 
 from ConcertOfNationsEngine.concertofnations_exceptions import *
 
+@filehandling.loadable
 class Territory:
     """
     Analogous to a Vertex in a Graph. Represents one territory in a network of territories.
@@ -34,7 +36,13 @@ class Territory:
     def dist(t0, t1):
         return (((t0.pos[0] - t1.pos[0])**2) + ((t0.pos[1] - t1.pos[1])**2))**0.5
 
+def matchesDetails(territory, values):
+    """Check whether a territory's details have all of these values. A detail the territory doesn't have never matches."""
 
+    return all(key in territory.details and territory.details[key] == value for key, value in values.items())
+
+
+@filehandling.loadable
 class World:
     """
     Analogous to a Graph made up of vertices. Represents a game world made up of individual territories, connected in a vast network.
@@ -47,13 +55,126 @@ class World:
         self.name = name
         self.territories = territories or list()
 
+        #Columnar copy of the territories, built when first needed if numpy is installed
+        self._columns = None
+
+        #Landmarks for the A* heuristic. None until the landmarks file is first looked for, and False if there are none that can be used.
+        self._landmarks = None
+
+        self.reindex()
+
     def addNewTerritory(self, name, pos, edges = None, details = None, resources = None, nodes = None):
         
-        self.territories.append(Territory(name, len(self.territories), pos, edges, details, resources, nodes))
+        territory = Territory(name, len(self.territories), pos, edges, details, resources, nodes)
+
+        self.territories.append(territory)
+        self.indexTerritory(territory)
+        self._columns = None
+
+    def indexTerritory(self, territory):
+
+        #If more than one territory has a name, the first one keeps it, like the scan through self.territories used to find
+        self._byName.setdefault(territory.name, territory)
+
+    def reindex(self):
+        """
+        Rebuild the index of territories by name. Lookups by name do this themselves when a name isn't indexed or its territory has been renamed.
+        """
+
+        #Territory names mapped to the territories
+        self._byName = dict()
+
+        for territory in self.territories: self.indexTerritory(territory)
+
+    def columns(self):
+        """
+        Returns:
+            (spatial.WorldColumns): The territories' positions and details as arrays, or None if numpy isn't installed
+        """
+
+        if (spatial.numpy == None): return None
+
+        if (self._columns == None or self._columns.size != len(self.territories)):
+            self._columns = spatial.WorldColumns(self.territories)
+
+        return self._columns
+
+    def distancesTo(self, targets):
+        """
+        Straight line distances from every territory to each of several territories, for use as A* heuristics.
+
+        Args:
+            targets (list): Territory ids
+
+        Returns:
+            (list): One list per target, where [i][j] is the distance from territory j to targets[i]
+        """
+
+        columns = self.columns()
+
+        if (columns): return columns.distancesTo(targets).tolist()
+
+        return [[terr.dist(self[target]) for terr in self.territories] for target in targets]
+
+    def loadLandmarks(self):
+        """
+        Returns:
+            (landmarks.Landmarks): The landmarks saved for this world, or None if it has none or they are out of date
+        """
+
+        if (self._landmarks == None): self._landmarks = landmarks.load(self) or False
+
+        return self._landmarks or None
+
+    def setLandmarks(self, worldLandmarks):
+        """Use these landmarks for pathfinding, or none if worldLandmarks is None"""
+
+        self._landmarks = worldLandmarks or False
+
+    def preprocessLandmarks(self, count = landmarks.defaultLandmarkCount):
+        """
+        Pick landmarks for this world and save them alongside its file, so that pathfinding uses them from now on.
+
+        Returns:
+            (landmarks.Landmarks)
+        """
+
+        worldLandmarks = landmarks.compute(self, count)
+        landmarks.save(worldLandmarks)
+
+        self.setLandmarks(worldLandmarks)
+        return worldLandmarks
+
+    def heuristicTo(self, target):
+        """
+        Lower bounds on the length of the path from each territory to target: the straight line distance,
+        or the landmark bound where the world has landmarks and it is larger.
+
+        Returns:
+            (function): Takes a territory id and returns its bound. With numpy, every bound is computed up front; without it, each is computed when asked for.
+        """
+
+        columns = self.columns()
+        worldLandmarks = self.loadLandmarks()
+
+        if (columns):
+            heuristic = columns.distancesTo([target])[0]
+            if (worldLandmarks): heuristic = spatial.numpy.maximum(heuristic, worldLandmarks.bounds(target))
+
+            return heuristic.tolist().__getitem__
+
+        territories = self.territories
+        targetTerr = territories[target]
+
+        if (worldLandmarks):
+            return lambda t: max(territories[t].dist(targetTerr), worldLandmarks.bound(t, target))
+
+        return lambda t: territories[t].dist(targetTerr)
 
     def calculateAllNeighbors(self, neighborRules):
         """
         Calculates which territories are connecte to which others based on a ruleset.
+        Two territories are connected if one matches a rule's t0, the other matches its t1, and they are no more than its maxDist apart.
 
         Args:
             neighborRules (list): A list of rules, represented as dictionaries following the format:
@@ -64,27 +185,49 @@ class World:
                 }
         """
 
-        for t0 in self.territories:
-            for t1 in self.territories:
+        columns = self.columns()
+
+        #Landmarks computed on the old edges are checked against the new ones when next loaded
+        self._landmarks = None
+
+        for rule in neighborRules:
+
+            if (columns):
+                self.calculateRuleNeighbors(columns, rule)
+                continue
+
+            #Only territories whose details have every value the rule asks for can be connected by it
+            sources = [(t.pos, t) for t in self.territories if matchesDetails(t, rule["t0"])]
+            targets = [(t.pos, t) for t in self.territories if matchesDetails(t, rule["t1"])]
+
+            #Only pairs within maxDist of each other are ever compared
+            for t0, t1, pointDist in spatial.pairsWithin(sources, targets, rule["maxDist"]):
 
                 if t0.id == t1.id: continue
 
-                for rule in neighborRules:
+                t0.edges[t1.id] = round(pointDist, 2)
+                t1.edges[t0.id] = round(pointDist, 2)
+
+    def calculateRuleNeighbors(self, columns, rule):
+        """
+        Connect the territories matching one neighbor rule, comparing them in bulk with numpy.
+        Gives the same edges as the loop in calculateAllNeighbors.
+        """
+
+        numpy = spatial.numpy
 
-                    for key, value in rule["t0"].items():
-                        if (t0.details[key] != value):
-                            continue
+        sources = numpy.flatnonzero(columns.matching(rule["t0"]))
+        targets = numpy.flatnonzero(columns.matching(rule["t1"]))
 
-                    for key, value in rule["t1"].items():
-                        if (t1.details[key] != value):
-                            continue
+        sourceIds, targetIds, distances = spatial.pairsWithinArrays(columns.positions, sources, targets, rule["maxDist"])
 
-                    pointDist = t0.dist(t1)
-                    if (pointDist <= rule["maxDist"]):
-                        t0.edges[t1.id] = round(pointDist, 2)
-                        t1.edges[t0.id] = round(pointDist, 2)
+        #Edges are set in the order the pairs were found, like in the loop
+        for t0, t1, pointDist in zip(sourceIds.tolist(), targetIds.tolist(), distances.tolist()):
 
-                    continue
+            if t0 == t1: continue
+
+            self.territories[t0].edges[t1] = round(pointDist, 2)
+            self.territories[t1].edges[t0] = round(pointDist, 2)
 
     def toImage(self, mapScale = None, colorRules = None, filename = None):
         """
@@ -238,29 +381,39 @@ class World:
         return filename
 
     def constructPath(self, prevTerrs, current, min_dist = float('inf')):
-        
-        if (current in prevTerrs.keys()):
-
-            curr_effective_distance = self[current].edges[prevTerrs[current]]
-            curr_distance = min(curr_effective_distance, min_dist)
-
-            prev_path = self.constructPath(prevTerrs, prevTerrs[current])
-            
-            if not(prev_path):
-                prev_distance = 0
-            else:
-                prev_distance = prev_path[-1]["This Distance"]
-                prev_path[-1]["Next Distance"] += curr_distance
-
-            return prev_path + [{
-                "ID": current, 
-                "Name": self[current].name, 
+        """
+        Follow prevTerrs back from current to the start of the path, then list each territory after the start in order.
+        Only the last step's distance is capped at min_dist.
+        """
+
+        pathIds = []
+        while (current in prevTerrs):
+            pathIds.append(current)
+            current = prevTerrs[current]
+
+        pathIds.reverse()
+
+        path = []
+        prev_distance = 0
+
+        for i, terrID in enumerate(pathIds):
+
+            curr_effective_distance = self.territories[terrID].edges[prevTerrs[terrID]]
+            curr_distance = min(curr_effective_distance, min_dist) if (i == len(pathIds) - 1) else curr_effective_distance
+
+            if (path): path[-1]["Next Distance"] += curr_distance
+
+            path.append({
+                "ID": terrID, 
+                "Name": self.territories[terrID].name, 
                 "Distance": curr_effective_distance, 
                 "This Distance": prev_distance + curr_distance, 
                 "Next Distance": prev_distance + curr_distance
-                }]
+                })
+
+            prev_distance += curr_distance
 
-        return []
+        return path
 
     def path_to(self, start, target, min_dist = float('inf')):
         """ Use the A* Algorithm to find the shortest path between two territories """
@@ -269,44 +422,50 @@ class World:
 
         start = self[start].id
         target = self[target].id
-        
-        openTerrs = dict()
+
+        territories = self.territories
         prevTerrs = dict()
 
         #pathCosts[t] = cost to get to t
-        pathCosts = { terr.id: float("inf") for terr in self.territories}
+        pathCosts = [float("inf")] * len(territories)
         pathCosts[start] = 0
 
-        #fScore[t] = estimated cost (raw distance) to get to target from t
-        fScore = { terr.id: float("inf") for terr in self.territories }
-        fScore[start] = self[start].dist(self[target])
-        openTerrs[start] = fScore[start]
+        #heuristic(t) = lower bound on the cost to get to target from t: the raw distance, tightened by the world's landmarks if it has any
+        heuristic = self.heuristicTo(target)
+
+        #Heap of (fScore, territory), where fScore is the cost to get to the territory plus its estimated cost to the target.
+        #A territory is pushed again whenever a cheaper way to it is found, and the outdated entries are skipped when popped.
+        openTerrs = [(heuristic(start), start)]
+        closedTerrs = set()
 
         while (openTerrs):
 
             #Node with lowest fScore
-            current = min(openTerrs.items(), key = operator.itemgetter(1))[0]
+            fScore, current = heapq.heappop(openTerrs)
+
+            if (current in closedTerrs): continue
 
             if (current == target):
                 path = self.constructPath(prevTerrs, current, min_dist)
                 logInfo(f"Created path from {start} to {target}")
                 return path
-                
-            openTerrs.pop(current)
 
-            for neighbor, edge in self[current].edges.items():
+            closedTerrs.add(current)
+            currentCost = pathCosts[current]
+
+            for neighbor, edge in territories[current].edges.items():
                 
-                predicted_cost = pathCosts[current] + edge
+                predicted_cost = currentCost + edge
 
                 #If predicted cost is less than current minimum known cost
                 if (predicted_cost < pathCosts[neighbor]):
                     
                     prevTerrs[neighbor] = current
                     pathCosts[neighbor] = predicted_cost
-                    fScore[neighbor] = predicted_cost + self[neighbor].dist(self[target])
 
-                    if neighbor not in openTerrs:
-                        openTerrs[neighbor] = fScore[neighbor]
+                    #Reopened if it was already closed, since edges rounded to 2 decimals can be slightly shorter than the heuristic expects
+                    closedTerrs.discard(neighbor)
+                    heapq.heappush(openTerrs, (predicted_cost + heuristic(neighbor), neighbor))
 
         logInfo("Path could not be created")
         return False
@@ -327,7 +486,13 @@ class World:
 
             if items.isdigit(): return self[int(items)]
 
-            #Get the territory from self.territories which has a name equal to items
-            return next(iter(terr for terr in self.territories if terr.name == items), False)
+            territory = self._byName.get(items)
+
+            #A name that isn't indexed, or whose territory has been renamed, may belong to a territory renamed or added to self.territories directly since the index was built
+            if (not territory or territory.name != items):
+                self.reindex()
+                territory = self._byName.get(items)
+
+            return territory or False
 
         return False
\ No newline at end of file
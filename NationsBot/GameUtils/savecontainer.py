@@ -0,0 +1,254 @@
+import json, struct, zlib, contextvars
+from collections.abc import MutableMapping
+
+from logger import *
+from GameUtils import filehandling
+
+#Binary savefile layout:
+#   header:       magic, format version, number of sections
+#   offset table: for each section, its name and the offset and length of its data
+#   sections:     zlib-compressed compact json. The section named "" is the savegame without its nations, every other section is one nation.
+
+containerMagic = b"CONS"
+containerVersion = 1
+
+headerFormat = struct.Struct("<4sHI")
+nameFormat = struct.Struct("<H")
+offsetFormat = struct.Struct("<QI")
+
+#Compression level for sections; compression is rarely the bottleneck, so favour smaller files
+compressionLevel = 6
+
+#Name of the section holding everything in a savegame except its nations
+savegameSection = ""
+
+#Nations accessed by the command that is running, as (id of their LazyNations mapping, nation name), once trackCommandAccesses has been called for it.
+#They are only marked as touched when the command asks for its savegame to be saved, so a save that happens while a command
+#is still partway through changing a nation doesn't clear it before the change is made.
+commandAccesses = contextvars.ContextVar("commandAccesses", default = None)
+
+
+def containerPath(fileName, dir):
+    return f"{dir}/{fileName}.sav"
+
+def encodeSection(thing):
+    return zlib.compress(json.dumps(thing, cls = filehandling.GameEncoder, separators = (',', ':')).encode(), compressionLevel)
+
+def decodeSection(data, objects = False):
+    """
+    Args:
+        objects (bool): Create objects of loadable classes while decoding, instead of returning plain json
+    """
+
+    return json.loads(zlib.decompress(data), object_hook = filehandling.toObject if objects else None)
+
+
+class PendingNation:
+    """
+    A nation that is still compressed as it was read from a savefile.
+
+    Attributes:
+        data (bytes): The nation's compressed section
+    """
+
+    def __init__(self, data):
+        self.data = data
+
+
+class LazyNations(MutableMapping):
+    """
+    Mapping of nation names to nations, which only decodes a nation from its savefile section the first time it is accessed.
+    Commands that touch one nation, like looking up a player's nation, never pay for decoding the rest of the savegame.
+    It also keeps track of which nations were touched, so that saving only has to encode those again.
+
+    Attributes:
+        nations (dict): Nation names mapped to Nation objects, or to PendingNation objects if they have not been decoded yet
+        onLoad (list): Functions called with (name, nation) whenever a nation is decoded
+        touched (set): Names of the nations which were accessed, added or removed since they were last saved
+    """
+
+    def __init__(self, nations = None):
+        self.nations = dict(nations or {})
+        self.onLoad = []
+        self.touched = set()
+
+    def __getitem__(self, name):
+
+        nation = self.nations[name]
+        self.touch(name)
+
+        if isinstance(nation, PendingNation):
+            nation = decodeSection(nation.data, objects = True)
+            self.nations[name] = nation
+
+            logDebug(lambda: f"Decoded nation {name} from its savefile section")
+
+            for callback in self.onLoad: callback(name, nation)
+
+        return nation
+
+    def __setitem__(self, name, nation):
+        self.nations[name] = nation
+        self.touch(name)
+
+    def __delitem__(self, name):
+        del self.nations[name]
+        self.touch(name)
+
+    def __iter__(self):
+        return iter(self.nations)
+
+    def __len__(self):
+        return len(self.nations)
+
+    def __contains__(self, name):
+        return name in self.nations
+
+    def isLoaded(self, name):
+        return not isinstance(self.nations[name], PendingNation)
+
+    def peek(self, name):
+        """Get a nation, or its PendingNation if it has not been decoded, without marking it as touched"""
+
+        return self.nations[name]
+
+    def touch(self, name):
+        """
+        Mark a nation as possibly changed, since whoever accessed it may change it.
+        During a command tracked by trackCommandAccesses, it is only marked once the command asks for a save.
+        """
+
+        accesses = commandAccesses.get()
+
+        if (accesses != None): accesses.add((id(self), name))
+        else: self.touched.add(name)
+
+    def touchCommandAccesses(self):
+        """Mark every nation the running command has accessed as touched, because the command is about to save its changes"""
+
+        accesses = commandAccesses.get()
+        if (accesses): self.touched.update(name for mapping, name in accesses if mapping == id(self))
+
+    def takeTouched(self):
+        """
+        Returns:
+            (set): The names of the touched nations, which are no longer marked as touched
+        """
+
+        touched, self.touched = self.touched, set()
+        return touched
+
+
+def trackCommandAccesses():
+    """
+    Start collecting the nations the running command accesses, instead of marking them as touched straight away. Must be called from the task running the command.
+    dbcall copies the context into its worker threads, so nations accessed there are collected too.
+    """
+
+    return commandAccesses.set(set())
+
+
+def encodeContainer(savegame):
+    """
+    Encode a savegame as a binary savefile. Nations which were never decoded are written back without being decoded or recompressed.
+
+    Returns:
+        (bytes): The contents of the savefile
+    """
+
+    top = filehandling.toDict(savegame)
+    nations = top.pop("nations")
+
+    sections = [(savegameSection, encodeSection(top))]
+
+    for name in nations.keys():
+        nation = nations.peek(name) if isinstance(nations, LazyNations) else nations[name]
+        sections.append((name, nation.data if isinstance(nation, PendingNation) else encodeSection(nation)))
+
+    names = [name.encode() for name, data in sections]
+
+    tableSize = sum(nameFormat.size + len(name) + offsetFormat.size for name in names)
+    offset = headerFormat.size + tableSize
+
+    table = []
+    for name, (sectionName, data) in zip(names, sections):
+        table.append(nameFormat.pack(len(name)) + name + offsetFormat.pack(offset, len(data)))
+        offset += len(data)
+
+    return headerFormat.pack(containerMagic, containerVersion, len(sections)) + b''.join(table) + b''.join(data for name, data in sections)
+
+def readContainer(path):
+    """
+    Read the sections of a binary savefile without decoding them.
+
+    Returns:
+        (dict): Section names mapped to their compressed data, in the order they were written
+    """
+
+    with open(path, 'rb') as f:
+        contents = f.read()
+
+    magic, version, count = headerFormat.unpack_from(contents, 0)
+
+    if (magic != containerMagic):
+        raise ValueError(f"{path} is not a binary savefile")
+
+    if (version > containerVersion):
+        raise ValueError(f"{path} has format version {version}, only versions up to {containerVersion} can be read")
+
+    sections = dict()
+    position = headerFormat.size
+
+    for i in range(count):
+        (nameLength,) = nameFormat.unpack_from(contents, position)
+        position += nameFormat.size
+
+        name = contents[position : position + nameLength].decode()
+        position += nameLength
+
+        offset, length = offsetFormat.unpack_from(contents, position)
+        position += offsetFormat.size
+
+        sections[name] = contents[offset : offset + length]
+
+    return sections
+
+def loadContainer(path, records = (), applyRecord = None):
+    """
+    Load a savegame from a binary savefile, applying journal records to it. Only the nations that the records touch are decoded.
+
+    Args:
+        records (list): Journal records
+        applyRecord (function): Applies one journal record to the savegame as plain json
+
+    Returns:
+        (Savegame): The savegame, whose nations are a LazyNations mapping
+    """
+
+    sections = readContainer(path)
+
+    raw = decodeSection(sections.pop(savegameSection))
+
+    #Nations named by any journaled path have to be decoded so that the journal can be applied to them
+    touched = {path[1] for record in records for path in record["del"] + [change[0] for change in record["set"]] if len(path) > 1 and path[0] == "nations"}
+
+    raw["nations"] = {name: decodeSection(data) for name, data in sections.items() if name in touched}
+
+    for record in records: applyRecord(raw, record)
+
+    decoded = filehandling.loadObject(raw.pop("nations"))
+
+    nations = LazyNations()
+
+    for name, data in sections.items():
+        if (name not in touched): nations[name] = PendingNation(data)
+        elif (name in decoded): nations[name] = decoded[name]
+
+    #Nations added since the savefile was written
+    for name, nation in decoded.items():
+        if (name not in nations): nations[name] = nation
+
+    #loadObject only rebuilds dicts, so it passes the LazyNations mapping to the savegame as it is
+    raw["nations"] = nations
+
+    return filehandling.loadObject(raw)
@@ -34,7 +34,7 @@ class SchemaProperties:
             **kwargs: Optional keyword args that may be used by a dedicated validator function.
         """
 
-        logInfo(f"Validating Schema Path: {path}")
+        logDebug(lambda: f"Validating Schema Path: {path}", sampleEvery = 1000)
         
         if self.exact_value:
             if not(input_obj == self.exact_value):
@@ -67,7 +67,7 @@ def schema_validate_list(schema, input_obj, path, **kwargs):
         **kwargs: Optional keyword args that may be used by a dedicated validator function.
     """
 
-    logInfo(f"Validating Schema Path: {path}")
+    logDebug(lambda: f"Validating Schema Path: {path}", sampleEvery = 1000)
 
     for i, element in enumerate(input_obj):
         schema_validate(schema[0], element, path + f'[{i}]', **kwargs)
@@ -83,7 +83,7 @@ def schema_validate_dict(schema, input_obj, path, **kwargs):
         **kwargs: Optional keyword args that may be used by a dedicated validator function.
     """
 
-    logInfo(f"Validating Schema Path: {path}")
+    logDebug(lambda: f"Validating Schema Path: {path}", sampleEvery = 1000)
 
     for key, val in schema.items():
 
@@ -114,7 +114,7 @@ def schema_validate_values(schema, input_obj, path, **kwargs):
         **kwargs: Optional keyword args that may be used by a dedicated validator function.
     """
 
-    logInfo(f"Validating Schema Path: {path}")
+    logDebug(lambda: f"Validating Schema Path: {path}", sampleEvery = 1000)
 
     for key, val in input_obj.items():
         schema_validate(schema, val, path + '.' + key, **kwargs)
@@ -131,7 +131,7 @@ def schema_validate(schema, input_obj, path = 'schema', **kwargs):
         **kwargs: Optional keyword args that may be used by a dedicated validator function.
     """
 
-    logInfo(f"Validating Schema Path: {path}")
+    logDebug(lambda: f"Validating Schema Path: {path}", sampleEvery = 1000)
 
     if isinstance(schema, SchemaProperties):
         schema.validate(input_obj, path, **kwargs)
@@ -0,0 +1,222 @@
+from math import floor, isfinite
+
+#numpy is optional. Without it, worlds fall back to the pure Python grid below.
+try: import numpy
+except ImportError: numpy = None
+
+
+class GridIndex:
+    """
+    A uniform grid over 2D points, for finding every point within some distance of another without comparing it against every point.
+    Points are bucketed into square cells of side cellSize, so all points within cellSize of a position are in its cell or the 8 around it.
+
+    Attributes:
+        cellSize (float): Side length of each cell, which must be at least the largest distance that will be searched for
+        cells (dict): (cell x, cell y) mapped to lists of (position, item) in that cell
+    """
+
+    def __init__(self, cellSize, points = ()):
+        self.cellSize = cellSize
+        self.cells = dict()
+
+        for pos, item in points: self.add(pos, item)
+
+    def cellOf(self, pos):
+        return (floor(pos[0] / self.cellSize), floor(pos[1] / self.cellSize))
+
+    def add(self, pos, item):
+        self.cells.setdefault(self.cellOf(pos), []).append((pos, item))
+
+    def within(self, pos, maxDist):
+        """
+        Find the items within maxDist of a position.
+
+        Yields:
+            (item, dist): Each item no further than maxDist from pos, with its distance
+        """
+
+        cx, cy = self.cellOf(pos)
+        maxDistSquared = maxDist * maxDist
+
+        for x in (cx - 1, cx, cx + 1):
+            for y in (cy - 1, cy, cy + 1):
+
+                for other, item in self.cells.get((x, y), ()):
+                    dx = other[0] - pos[0]
+                    dy = other[1] - pos[1]
+                    distSquared = dx*dx + dy*dy
+
+                    if (distSquared <= maxDistSquared): yield item, distSquared**0.5
+
+
+def pairsWithin(sources, targets, maxDist):
+    """
+    Find every pair of a source and a target point which are within maxDist of each other.
+
+    Args:
+        sources (list): (position, item) tuples
+        targets (list): (position, item) tuples
+
+    Yields:
+        (sourceItem, targetItem, dist)
+    """
+
+    if not (sources and targets): return
+
+    #A grid can't be made of infinitely large cells; every pair is in range anyway
+    if not (isfinite(maxDist)):
+        for pos, item in sources:
+            for other, otherItem in targets:
+                yield item, otherItem, ((other[0] - pos[0])**2 + (other[1] - pos[1])**2)**0.5
+        return
+
+    #Cells are never smaller than this, so that a maxDist of 0 still makes a usable grid
+    grid = GridIndex(max(maxDist, 1e-9), targets)
+
+    for pos, item in sources:
+        for otherItem, dist in grid.within(pos, maxDist):
+            yield item, otherItem, dist
+
+
+# Vectorized versions, used when numpy is installed
+
+class WorldColumns:
+    """
+    Columnar copy of a world's territories, for computing over every territory at once.
+
+    Attributes:
+        size (int): Number of territories
+        positions (numpy.ndarray): (size, 2) float array of territory positions, indexed by territory id
+        details (dict): Detail keys mapped to (codes, categories). codes is an int array holding, for each territory,
+            the index of its value for this detail in the categories list, or -1 if it doesn't have the detail.
+    """
+
+    def __init__(self, territories):
+        self.size = len(territories)
+        self.positions = numpy.array([territory.pos for territory in territories], dtype = numpy.float64).reshape(self.size, 2)
+        self.details = dict()
+
+        keys = {key for territory in territories for key in territory.details}
+
+        for key in keys:
+            categories = []
+            categoryCodes = dict()
+            codes = numpy.full(self.size, -1, dtype = numpy.int32)
+
+            for i, territory in enumerate(territories):
+                if (key not in territory.details): continue
+
+                value = territory.details[key]
+
+                #Unhashable values, like lists, are compared by their json-like repr instead
+                valueKey = value if isinstance(value, (str, int, float, bool, type(None))) else repr(value)
+
+                if (valueKey not in categoryCodes):
+                    categoryCodes[valueKey] = len(categories)
+                    categories.append(value)
+
+                codes[i] = categoryCodes[valueKey]
+
+            self.details[key] = (codes, categories)
+
+    def matching(self, values):
+        """
+        Returns:
+            (numpy.ndarray): Boolean mask of the territories whose details have all of these values
+        """
+
+        mask = numpy.ones(self.size, dtype = bool)
+
+        for key, value in values.items():
+            if (key not in self.details): return numpy.zeros(self.size, dtype = bool)
+
+            codes, categories = self.details[key]
+            matches = [code for code, category in enumerate(categories) if category == value]
+
+            mask &= numpy.isin(codes, matches)
+
+        return mask
+
+    def distancesTo(self, targets):
+        """
+        Straight line distances from every territory to each of several targets.
+
+        Args:
+            targets (list): Territory ids
+
+        Returns:
+            (numpy.ndarray): (len(targets), size) array, where [i, j] is the distance from territory j to targets[i]
+        """
+
+        difference = self.positions[None, :, :] - self.positions[numpy.asarray(targets)][:, None, :]
+        return numpy.sqrt((difference**2).sum(axis = 2))
+
+
+def pairsWithinArrays(positions, sources, targets, maxDist):
+    """
+    Vectorized pairsWithin over a positions array: every source is only compared to the targets in the 3x3 grid cells around it, with no Python loop per territory.
+
+    Args:
+        positions (numpy.ndarray): (n, 2) array of positions
+        sources (numpy.ndarray): Indices into positions
+        targets (numpy.ndarray): Indices into positions
+
+    Returns:
+        (sourceIndices, targetIndices, distances): Arrays describing each pair within maxDist of each other
+    """
+
+    empty = (numpy.empty(0, dtype = numpy.int64), numpy.empty(0, dtype = numpy.int64), numpy.empty(0))
+
+    if not (len(sources) and len(targets)): return empty
+
+    #Every pair is in range anyway, so compare every pair in one block
+    if not (isfinite(maxDist)):
+        sourceIndices = numpy.repeat(sources, len(targets))
+        targetIndices = numpy.tile(targets, len(sources))
+        difference = positions[sourceIndices] - positions[targetIndices]
+        return sourceIndices, targetIndices, numpy.sqrt((difference**2).sum(axis = 1))
+
+    cellSize = max(maxDist, 1e-9)
+
+    sourceCells = numpy.floor(positions[sources] / cellSize).astype(numpy.int64)
+    targetCells = numpy.floor(positions[targets] / cellSize).astype(numpy.int64)
+
+    #Number each cell with one integer, leaving a margin of one cell on every side for the neighboring cells of the sources
+    low = numpy.minimum(sourceCells.min(axis = 0), targetCells.min(axis = 0)) - 1
+    span = numpy.maximum(sourceCells.max(axis = 0), targetCells.max(axis = 0)) - low + 2
+
+    def cellKeys(cells):
+        return (cells[:, 0] - low[0]) * span[1] + (cells[:, 1] - low[1])
+
+    #Targets sorted by cell, so the targets in any cell are one contiguous slice
+    order = numpy.argsort(cellKeys(targetCells), kind = "stable")
+    sortedTargets = targets[order]
+    sortedKeys = cellKeys(targetCells)[order]
+
+    results = []
+
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+
+            keys = cellKeys(sourceCells + numpy.array([dx, dy]))
+
+            starts = numpy.searchsorted(sortedKeys, keys, side = "left")
+            counts = numpy.searchsorted(sortedKeys, keys, side = "right") - starts
+
+            total = int(counts.sum())
+            if not (total): continue
+
+            #Expand each source into one candidate pair per target in the cell
+            sourceIndices = numpy.repeat(sources, counts)
+            offsets = numpy.arange(total) - numpy.repeat(numpy.cumsum(counts) - counts, counts)
+            targetIndices = sortedTargets[numpy.repeat(starts, counts) + offsets]
+
+            difference = positions[sourceIndices] - positions[targetIndices]
+            distSquared = (difference**2).sum(axis = 1)
+
+            inRange = distSquared <= maxDist * maxDist
+            results.append((sourceIndices[inRange], targetIndices[inRange], numpy.sqrt(distSquared[inRange])))
+
+    if not (results): return empty
+
+    return tuple(numpy.concatenate(column) for column in zip(*results))
@@ -0,0 +1,181 @@
+import asyncio, atexit, threading, time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from logger import *
+
+#A save is written once nothing else has asked to save the same file for this many seconds
+saveDelaySeconds = 2.0
+
+#...but never later than this many seconds after the first save that is waiting, so a long burst of commands can't postpone it forever
+maxSaveDelaySeconds = 10.0
+
+#Saves waiting to be written, keyed by file name
+pendingSaves = dict()
+pendingSavesLock = threading.RLock()
+
+#Every write goes through this one thread, in the order the saves were prepared, so that a later write of a file never lands before an earlier one
+writeExecutor = ThreadPoolExecutor(max_workers = 1, thread_name_prefix = "writebehind")
+
+
+class PendingSave:
+    """
+    The latest save requested for one file, which replaces any earlier save of the same file that is still waiting.
+
+    Attributes:
+        prepare (function): Called with no arguments on the event loop, when the save is due. Encodes what is to be written and returns a function that writes it, or None if there is nothing to write.
+        firstRequested (float): time.monotonic() of the earliest save request that has not been written yet
+        handle (asyncio.TimerHandle): The timer that will write this save, if one is scheduled
+        loop (asyncio.AbstractEventLoop): The event loop the save was requested from, which the save is prepared on
+    """
+
+    def __init__(self, prepare, loop):
+        self.prepare = prepare
+        self.firstRequested = time.monotonic()
+        self.handle = None
+        self.loop = loop
+
+
+def schedule(key, prepare):
+    """
+    Request that a file be written soon. Requests for the same key made within saveDelaySeconds of each other are coalesced into one write.
+    Outside of a running event loop, such as in the test suites, the file is written immediately.
+
+    Args:
+        key (str): Identifies the file, e.g. the savegame's name
+        prepare (function): Encodes what is to be written and returns a function that writes it, or None if there is nothing to write.
+            It is called on the event loop, so that the objects being saved can't change while they are encoded; only the returned function runs in the background.
+    """
+
+    try: loop = asyncio.get_running_loop()
+    except RuntimeError:
+        writeNow(key, prepare)
+        return
+
+    with pendingSavesLock:
+
+        pending = pendingSaves.get(key)
+
+        if (pending):
+            pending.prepare = prepare
+            if (pending.handle): pending.handle.cancel()
+        else:
+            pending = pendingSaves[key] = PendingSave(prepare, loop)
+
+        delay = max(0, min(saveDelaySeconds, pending.firstRequested + maxSaveDelaySeconds - time.monotonic()))
+        pending.handle = loop.call_later(delay, flushInBackground, key)
+
+    logDebug(lambda: f"Scheduled save of {key} in {round(delay, 2)} seconds")
+
+def cancel(key):
+    """
+    Drop a waiting save without writing it, because it has been superseded by a write that already happened.
+    """
+
+    with pendingSavesLock:
+        pending = pendingSaves.pop(key, None)
+        if (pending and pending.handle): pending.handle.cancel()
+
+def write(key, save):
+    """
+    Write a prepared save, logging it if the write fails.
+    """
+
+    try: save()
+    except Exception as e:
+        logError(e, {"Message": f"Could not write a delayed save of {key}"})
+
+def submit(key, prepare):
+    """
+    Prepare a save in the calling thread and queue its write behind every write already prepared.
+
+    Returns:
+        (concurrent.futures.Future): Done once the file has been written
+    """
+
+    try: save = prepare()
+    except Exception as e:
+        logError(e, {"Message": f"Could not prepare a save of {key}"})
+        save = None
+
+    if not (save):
+        future = Future()
+        future.set_result(None)
+        return future
+
+    try: return writeExecutor.submit(write, key, save)
+
+    #Once the interpreter has started shutting down, no more work can be given to threads
+    except RuntimeError:
+        write(key, save)
+
+        future = Future()
+        future.set_result(None)
+        return future
+
+def onLoop(loop, function):
+    """
+    Call a function on an event loop's thread and wait for its result. It is called directly if this is that thread or the loop isn't running any more.
+    """
+
+    try: runningLoop = asyncio.get_running_loop()
+    except RuntimeError: runningLoop = None
+
+    if (runningLoop is loop or not loop.is_running()): return function()
+
+    future = Future()
+
+    def call():
+        try: future.set_result(function())
+        except Exception as e: future.set_exception(e)
+
+    loop.call_soon_threadsafe(call)
+    return future.result()
+
+def writeNow(key, prepare):
+    """
+    Write a file now instead of waiting, dropping any save of it that is still waiting since this one supersedes it.
+    The save is prepared in the calling thread. On the event loop, it is written in the background without waiting for it,
+    and anywhere else this returns once it has been written.
+    """
+
+    cancel(key)
+
+    future = submit(key, prepare)
+
+    try: asyncio.get_running_loop()
+    except RuntimeError: future.result()
+
+def flushInBackground(key):
+    """
+    Called on the event loop when a save's timer runs out. The save is prepared here, and written in the background so that the event loop keeps handling commands meanwhile.
+    """
+
+    with pendingSavesLock:
+        pending = pendingSaves.pop(key, None)
+
+    if not (pending): return
+
+    submit(key, pending.prepare)
+
+def flush(key = None):
+    """
+    Write waiting saves now, and wait for them and for every write already in the background to finish.
+    Each save is still prepared on the event loop it was requested from, if that loop is running.
+
+    Args:
+        key (str): The file to write. If not given, every waiting save is written.
+    """
+
+    with pendingSavesLock:
+        keys = [key] if key else list(pendingSaves.keys())
+        toSave = [(key, pendingSaves.pop(key)) for key in keys if key in pendingSaves]
+
+    for key, pending in toSave:
+
+        if (pending.handle): pending.handle.cancel()
+        onLoop(pending.loop, lambda: submit(key, pending.prepare))
+
+    #Writes run in order, so once this no-op has run every write queued before it is done. Callers rely on the files being up to date once this returns.
+    submit(key, lambda: lambda: None).result()
+
+atexit.register(flush)
@@ -1,11 +1,11 @@
 from common import *
 from logger import *
 
-import pprint
+import pprint, time, tempfile
 from random import *
 from math import *
 
-from GameUtils import filehandling, mapping
+from GameUtils import filehandling, journaling, mapping, spatial, landmarks
 
 from ConcertOfNationsEngine.gamehandling import *
 from ConcertOfNationsEngine.gameobjects import *
@@ -61,6 +61,38 @@ def generateTestWorld(gamerule, length, height, space, pos_rand = (0,0)):
     logInfo("Generated 'Test World'")
     return world
 
+def randomWorldPositions(size, maxDist, neighborsPerTerritory):
+    """
+    Returns:
+        (list): size random positions in a square sized so that territories up to maxDist apart have neighborsPerTerritory neighbors on average
+    """
+
+    side = (size * pi * maxDist**2 / neighborsPerTerritory) ** 0.5
+    return [(round(random() * side, 2), round(random() * side, 2)) for i in range(size)]
+
+def gridWorldPositions(side, space = 10):
+    """
+    Returns:
+        (list): Positions of a square grid with side territories along each side, row by row
+    """
+
+    return [(x * space, y * space) for y in range(side) for x in range(side)]
+
+def generateBenchmarkWorld(name, positions, terrain = lambda i: "Plains"):
+    """
+    Generate a world for the benchmarks, without any neighbors calculated.
+
+    Args:
+        positions (list): Position of each territory. Territory i is named T{i}.
+        terrain (function): Takes the index of a territory and returns its terrain
+    """
+
+    world = mapping.World(name)
+    for i, pos in enumerate(positions):
+        world.addNewTerritory(f"T{i}", pos, details = {"Terrain": terrain(i)})
+
+    return world
+
 def testPath(world, start, target):
 
     logInfo(f"Path from {start} to {target} territories in {world.name}", details = world.path_to(start, target))
@@ -389,3 +421,399 @@ def testWorldSavegameSync(world, world_name, resource):
     world[0].nodes[resource] = 10
     validate_modified_world(world_name, filehandling.saveObject(world))
 
+
+def benchmarkSavegameFormats(savegame, copies = 100, repeats = 5):
+    """
+    Compare the file size and load time of the json and binary savefile formats, on a copy of a savegame with every nation duplicated to make it larger.
+
+    Args:
+        copies (int): How many times each nation is duplicated
+        repeats (int): How many times each load is timed; the fastest time is kept
+    """
+
+    logInfo(f"Benchmarking savefile formats for {savegame.name} with {len(savegame.nations) * copies} nations")
+
+    raw = filehandling.saveObject(savegame)
+    raw["name"] = "Benchmark"
+    raw["nations"] = {f"{name} {i}": dict(nation, name = f"{name} {i}") for i in range(copies) for name, nation in raw["nations"].items()}
+
+    large = filehandling.loadObject(raw)
+    firstNation = next(iter(large.nations))
+
+    results = dict()
+
+    with tempfile.TemporaryDirectory() as dir:
+        for savefileFormat, path in (("json", f"{dir}/Benchmark.json"), ("binary", f"{dir}/Benchmark.sav")):
+
+            journaling.compact(large, dir, savefileFormat)
+
+            fullLoad = []
+            oneNation = []
+
+            for i in range(repeats):
+                start = time.perf_counter()
+                loaded = journaling.load("Benchmark", dir)
+                loaded.nations[firstNation]
+                oneNation.append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                loaded = journaling.load("Benchmark", dir)
+                list(loaded.nations.values())
+                fullLoad.append(time.perf_counter() - start)
+
+            results[savefileFormat] = {
+                "File Size (bytes)": os.path.getsize(path),
+                "Load + one nation (s)": min(oneNation),
+                "Load + every nation (s)": min(fullLoad)
+            }
+
+    journaling.journals.pop("Benchmark", None)
+
+    logInfo(f"Savefile format benchmark for {savegame.name}", details = results)
+
+    return results
+
+def testAddNationStatements(savegame, nation, playerID):
+    """
+    Check that binding a nation to a player writes everything in one transaction: at most three statements and one commit the first time,
+    and only the PlayerGames statement once the player and role are cached. Looking up the player and role afterwards must not query the database.
+    """
+
+    logInfo(f"Counting database statements for adding nation {nation.name} with player {playerID}")
+
+    results = dict()
+
+    for attempt in ("First", "Repeated"):
+        before = getStatementCounts()
+
+        if not (add_Nation(savegame, nation, playerID)):
+            raise LogicError(f"Could not add nation {nation.name}")
+
+        after = getStatementCounts()
+        results[attempt] = {kind: after[kind] - before[kind] for kind in after}
+
+        #add_Nation caches the player and role it wrote, so looking them up as a command would is free
+        before = getStatementCounts()
+
+        get_Player(playerID)
+        get_Role(nation.role_id)
+
+        after = getStatementCounts()
+        results[f"{attempt} Lookups"] = {kind: after[kind] - before[kind] for kind in after}
+
+    logInfo("Statements issued by add_Nation and the lookups after it", details = results)
+
+    assert results["First"]["Statements"] <= 3
+    assert results["First"]["Commits"] == 1
+    assert results["Repeated"] == {"Statements": 1, "Commits": 1}
+    assert results["First Lookups"]["Statements"] == 0
+
+    return results
+
+def benchmarkWorldMapLookups(world, savegame, turns = 2000, lookups = 500):
+    """
+    Measure how long dbget_worldMap takes with and without the indexes from the WorldMaps and PlayerGames migration, on a savegame with many turns of world maps.
+    The world maps are added under turn numbers far past the savegame's own turn, and removed afterwards.
+
+    Args:
+        turns (int): Number of turns of world maps to add
+        lookups (int): Number of lookups of random turns to time
+    """
+
+    import migrations
+
+    logInfo(f"Benchmarking world map lookups for {savegame.name} with {turns} turns of world maps")
+
+    indexMigration = next(migration for migration in migrations.get_migrations() if migration.name == "worldmap_playergame_indexes")
+
+    savegameInfo = dbget_saveGame_byServer(savegame.server_id)
+    worldInfo = dbget_world_byName(world.name)
+
+    firstTurn = 1000000
+    mapNum = savegame.gamestate["mapNum"] - int(savegame.gamestate["mapChanged"])
+
+    with dbconnection() as db:
+        cursor = db.cursor(buffered=True)
+
+        stmt = "INSERT INTO WorldMaps (world_id, savegame_id, turn_no, turn_map_no, filename, link) VALUES (%s, %s, %s, %s, %s, %s)"
+        params = [(worldInfo['id'], savegameInfo['id'], turn, mapNum, f"benchmark_{turn}.png", f"benchmark://{savegame.server_id}/{turn}") for turn in range(firstTurn, firstTurn + turns)]
+        cursor.executemany(stmt, params)
+        db.commit()
+
+    results = dict()
+
+    try:
+        for indexed in (False, True):
+
+            with dbconnection() as db:
+                cursor = db.cursor(buffered=True)
+
+                if (indexed): migrations.applyStatements(cursor, indexMigration.statements())
+                else:
+                    for table, index in (("WorldMaps", "WorldMaps_lookup"), ("PlayerGames", "PlayerGames_game")):
+                        if (dialect() == "sqlite"): cursor.execute(f"DROP INDEX IF EXISTS `{index}`")
+                        else: cursor.execute(f"DROP INDEX IF EXISTS `{index}` ON `{table}`")
+
+                db.commit()
+
+            times = []
+
+            for i in range(lookups):
+                turn = randrange(firstTurn, firstTurn + turns)
+
+                #Time the database lookup, not the map link cache
+                worldMapCache.invalidate()
+
+                start = time.perf_counter()
+                result = dbget_worldMap(world, savegame, turn)
+                times.append(time.perf_counter() - start)
+
+                if not (result): raise LogicError(f"Benchmark world map for turn {turn} was not found")
+
+            times.sort()
+
+            results["With indexes" if indexed else "Without indexes"] = {
+                "Mean (ms)": round(1000 * sum(times) / len(times), 3),
+                "Median (ms)": round(1000 * times[len(times) // 2], 3),
+                "95th Percentile (ms)": round(1000 * times[int(len(times) * 0.95)], 3)
+            }
+
+    finally:
+        with dbconnection() as db:
+            cursor = db.cursor(buffered=True)
+
+            stmt = "DELETE FROM WorldMaps WHERE savegame_id=%s AND turn_no>=%s"
+            params = [savegameInfo['id'], firstTurn]
+            cursor.execute(stmt, params)
+            db.commit()
+
+    logInfo(f"World map lookup benchmark for {savegame.name}", details = results)
+
+    return results
+
+def benchmarkNeighborCalculation(sizes = (100, 1000, 5000, 20000), neighborsPerTerritory = 6, bruteForceLimit = 2000):
+    """
+    Time World.calculateAllNeighbors on random worlds of increasing size, which are spread out so that each territory has about the same number of neighbors.
+    On the smaller worlds, the edges are also checked against comparing every pair of territories.
+
+    Args:
+        sizes (tuple): Numbers of territories to generate worlds with
+        neighborsPerTerritory (int): Average number of neighbors each territory should have
+        bruteForceLimit (int): Largest world to also compare every pair of territories for
+    """
+
+    logInfo(f"Benchmarking neighbor calculation for worlds of {sizes} territories")
+
+    maxDist = 10
+    rules = [{"t0": {"Terrain": "Plains"}, "t1": {"Terrain": "Plains"}, "maxDist": maxDist}]
+
+    results = dict()
+
+    for size in sizes:
+
+        world = generateBenchmarkWorld(f"Benchmark {size}", randomWorldPositions(size, maxDist, neighborsPerTerritory))
+
+        start = time.perf_counter()
+        world.calculateAllNeighbors(rules)
+        elapsed = time.perf_counter() - start
+
+        results[size] = {
+            "Grid (s)": round(elapsed, 4),
+            "Edges": sum(len(t.edges) for t in world.territories) // 2
+        }
+
+        if (size <= bruteForceLimit):
+            edges = dict()
+
+            start = time.perf_counter()
+            for t0 in world.territories:
+                for t1 in world.territories:
+                    if (t0.id != t1.id and t0.dist(t1) <= maxDist): edges.setdefault(t0.id, dict())[t1.id] = round(t0.dist(t1), 2)
+
+            results[size]["Every Pair (s)"] = round(time.perf_counter() - start, 4)
+
+            if (edges != {t.id: t.edges for t in world.territories if t.edges}):
+                raise LogicError(f"Grid neighbors differ from comparing every pair for {size} territories")
+
+    logInfo("Neighbor calculation benchmark", details = results)
+
+    return results
+
+def benchmarkVectorizedNeighbors(sizes = (1000, 5000, 20000), neighborsPerTerritory = 6, heuristicTargets = 8):
+    """
+    Time World.calculateAllNeighbors and World.distancesTo with and without numpy on the same random worlds, and check that both give the same results.
+    Territories alternate between two terrains, so that the rules also exercise matching details.
+
+    Args:
+        sizes (tuple): Numbers of territories to generate worlds with
+        neighborsPerTerritory (int): Average number of neighbors each territory should have
+        heuristicTargets (int): Number of territories to compute the distance from every territory to
+    """
+
+    if (spatial.numpy == None):
+        logInfo("numpy is not installed, skipping the vectorized neighbor benchmark")
+        return None
+
+    logInfo(f"Benchmarking vectorized neighbor calculation for worlds of {sizes} territories")
+
+    maxDist = 10
+    rules = [
+        {"t0": {"Terrain": "Plains"}, "t1": {"Terrain": "Plains"}, "maxDist": maxDist},
+        {"t0": {"Terrain": "Plains"}, "t1": {"Terrain": "Hills"}, "maxDist": maxDist / 2}
+    ]
+
+    results = dict()
+
+    for size in sizes:
+
+        positions = randomWorldPositions(size, maxDist, neighborsPerTerritory)
+        targets = sample(range(size), min(heuristicTargets, size))
+
+        worlds = dict()
+        timings = dict()
+
+        for useNumpy in (True, False):
+
+            world = generateBenchmarkWorld(f"Benchmark {size}", positions, lambda i: "Plains" if i % 2 else "Hills")
+
+            numpy = spatial.numpy
+            if not (useNumpy): spatial.numpy = None
+
+            try:
+                start = time.perf_counter()
+                world.calculateAllNeighbors(rules)
+                neighborTime = time.perf_counter() - start
+
+                start = time.perf_counter()
+                distances = world.distancesTo(targets)
+                distanceTime = time.perf_counter() - start
+
+            finally: spatial.numpy = numpy
+
+            worlds[useNumpy] = (world, distances)
+            timings["numpy" if useNumpy else "Pure Python"] = {"Neighbors (s)": round(neighborTime, 4), "Distances (s)": round(distanceTime, 4)}
+
+        (vectorized, vectorizedDistances), (pure, pureDistances) = worlds[True], worlds[False]
+
+        if ([t.edges for t in vectorized.territories] != [t.edges for t in pure.territories]):
+            raise LogicError(f"Vectorized neighbors differ from the pure Python ones for {size} territories")
+
+        if any(abs(a - b) > 1e-9 for row, pureRow in zip(vectorizedDistances, pureDistances) for a, b in zip(row, pureRow)):
+            raise LogicError(f"Vectorized distances differ from the pure Python ones for {size} territories")
+
+        results[size] = timings
+        results[size]["Edges"] = sum(len(t.edges) for t in vectorized.territories) // 2
+
+    logInfo("Vectorized neighbor calculation benchmark", details = results)
+
+    return results
+
+def benchmarkPathfinding(sides = (50, 100, 200), paths = 20, blockedFraction = 0.2):
+    """
+    Time World.path_to between random territories of square grid worlds, in which some territories have no edges so that paths have to go around them.
+    Each path's length is checked against Dijkstra's algorithm, landmarks.shortestDistances.
+
+    Args:
+        sides (tuple): Number of territories along each side of the grid worlds
+        paths (int): Number of paths to find on each world
+        blockedFraction (float): Fraction of territories which can't be passed through
+    """
+
+    logInfo(f"Benchmarking pathfinding on grid worlds of sides {sides}")
+
+    results = dict()
+
+    for side in sides:
+
+        world = generateBenchmarkWorld(f"Benchmark {side}x{side}", gridWorldPositions(side), lambda i: "Plains" if random() >= blockedFraction else "Mountains")
+
+        world.calculateAllNeighbors([{"t0": {"Terrain": "Plains"}, "t1": {"Terrain": "Plains"}, "maxDist": 15}])
+
+        passable = [t.id for t in world.territories if t.edges]
+
+        elapsed = 0
+        found = 0
+
+        for i in range(paths):
+            start, target = sample(passable, 2)
+
+            startTime = time.perf_counter()
+            path = world.path_to(start, target)
+            elapsed += time.perf_counter() - startTime
+
+            expected = landmarks.shortestDistances(world, start)[target]
+
+            if not (path):
+                if (expected != float("inf")): raise LogicError(f"No path found from {start} to {target}, but one exists")
+                continue
+
+            if (abs(path[-1]["This Distance"] - expected) > 1e-6):
+                raise LogicError(f"Path from {start} to {target} is {path[-1]['This Distance']} long, but the shortest is {expected}")
+
+            found += 1
+
+        results[f"{side}x{side}"] = {
+            "Territories": len(world.territories),
+            "Paths Found": found,
+            "Mean per Path (s)": round(elapsed / paths, 5)
+        }
+
+    logInfo("Pathfinding benchmark", details = results)
+
+    return results
+
+def benchmarkLandmarkPathfinding(side = 150, walls = 6, paths = 20, landmarkCount = 8):
+    """
+    Time World.path_to with and without landmarks on a grid world split by walls with a single gap each, at alternating ends,
+    so that paths between the two sides of a wall have to go far out of their way. Both must find paths of the same length.
+
+    Args:
+        side (int): Number of territories along each side of the grid world
+        walls (int): Number of walls across the world
+        paths (int): Number of paths to find
+        landmarkCount (int): Number of landmarks to pick
+    """
+
+    logInfo(f"Benchmarking landmark pathfinding on a {side}x{side} world with {walls} walls")
+
+    spacing = side // (walls + 1)
+    wallRows = {spacing * (i + 1): i for i in range(walls)}
+
+    def terrain(i):
+        x, y = i % side, i // side
+
+        #Each wall is open at one end, alternating between the left and the right
+        isWall = y in wallRows and x != (0 if wallRows[y] % 2 else side - 1)
+        return "Mountains" if isWall else "Plains"
+
+    world = generateBenchmarkWorld(f"Benchmark Walls {side}x{side}", gridWorldPositions(side), terrain)
+
+    world.calculateAllNeighbors([{"t0": {"Terrain": "Plains"}, "t1": {"Terrain": "Plains"}, "maxDist": 15}])
+
+    passable = [t.id for t in world.territories if t.edges]
+    pairs = [sample(passable, 2) for i in range(paths)]
+
+    start = time.perf_counter()
+    worldLandmarks = landmarks.compute(world, landmarkCount)
+    preprocessTime = time.perf_counter() - start
+
+    results = {"Territories": len(world.territories), "Preprocessing (s)": round(preprocessTime, 4)}
+    lengths = dict()
+
+    for useLandmarks in (False, True):
+
+        world.setLandmarks(worldLandmarks if useLandmarks else None)
+
+        start = time.perf_counter()
+        lengths[useLandmarks] = [(world.path_to(t0, t1) or [{"This Distance": None}])[-1]["This Distance"] for t0, t1 in pairs]
+        results["Landmarks (s)" if useLandmarks else "Straight Line (s)"] = round((time.perf_counter() - start) / paths, 5)
+
+    world.setLandmarks(None)
+
+    for straightLine, landmark in zip(lengths[False], lengths[True]):
+        if (straightLine != landmark) and (None in (straightLine, landmark) or abs(straightLine - landmark) > 1e-6):
+            raise LogicError(f"Path found with landmarks is {landmark} long, but without them it is {straightLine}")
+
+    logInfo("Landmark pathfinding benchmark", details = results)
+
+    return results
@@ -6,6 +6,9 @@ import importlib
 #Packages
 from dotenv import load_dotenv
 
+#Modules read some of their settings from the environment when they are imported
+load_dotenv()
+
 import discord
 from discord.ext import commands
 
@@ -13,8 +16,10 @@ from discord.ext import commands
 from common import *
 from database import *
 from logger import *
+import migrations, querystats
 
 #For NationsBot
+from GameUtils import savecontainer, writebehind
 from DiscordUtils import helputils
 from Testing import tests
 
@@ -23,6 +28,7 @@ from Testing import tests
 options = {
     "debug": False,
     "test bot": False,
+    "migrate": False,
     "abort": False
 }
 
@@ -67,18 +73,45 @@ async def on_ready():
     """ Detects when the bot has been fully loaded and is online """
     logInfo("Bot ready!")
 
+    querystats.startSummaries()
+
     if (options["test bot"]):
         await test_bot(nationsbot.get_channel(int(os.getenv('TEST_CHANNEL_ID'))))
 
+@nationsbot.before_invoke
+async def start_query_stats(ctx):
+    """Tag the database statements a command runs with its name, and collect the nations it accesses until it saves them"""
+
+    ctx.querystats_token = querystats.startCommand(ctx.command.qualified_name)
+    savecontainer.trackCommandAccesses()
+
+@nationsbot.after_invoke
+async def finish_query_stats(ctx):
+
+    token = getattr(ctx, "querystats_token", None)
+    if (token): querystats.finishCommand(token)
+
 @nationsbot.command()
 async def ping(ctx):
     await ctx.send(f"Pong!\nLatency: **{round(nationsbot.latency * 1000)}ms**")
 
 async def setup():
 
+    load_dotenv()
+    if os.getenv('LOG_LEVEL'): setLogLevel(os.getenv('LOG_LEVEL'))
+
     logInitial("Initializing Bot")
     
     global options
+
+    if options["migrate"]:
+        logInfo("Applying database schema migrations")
+
+        try: migrations.migrate()
+        except Exception as e:
+            logError(e)
+            options["abort"] = True
+            return
     
     #Non-bot related setup
     if options["debug"]: 
@@ -122,6 +155,9 @@ def main():
     
     nationsbot.run(token)
 
+    #Write any saves that were still waiting when the bot was closed
+    writebehind.flush()
+
 if __name__ == "__main__":
     
     #If command line args, generate data for flags dict
@@ -136,6 +172,9 @@ if __name__ == "__main__":
 
             if 't' in arg:
                 options["test bot"] = True
+
+            if 'm' in arg:
+                options["migrate"] = True
     
     asyncio.run(setup())
 
@@ -5,6 +5,8 @@ import os
 pwdir = f"{os.path.dirname(__file__)}/.."
 
 masterlog = f"{pwdir}/Logs/nationsbot.log"
+masterlogIndex = f"{pwdir}/Logs/nationsbot.index"
+logSegmentsDir = f"{pwdir}/Logs/Segments"
 
 savesDir = f"{pwdir}/Savegames"
 worldsDir = f"{pwdir}/Worlds"
@@ -12,4 +14,6 @@ gameruleDir = f"{pwdir}/Gamerule"
 
 cogsDir = f"{pwdir}/NationsBot/Cogs"
 
+migrationsDir = f"{pwdir}/Database/migrations"
+
 fontsDir = f"{pwdir}/Assets/Fonts"
\ No newline at end of file
@@ -1,7 +1,34 @@
-import mysql.connector as mariadb, sys, os
+import sys, os, queue, threading, time, asyncio, contextvars, functools, re, sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from dotenv import load_dotenv
 
-mariadb_connection = None
+from logger import *
+import querystats
+
+#Only needed by the mysql backend, so that the sqlite backend can run without it
+try: import mysql.connector as mariadb
+except ImportError: mariadb = None
+
+#Connections that have been idle for longer than this are checked before being handed out again
+healthCheckSeconds = 30
+
+connectionPool = None
+connectionPoolLock = threading.Lock()
+
+#Which database the bot uses, from DB_BACKEND in .env: "mysql" for a MariaDB or MySQL server, or "sqlite" for an embedded database in DB_SQLITE_PATH
+backends = ("mysql", "sqlite")
+backend = None
+
+#SQLite database used when DB_SQLITE_PATH isn't set. It is shared by every connection from the pool, and lost when the bot stops.
+sqliteMemoryPath = ":memory:"
+
+#Number of statements executed and transactions committed, across every connection. Tests compare these before and after a call to count its round trips.
+statementCounts = {"Statements": 0, "Commits": 0}
+statementCountsLock = threading.Lock()
+
+#Threads that run database calls for async code, so that queries never block the event loop
+dbExecutor = None
 
 def fetch_assoc(cursor):
     row = cursor.fetchone()
@@ -13,8 +40,74 @@ def fetch_assoc_all(cursor):
     if not rows: return False
     return [dict(zip(cursor.column_names, row)) for row in rows]
 
+def insert_orGetId(cursor, table, row, keyColumn, updateColumns = ()):
+        """
+        Insert a row unless there already is one with the same value in the unique column keyColumn.
+
+        Args:
+            row (dict): Column names mapped to values
+            updateColumns (list): Columns of an existing row to overwrite with the new row's values
+
+        Returns:
+            (int): id of the row that was inserted, or of the row that was already there
+        """
+
+        columns = ", ".join(row.keys())
+        placeholders = ", ".join(["%s"] * len(row))
+
+        if (dialect() == "sqlite"):
+                updates = ", ".join(f"{column}=excluded.{column}" for column in [keyColumn, *updateColumns])
+                cursor.execute(f"INSERT INTO {table} ({columns}) VALUES ({placeholders}) ON CONFLICT({keyColumn}) DO UPDATE SET {updates} RETURNING id", list(row.values()))
+                return cursor.fetchone()[0]
+
+        #LAST_INSERT_ID(id) makes lastrowid the id of the existing row when there already is one
+        updates = ", ".join(["id=LAST_INSERT_ID(id)", *(f"{column}=VALUES({column})" for column in updateColumns)])
+        cursor.execute(f"INSERT INTO {table} ({columns}) VALUES ({placeholders}) ON DUPLICATE KEY UPDATE {updates}", list(row.values()))
+        return cursor.lastrowid
+
+def upsert(cursor, table, row, keyColumns, updateColumns):
+        """
+        Insert a row, or if there already is one with the same unique keyColumns, overwrite its updateColumns with the new row's values.
+
+        Args:
+            row (dict): Column names mapped to values
+        """
+
+        columns = ", ".join(row.keys())
+        placeholders = ", ".join(["%s"] * len(row))
+
+        if (dialect() == "sqlite"):
+                updates = ", ".join(f"{column}=excluded.{column}" for column in updateColumns)
+                cursor.execute(f"INSERT INTO {table} ({columns}) VALUES ({placeholders}) ON CONFLICT({', '.join(keyColumns)}) DO UPDATE SET {updates}", list(row.values()))
+
+        else:
+                updates = ", ".join(f"{column}=VALUES({column})" for column in updateColumns)
+                cursor.execute(f"INSERT INTO {table} ({columns}) VALUES ({placeholders}) ON DUPLICATE KEY UPDATE {updates}", list(row.values()))
+
+def dialect():
+        """Get the name of the database backend in use, which decides the SQL dialect of statements that differ between backends"""
+
+        global backend
+
+        if not (backend):
+                load_dotenv()
+                name = (os.getenv('DB_BACKEND') or "mysql").lower()
+
+                if (name not in backends):
+                        raise ValueError(f"Unknown DB_BACKEND \"{name}\", must be one of {', '.join(backends)}")
+
+                backend = name
+
+        return backend
+
+def sqlitePath():
+
+        load_dotenv()
+        return os.getenv('DB_SQLITE_PATH') or sqliteMemoryPath
+
 def create_connection():
-        global mariadb_connection
+
+        if (dialect() == "sqlite"): return create_sqliteConnection()
 
         load_dotenv()
         db_user = os.getenv('DB_USER')
@@ -24,23 +117,341 @@ def create_connection():
         db_name = os.getenv('DB_DATABASE')
 
         try:
-                connection = mariadb.connect(user=db_user, password=db_pass, host=db_host, port=db_port, database=db_name)
-                mariadb_connection = connection
-                return connection
+                return mariadb.connect(user=db_user, password=db_pass, host=db_host, port=db_port, database=db_name)
 
         except mariadb.Error as e:
                 print(f"Error connecting to MariaDB Platform: {e}")
+                raise
+
+
+def create_sqliteConnection():
+
+        path = sqlitePath()
+
+        #A plain :memory: database would be private to each connection
+        if (path == sqliteMemoryPath):
+                connection = sqlite3.connect("file:nationsbot?mode=memory&cache=shared", uri = True, check_same_thread = False)
+        else:
+                connection = sqlite3.connect(path, timeout = 10, check_same_thread = False)
+                connection.execute("PRAGMA journal_mode=WAL")
+
+        connection.execute("PRAGMA foreign_keys=ON")
+
+        return SQLiteConnection(connection)
+
+@functools.lru_cache(maxsize = 1024)
+def toSqlite(stmt):
+        """Translate a statement's mysql-connector style %s placeholders into sqlite3's ? placeholders"""
+
+        return re.sub(r"%([s%])", lambda match: "?" if match.group(1) == "s" else "%", stmt)
+
+
+class SQLiteCursor:
+        """
+        An sqlite3 cursor with the parts of mysql-connector's cursor interface that the bot uses, so queries can be written once for both backends.
+        """
+
+        def __init__(self, cursor):
+                self.cursor = cursor
+
+        def execute(self, stmt, params = ()):
+                return self.cursor.execute(toSqlite(stmt), params)
+
+        def executemany(self, stmt, params):
+                return self.cursor.executemany(toSqlite(stmt), params)
+
+        @property
+        def column_names(self):
+                return tuple(column[0] for column in self.cursor.description or ())
+
+        def __getattr__(self, name):
+                return getattr(self.cursor, name)
+
+        def __iter__(self):
+                return iter(self.cursor)
+
+
+class SQLiteConnection:
+        """
+        An sqlite3 connection with the parts of mysql-connector's connection interface that the bot uses.
+        """
+
+        def __init__(self, connection):
+                self.connection = connection
+
+        def cursor(self, *args, **kwargs):
+                #Every sqlite3 cursor is effectively buffered, so mysql-connector's cursor options don't apply
+                return SQLiteCursor(self.connection.cursor())
+
+        def is_connected(self):
+                return True
+
+        def reconnect(self, *args, **kwargs):
+                pass
+
+        def consume_results(self):
+                pass
+
+        def __getattr__(self, name):
+                return getattr(self.connection, name)
+
+
+def countStatement(kind):
+
+    with statementCountsLock: statementCounts[kind] += 1
+
+def getStatementCounts():
+
+    with statementCountsLock: return dict(statementCounts)
+
+
+class PooledCursor:
+        """
+        A cursor opened on a PooledConnection. Behaves like the underlying cursor, but counts and times the statements it executes.
+        """
+
+        def __init__(self, cursor):
+                self.cursor = cursor
+
+        def execute(self, stmt, *args, **kwargs):
+                countStatement("Statements")
+
+                start = time.perf_counter()
+                try: return self.cursor.execute(stmt, *args, **kwargs)
+                finally: querystats.recordStatement(stmt, time.perf_counter() - start)
+
+        def executemany(self, stmt, *args, **kwargs):
+                countStatement("Statements")
+
+                start = time.perf_counter()
+                try: return self.cursor.executemany(stmt, *args, **kwargs)
+                finally: querystats.recordStatement(stmt, time.perf_counter() - start)
+
+        def __getattr__(self, name):
+                return getattr(self.cursor, name)
+
+        def __iter__(self):
+                return iter(self.cursor)
+
+
+class PooledConnection:
+        """
+        A database connection borrowed from the ConnectionPool. Behaves like the underlying connection, but keeps track of the cursors it opens so they can be cleaned up when it is returned.
+
+        Attributes:
+                connection: The mysql connection
+                cursors (list): Cursors opened since the connection was checked out
+                lastUsed (float): time.monotonic() when the connection was last returned to the pool
+        """
+
+        def __init__(self, connection):
+                self.connection = connection
+                self.cursors = []
+                self.lastUsed = time.monotonic()
+
+        def cursor(self, *args, **kwargs):
+                cursor = PooledCursor(self.connection.cursor(*args, **kwargs))
+                self.cursors.append(cursor)
+                return cursor
+
+        def commit(self):
+                countStatement("Commits")
+
+                start = time.perf_counter()
+                try: return self.connection.commit()
+                finally: querystats.recordStatement("COMMIT", time.perf_counter() - start)
+
+        def __getattr__(self, name):
+                return getattr(self.connection, name)
+
+        def cleanup(self):
+                """Close every cursor opened since checkout and roll back anything left uncommitted, so none of it carries over to the next borrower"""
+
+                for cursor in self.cursors:
+                        try: cursor.close()
+                        except Exception:
+                                #Unbuffered cursors can't be closed while they still have rows left to read
+                                try: self.connection.consume_results()
+                                except Exception: pass
+
+                self.cursors = []
+
+                try:
+                        if (self.connection.in_transaction): self.connection.rollback()
+                except Exception as e:
+                        logInfo(f"Could not roll back a pooled connection: {e}")
+
+                self.lastUsed = time.monotonic()
+
+
+class ConnectionPool:
+        """
+        A fixed size pool of database connections, so that commands from different servers can run their queries at the same time.
+        Connections are opened as they are first needed, up to size, after which a checkout waits up to timeout seconds for one to be returned.
+
+        Attributes:
+                size (int): Maximum number of open connections
+                timeout (float): Maximum number of seconds to wait for a connection
+                idle (LifoQueue): Connections that are not checked out. The most recently used connection is handed out first, so the rest can go stale without being used.
+        """
+
+        def __init__(self, size, timeout):
+                self.size = size
+                self.timeout = timeout
+
+                self.idle = queue.LifoQueue()
+                self.opened = 0
+                self.lock = threading.Lock()
+
+                self.checkouts = 0
+                self.totalWait = 0.0
+                self.maxWait = 0.0
+                self.exhausted = 0
+                self.timeouts = 0
+                self.reconnects = 0
+
+        def checkout(self):
+                """
+                Borrow a connection. Must be returned with checkin.
+
+                Raises:
+                        mysql.connector.errors.PoolError: If no connection became available within the timeout (TimeoutError if mysql-connector isn't installed)
+                """
+
+                start = time.monotonic()
+
+                try: connection = self.idle.get_nowait()
+                except queue.Empty: connection = self.open() or self.wait()
+
+                #A connection that has sat idle may have been closed by the server in the meantime
+                if (time.monotonic() - connection.lastUsed > healthCheckSeconds and not connection.connection.is_connected()):
+                        logInfo("Pooled database connection was lost, reconnecting")
+                        connection = self.reconnect(connection)
+
+                waited = time.monotonic() - start
+
+                with self.lock:
+                        self.checkouts += 1
+                        self.totalWait += waited
+                        self.maxWait = max(self.maxWait, waited)
+
+                return connection
+
+        def open(self):
+                """Open a new connection if the pool isn't full yet, or return None if it is"""
+
+                with self.lock:
+                        if (self.opened >= self.size): return None
+                        self.opened += 1
+
+                try: return PooledConnection(create_connection())
+                except Exception:
+                        with self.lock: self.opened -= 1
+                        raise
+
+        def reconnect(self, connection):
+                """
+                Reconnect a connection that was lost. If it can't be, it is closed and its slot is used to open a new one instead, so the pool doesn't shrink.
+
+                Returns:
+                        (PooledConnection): The reconnected connection, or the new one
+                """
+
+                try:
+                        connection.connection.reconnect(attempts = 3, delay = 1)
+                        with self.lock: self.reconnects += 1
+                        return connection
+
+                except Exception as e:
+                        try: connection.connection.close()
+                        except Exception: pass
+
+                        with self.lock: self.opened -= 1
+
+                        logInfo("Pooled database connection could not be reconnected, opening a new one", details = {"Error": str(e)})
+
+                        newConnection = self.open()
+                        if not (newConnection): raise
+
+                        with self.lock: self.reconnects += 1
+                        return newConnection
+
+        def wait(self):
+                """Wait for another checkout to return its connection"""
+
+                with self.lock: self.exhausted += 1
+                logInfo(f"All {self.size} database connections are in use, waiting for one")
+
+                try: return self.idle.get(timeout = self.timeout)
+                except queue.Empty:
+                        with self.lock: self.timeouts += 1
+                        raise (mariadb.errors.PoolError if mariadb else TimeoutError)(f"No database connection became available within {self.timeout} seconds")
+
+        def checkin(self, connection):
+
+                connection.cleanup()
+                self.idle.put(connection)
+
+        def stats(self):
+
+                with self.lock:
+                        return {
+                                "Size": self.size,
+                                "Open": self.opened,
+                                "Idle": self.idle.qsize(),
+                                "Checkouts": self.checkouts,
+                                "Average Wait (ms)": round(1000 * self.totalWait / self.checkouts, 3) if self.checkouts else None,
+                                "Max Wait (ms)": round(1000 * self.maxWait, 3),
+                                "Times Exhausted": self.exhausted,
+                                "Timeouts": self.timeouts,
+                                "Reconnects": self.reconnects
+                        }
+
+
+def getpool():
+        """Get the connection pool, creating it from DB_POOL_SIZE and DB_POOL_TIMEOUT in .env the first time"""
+
+        global connectionPool
+
+        with connectionPoolLock:
+                if not connectionPool:
+                        load_dotenv()
+                        size = int(os.getenv('DB_POOL_SIZE') or 5)
+
+                        #Connections to a shared in-memory database lock each other out instead of waiting, so they take turns
+                        if (dialect() == "sqlite" and sqlitePath() == sqliteMemoryPath): size = 1
+
+                        connectionPool = ConnectionPool(size, float(os.getenv('DB_POOL_TIMEOUT') or 10))
+
+        return connectionPool
+
+@contextmanager
+def dbconnection():
+        """
+        Borrow a database connection from the pool for the duration of a with block. Any cursors opened on it are closed, and anything not committed is rolled back, when the block ends.
+        """
+
+        pool = getpool()
+        connection = pool.checkout()
+
+        try: yield connection
+        finally: pool.checkin(connection)
 
-        return False
+async def dbcall(func, *args, **kwargs):
+        """
+        Run a synchronous function that uses the database, such as one of the gamehandling dbget_ functions, in a worker thread and wait for its result without blocking the event loop.
+        The function runs with a copy of the caller's context variables.
+        """
 
-def getdb():
-        global mariadb_connection
+        global dbExecutor
 
-        if not mariadb_connection:
-                return create_connection()
+        #One thread per pooled connection, so calls never wait on each other for a connection
+        poolSize = getpool().size
 
-        if not mariadb_connection.is_connected():
-                return create_connection()
+        with connectionPoolLock:
+                if not dbExecutor:
+                        dbExecutor = ThreadPoolExecutor(max_workers = poolSize, thread_name_prefix = "dbcall")
 
-        return mariadb_connection
+        context = contextvars.copy_context()
 
+        return await asyncio.get_running_loop().run_in_executor(dbExecutor, functools.partial(context.run, func, *args, **kwargs))
@@ -1,56 +1,291 @@
-import json, datetime, pprint, traceback, inspect
+import json, datetime, pprint, traceback, sys, os, queue, threading, atexit, time, gzip, shutil
 
 from common import *
 
 debugmodeOn = False
-    
-def log(level, message, details = None, stackLevel = 0):
+
+#Numeric severity of each log level. Records below minLogLevel are dropped before any other work is done.
+loglevels = {
+    "DEBUG": 10,
+    "INFO": 20,
+    "START": 20,
+    "WARNING": 30,
+    "ERROR": 40
+}
+
+minLogLevel = loglevels["INFO"]
+
+#Number of times each sampled call site has been reached, keyed by (filename, line number)
+sampleCounts = dict()
+
+#Formatted records waiting to be appended to the masterlog by the log writer thread.
+#Records that should be findable later are queued as (record, indexEntry) tuples.
+logQueue = queue.SimpleQueue()
+
+#Maximum number of records written to the masterlog with a single write call
+logBatchSize = 512
+
+#The masterlog is compressed into a new segment once it is this large or this old
+logRotateBytes = 8 * 1024 * 1024
+logRotateSeconds = 24 * 60 * 60
+
+logWriter = None
+logWriterLock = threading.Lock()
+
+
+def logSegmentPath(segment):
+    """Path of a compressed masterlog segment"""
+
+    return f"{logSegmentsDir}/nationsbot.{segment}.log.gz"
+
+def latestLogSegment():
+    """Get the number of the newest compressed segment, or 0 if the masterlog has never been rotated"""
+
+    if not (os.path.isdir(logSegmentsDir)): return 0
+
+    segments = [filename.split('.')[1] for filename in os.listdir(logSegmentsDir) if filename.startswith("nationsbot.") and filename.endswith(".log.gz")]
+
+    return max([int(segment) for segment in segments if segment.isdigit()], default = 0)
+
+
+class LogWriter(threading.Thread):
+    """
+    Background thread that drains logQueue and appends its records to the masterlog in batches, so that callers never wait on file syscalls.
+    Once the masterlog grows past logRotateBytes or logRotateSeconds it is gzipped into a numbered segment under logSegmentsDir.
+    The position of every indexed record is appended to the masterlogIndex so it can be found without scanning old segments.
+
+    Attributes:
+        logfile (str): Path of the file that records are appended to
+        segment (int): The number the masterlog will have as a segment once it is rotated
+    """
+
+    def __init__(self, logfile):
+        super().__init__(name = "LogWriter", daemon = True)
+        self.logfile = logfile
+        self.segment = latestLogSegment() + 1
+
+    def run(self):
+
+        os.makedirs(os.path.dirname(self.logfile), exist_ok = True)
+
+        f = open(self.logfile, 'ab')
+        segmentStarted = time.time()
+
+        while True:
+
+            #Block until there is at least one record, then take whatever else is already waiting
+            batch = [logQueue.get()]
+
+            while len(batch) < logBatchSize:
+                try: batch.append(logQueue.get_nowait())
+                except queue.Empty: break
+
+            try:
+                chunks = []
+                indexEntries = []
+                offset = f.tell()
+
+                for record in batch:
+
+                    if isinstance(record, threading.Event): continue
+
+                    if isinstance(record, tuple):
+                        record, indexEntry = record
+                        indexEntries.append(dict(indexEntry, segment = self.segment, offset = offset))
+
+                    record = record.encode()
+                    chunks.append(record)
+                    offset += len(record)
+
+                f.write(b''.join(chunks))
+                f.flush()
+
+                if (indexEntries):
+                    with open(masterlogIndex, 'a') as index:
+                        index.write(''.join(json.dumps(entry) + "\n" for entry in indexEntries))
+
+                if ((offset >= logRotateBytes) or (time.time() - segmentStarted >= logRotateSeconds and offset > 0)):
+                    f.close()
+                    self.rotate()
+                    f = open(self.logfile, 'ab')
+                    segmentStarted = time.time()
+
+            except Exception as e:
+                print(f"LogWriter could not write to {self.logfile}: {e}", file = sys.stderr)
+
+            for record in batch:
+                if isinstance(record, threading.Event): record.set()
+
+    def rotate(self):
+        """Compress the masterlog into the next segment and start a new, empty masterlog"""
+
+        os.makedirs(logSegmentsDir, exist_ok = True)
+
+        with open(self.logfile, 'rb') as current, gzip.open(logSegmentPath(self.segment), 'wb') as compressed:
+            shutil.copyfileobj(current, compressed)
+
+        open(self.logfile, 'wb').close()
+
+        self.segment += 1
+
+
+def startLogWriter():
+    """Start the log writer thread if it is not already running"""
+
+    global logWriter
+
+    with logWriterLock:
+        if (logWriter and logWriter.is_alive()): return
+
+        logWriter = LogWriter(masterlog)
+        logWriter.start()
+
+def flushLogs(timeout = 5):
+    """
+    Block until every record queued before this call has been written to the masterlog.
+
+    Args:
+        timeout (float): Maximum number of seconds to wait for the log writer
+    """
+
+    if not (logWriter and logWriter.is_alive()): return
+
+    flushed = threading.Event()
+    logQueue.put(flushed)
+    flushed.wait(timeout)
+
+atexit.register(flushLogs)
+
+
+def setLogLevel(level):
+    """
+    Change which log levels are written at runtime.
+
+    Args:
+        level (str): The name of the lowest level that should be logged, i.e. DEBUG, INFO, WARNING or ERROR
+    """
+
+    global minLogLevel
+
+    level = str(level).upper()
+
+    if (level not in loglevels):
+        raise ValueError(f"Unknown log level {level}, must be one of: {', '.join(loglevels.keys())}")
+
+    minLogLevel = loglevels[level]
+    sampleCounts.clear()
+
+    return level
+
+def getLogLevel():
+    """Get the name of the lowest level that is currently logged"""
+
+    return next(name for name, value in loglevels.items() if value == minLogLevel)
+
+def isLogLevelEnabled(level):
+    """Returns True if records of this level would be written"""
+
+    return loglevels.get(level, loglevels["INFO"]) >= minLogLevel
+
+def getCallerInfo(stackLevel):
+    """
+    Describe the function stackLevel frames above the caller of this function.
+
+    Returns:
+        (tuple): ("<module>.<function>() Line <lineno>", (filename, lineno)), the second value identifying the call site
+    """
+
+    try: frame = sys._getframe(stackLevel + 1)
+    except ValueError: return "unknown", None
+
+    filename = frame.f_code.co_filename
+    return f"{filename.split('/')[-1].split('.')[0]}.{frame.f_code.co_name}() Line {frame.f_lineno}", (filename, frame.f_lineno)
+
+def log(level, message, details = None, stackLevel = 0, sampleEvery = 1, indexed = False, server = None):
     """
-    Prints log information to the console and writes it to a log file.
-    
+    Prints log information to the console and queues it to be written to the log file as one line of JSON.
+
     Args:
         level (string): Descriptor of the log level. Might be DEBUG, WARNING, ERROR etc.
-        details (dict): information like traceback, context etc.
+        message (str or function): The message, or a function returning it. Functions are only called if the level is enabled.
+        details (dict or function): information like traceback, context etc. Functions are only called if the level is enabled.
         stackLevel(int): Log the name of the function this far up the stack from the function that's logging
+        sampleEvery(int): Only log the first of every this many records coming from the same line of code
+        indexed(bool): Add this record's time and position to the masterlogIndex so that it can be found with getLogContext
+        server(int): The server this record relates to, stored in the masterlogIndex for indexed records
+
+    Returns:
+        (datetime): The time recorded for this log, or None if nothing was logged
     """
-    
+
+    if not (isLogLevelEnabled(level)): return None
+
     #Should refer to the function 1 level up the stack which called log
     stackLevel += 1
 
+    # = "<Function> Line <Lineno>"
+    callerFunctionInfo, callSite = getCallerInfo(stackLevel)
+
+    if (sampleEvery > 1):
+        sampleCounts[callSite] = sampleCounts.get(callSite, 0) + 1
+        if ((sampleCounts[callSite] - 1) % sampleEvery): return None
+
     logtime = datetime.datetime.now()
 
-    # = "<Function> Line <Lineno>"
-    callerFunctionInfo = f"{inspect.stack()[stackLevel].filename.split('/')[-1].split('.')[0]}.{inspect.stack()[stackLevel].function}() Line {inspect.stack()[stackLevel].lineno}"
-    
+    if callable(message): message = message()
+    if callable(details): details = details()
+
     #Print info
     print(f"{level}: [{logtime} {callerFunctionInfo}] {message}")
     if (details): pprint.pprint(details)
-    
-    #Write to file
-    with open(masterlog, 'a') as log:
 
-        if (details == None):
-            log.write(f"{level}: [{logtime} {callerFunctionInfo}] {message}\n\n")
-        
-        elif (type(details is dict)):
-            log.write(f"{level}: [{logtime} {callerFunctionInfo}] {message}\n[{logtime}] Additional Info: {json.dumps(details, indent=4)}\n")
-            
-        else:
-            log.write(f"{level}: [{logtime} {callerFunctionInfo}] {message}\n[{logtime}] Additional Info: {details}\n")
+    #Queue for the log writer
+    record = {
+        "time": str(logtime),
+        "level": level,
+        "caller": callerFunctionInfo,
+        "message": message
+    }
+
+    if (details != None): record["details"] = details
+    if (sampleEvery > 1): record["sampled"] = sampleEvery
+
+    record = json.dumps(record, default=str) + "\n"
+
+    startLogWriter()
+
+    if (indexed): logQueue.put((record, {"time": str(logtime), "server": server}))
+    else: logQueue.put(record)
+
+    return logtime
 
 
 def logInitial(message):
     """Begin logging"""
-    
-    with open(masterlog, 'a') as logfile: logfile.write("\n\n")
-        
+
     log("START", message)
 
-    
+
+def logDebug(message, details = None, stackLevel = 0, sampleEvery = 1):
+    """
+    Logs verbose information that is only useful while debugging. Pass functions for message and details at hot call sites so that nothing is formatted unless DEBUG is enabled.
+
+    Args:
+        details(dict): Additional data about the log or the message
+        stackLevel(int): Log the name of the function this far up the stack from the function that's logging
+        sampleEvery(int): Only log the first of every this many records coming from the same line of code
+    """
+
+    #Should refer to the function 1 level up the stack which called logDebug
+    stackLevel += 1
+
+    log("DEBUG", message, details, stackLevel, sampleEvery)
+
+
 def logInfo(message, details = None, stackLevel = 0):
     """
     Logs an error by writing the error's name, traceback and other details to the master log
-    
+
     Args:
         details(dict): Additional data about the log or the message
         stackLevel(int): Log the name of the function this far up the stack from the function that's logging
@@ -58,25 +293,25 @@ def logInfo(message, details = None, stackLevel = 0):
 
     #Should refer to the function 1 level up the stack which called logInfo
     stackLevel += 1
-    
+
     #Log the message and user-provided details
     log("INFO", message, details, stackLevel)
-    
+
     #Add further information to the errorData and return
-    
+
     logtime = {
         "message": message,
         "details": details,
         "time": str(datetime.datetime.now())
     }
-            
+
     return logtime
-    
-    
+
+
 def logError(error, errorInfo = None, stackLevel = 0):
     """
     Logs an error by writing the error's name, traceback and other details to the master log
-    
+
     Args:
         error (Exception): The exception object itself
         errorInfo (dict): Additional metadata about the error
@@ -85,18 +320,103 @@ def logError(error, errorInfo = None, stackLevel = 0):
 
     #Should refer to the function 1 level up the stack which called logError
     stackLevel += 1
-    
+
     #Log the error, stack trace and context details
-    
+
     errorData = { "Stack Trace": traceback.format_exception(type(error), error, error.__traceback__) }
     if (errorInfo): errorData["Context"] = errorInfo
-    
-    log("ERROR", str(error), errorData, stackLevel)
-    
+
+    server = errorInfo.get("Server") if isinstance(errorInfo, dict) else None
+
+    logtime = log("ERROR", str(error), errorData, stackLevel, indexed = True, server = server)
+
     #Add further information to the errorData and return
-    
-    errorTime = str(datetime.datetime.now())
+
+    errorTime = str(logtime or datetime.datetime.now())
     errorData["Error Time"] = errorTime
     errorData["Exception"] = str(error)
-            
-    return errorData
\ No newline at end of file
+
+    return errorData
+
+
+def readIndexEntry(index):
+    """Read the next entry of the masterlogIndex from the current position, skipping blank lines, or return None at the end of the file"""
+
+    for line in index:
+        if (line.strip()): return json.loads(line)
+
+    return None
+
+def findIndexEntry(logtime, server = None):
+    """
+    Binary search the masterlogIndex for a record logged at logtime, without reading the whole index.
+    Entries are written in the order they were logged, so they are already sorted by time.
+
+    Returns:
+        (dict): The first entry at logtime (for server, if given), or None if there is none
+    """
+
+    with open(masterlogIndex, 'rb') as index:
+
+        #Find the first position from which the next entry was logged at or after logtime
+        low, high = 0, os.fstat(index.fileno()).st_size
+
+        while (low < high):
+            middle = (low + high) // 2
+
+            #Move to the start of the first line at or after middle
+            index.seek(middle - 1 if middle else 0)
+            if (middle): index.readline()
+
+            entry = readIndexEntry(index)
+
+            if (entry == None or entry["time"] >= logtime): high = middle
+            else: low = middle + 1
+
+        index.seek(low - 1 if low else 0)
+        if (low): index.readline()
+
+        #Several records may have been logged at the same time, for different servers
+        while True:
+            entry = readIndexEntry(index)
+            if (entry == None or entry["time"] != logtime): return None
+            if (server == None or entry["server"] == server): return entry
+
+def getLogContext(logtime, server = None, before = 4096, after = 20):
+    """
+    Find an indexed record, such as an error, by the time it was logged and return the surrounding part of the log.
+
+    Args:
+        logtime (str): The time of the record, as given in the "Error Time" shown to users
+        server (int): If given, only match records logged for this server
+        before (int): Number of bytes of the log preceding the record to include
+        after (int): Number of records following the record to include
+
+    Returns:
+        (str): The lines of the log around the record, or False if no record was indexed at that time
+    """
+
+    flushLogs()
+
+    if not (os.path.isfile(masterlogIndex)): return False
+
+    entry = findIndexEntry(str(logtime).strip(), server)
+    if not (entry): return False
+
+    start = max(0, entry["offset"] - before)
+
+    #The segment may still be the active masterlog if it has not been rotated yet
+    if (os.path.isfile(logSegmentPath(entry["segment"]))):
+        segment = gzip.open(logSegmentPath(entry["segment"]), 'rb')
+    else:
+        segment = open(masterlog, 'rb')
+
+    with segment:
+        segment.seek(start)
+        preceding = segment.read(entry["offset"] - start).decode(errors = "replace").split("\n")
+        following = [segment.readline().decode(errors = "replace") for i in range(after + 1)]
+
+    #The first preceding line is probably cut off partway through
+    if (start > 0): preceding = preceding[1:]
+
+    return '\n'.join(line for line in preceding if line) + '\n' + ''.join(following)
@@ -0,0 +1,146 @@
+import os, re, hashlib
+
+from common import *
+from database import *
+from logger import *
+
+#Migration files are named <version>_<description>.sql and applied in order of version.
+#A migration whose SQL differs between backends can have a <version>_<description>.<backend>.sql file, which is used instead on that backend.
+migrationFileName = re.compile(r"^(\d+)_(\w+?)(?:\.(\w+))?\.sql$")
+
+
+class Migration:
+    """
+    Attributes:
+        version (int): Position of the migration in the order they are applied
+        name (str): Description of the migration, from its file name
+        path (str): The migration's .sql file
+        backend (str): The database backend the file was written for, or None if it works on every backend
+        checksum (str): sha256 of the file, so that a migration edited after being applied can be noticed
+    """
+
+    def __init__(self, version, name, path, backend = None):
+        self.version = version
+        self.name = name
+        self.path = path
+        self.backend = backend
+
+        with open(path, 'rb') as f:
+            self.checksum = hashlib.sha256(f.read()).hexdigest()
+
+    def statements(self):
+        """Split the migration into its statements, without comments"""
+
+        with open(self.path) as f:
+            sql = f.read()
+
+        sql = re.sub(r"/\*.*?\*/", "", sql, flags = re.DOTALL)
+        sql = re.sub(r"^\s*--.*$", "", sql, flags = re.MULTILINE)
+
+        return [statement.strip() for statement in sql.split(";") if statement.strip()]
+
+
+def get_migrations():
+    """
+    Returns:
+        (list): Every Migration in migrationsDir for the database backend in use, ordered by version
+    """
+
+    migrations = dict()
+
+    for fileName in os.listdir(migrationsDir):
+        match = migrationFileName.match(fileName)
+        if not (match): continue
+
+        version, name, fileBackend = int(match.group(1)), match.group(2), match.group(3)
+
+        if (fileBackend and fileBackend != dialect()): continue
+
+        existing = migrations.get(version)
+
+        if (existing and existing.name != name):
+            raise Exception(f"More than one migration has the version {version} in {migrationsDir}")
+
+        #The backend's own version of a migration replaces the general one
+        if (existing and existing.backend): continue
+
+        migrations[version] = Migration(version, name, f"{migrationsDir}/{fileName}", fileBackend)
+
+    return [migrations[version] for version in sorted(migrations)]
+
+def get_appliedMigrations(cursor):
+    """
+    Returns:
+        (dict): Versions of the migrations already applied to the database, mapped to their rows in SchemaMigrations
+    """
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS `SchemaMigrations` (
+            `version` INT UNSIGNED NOT NULL,
+            `name` VARCHAR(128) NOT NULL,
+            `checksum` CHAR(64) NOT NULL,
+            `applied` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (`version`)
+        )
+        """)
+
+    cursor.execute("SELECT * FROM SchemaMigrations ORDER BY version;")
+
+    return {row["version"]: row for row in (fetch_assoc_all(cursor) or [])}
+
+def applyStatements(cursor, statements):
+
+    for statement in statements:
+        logDebug(lambda: f"Executing migration statement: {statement}")
+        cursor.execute(statement)
+
+def migrate(target = None):
+    """
+    Apply every migration that hasn't been applied to the database yet, in order of version.
+    Each migration is recorded in SchemaMigrations as soon as it succeeds, so a failed run can be resumed where it stopped.
+
+    Args:
+        target (int): Stop after applying this version. If not given, every migration is applied.
+
+    Returns:
+        (list): Versions that were applied
+    """
+
+    logInfo("Checking database for schema migrations to apply")
+
+    migrations = get_migrations()
+    applied = []
+
+    with dbconnection() as db:
+        cursor = db.cursor(buffered=True)
+
+        appliedMigrations = get_appliedMigrations(cursor)
+        db.commit()
+
+        for migration in migrations:
+
+            if (target != None and migration.version > target): break
+
+            if (migration.version in appliedMigrations):
+                if (appliedMigrations[migration.version]["checksum"] != migration.checksum):
+                    logInfo(f"Migration {migration.version} ({migration.name}) has changed since it was applied, it will not be applied again")
+                continue
+
+            logInfo(f"Applying migration {migration.version} ({migration.name})")
+
+            try:
+                applyStatements(cursor, migration.statements())
+
+                stmt = "INSERT INTO SchemaMigrations (version, name, checksum) VALUES (%s, %s, %s)"
+                params = [migration.version, migration.name, migration.checksum]
+                cursor.execute(stmt, params)
+                db.commit()
+
+            except Exception as e:
+                logError(e, {"Message": f"Migration {migration.version} ({migration.name}) failed, stopping"})
+                raise
+
+            applied.append(migration.version)
+
+    logInfo(f"Applied {len(applied)} schema migrations", details = applied)
+    return applied
@@ -0,0 +1,243 @@
+import os, re, threading, bisect, asyncio, contextvars, functools
+
+from logger import *
+
+#Upper bounds in milliseconds of each latency histogram bucket. The last bucket holds everything slower.
+histogramBounds = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+#An invocation running the same statement more than this many times is flagged as an N+1 query pattern
+nPlusOneThreshold = int(os.getenv("DB_NPLUSONE_THRESHOLD", 10))
+
+#Minutes between summaries written to the log. 0 turns them off.
+summaryMinutes = float(os.getenv("DB_STATS_SUMMARY_MINUTES", 60))
+
+#The CommandInvocation whose statements are being recorded, if a command is running.
+#dbcall copies the context into its worker threads, so statements run there are tagged with the command too.
+currentInvocation = contextvars.ContextVar("currentInvocation", default = None)
+
+#Statistics for every command and statement fingerprint since the bot started
+commandStats = dict()
+statementStats = dict()
+statsLock = threading.Lock()
+
+summaryTask = None
+
+
+class Histogram:
+    """
+    Latencies grouped into the buckets of histogramBounds, so percentiles can be estimated without keeping every sample.
+
+    Attributes:
+        buckets (list): Number of samples in each bucket
+        count (int): Number of samples
+        total (float): Sum of every sample in ms
+        max (float): Largest sample in ms
+    """
+
+    def __init__(self):
+        self.buckets = [0] * (len(histogramBounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms):
+        self.buckets[bisect.bisect_left(histogramBounds, ms)] += 1
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def percentile(self, fraction):
+        """Estimate a percentile as the upper bound of the bucket it falls in, or the largest sample if that is smaller"""
+
+        if not (self.count): return None
+
+        rank = fraction * self.count
+        seen = 0
+
+        for i, count in enumerate(self.buckets):
+            seen += count
+            if (seen >= rank): return round(min(histogramBounds[i], self.max), 3) if i < len(histogramBounds) else round(self.max, 3)
+
+    def summary(self):
+
+        return {
+            "Count": self.count,
+            "Mean (ms)": round(self.total / self.count, 3) if self.count else None,
+            "p50 (ms)": self.percentile(0.5),
+            "p95 (ms)": self.percentile(0.95),
+            "Max (ms)": round(self.max, 3)
+        }
+
+
+class CommandStats:
+    """
+    Attributes:
+        invocations (int): Number of times the command has run
+        statements (int): Number of statements all of its invocations ran
+        statementLatency (Histogram): Latency of each statement it ran
+        dbTime (Histogram): Total time each invocation spent running statements
+        nPlusOne (dict): Fingerprints of statements that were run more than nPlusOneThreshold times by one invocation, mapped to how many invocations did so
+    """
+
+    def __init__(self):
+        self.invocations = 0
+        self.statements = 0
+        self.statementLatency = Histogram()
+        self.dbTime = Histogram()
+        self.nPlusOne = dict()
+
+    def summary(self):
+
+        return {
+            "Invocations": self.invocations,
+            "Statements per Invocation": round(self.statements / self.invocations, 2) if self.invocations else None,
+            "Database Time per Invocation": self.dbTime.summary(),
+            "Statement Latency": self.statementLatency.summary(),
+            "N+1 Statements": dict(self.nPlusOne)
+        }
+
+
+class CommandInvocation:
+    """
+    The statements run by one invocation of a command.
+
+    Attributes:
+        name (str): The command's name
+        counts (dict): Statement fingerprints mapped to how many times they were run
+        latencies (list): Latency of each statement in ms
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.counts = dict()
+        self.latencies = []
+        self.lock = threading.Lock()
+
+    def record(self, statementFingerprint, ms):
+
+        with self.lock:
+            self.counts[statementFingerprint] = self.counts.get(statementFingerprint, 0) + 1
+            self.latencies.append(ms)
+
+
+@functools.lru_cache(maxsize = 4096)
+def fingerprint(stmt):
+    """
+    Reduce a statement to its shape, so that the same query with different values is counted together:
+    literals become ?, lists of placeholders become a single one and whitespace is collapsed.
+    """
+
+    stmt = re.sub(r"'(?:[^'\\]|\\.)*'", "?", stmt)
+    stmt = re.sub(r"\b\d+\b", "?", stmt)
+    stmt = re.sub(r"%s|\?", "?", stmt)
+    stmt = re.sub(r"\(\s*\?(?:\s*,\s*\?)*\s*\)", "(?)", stmt)
+    stmt = re.sub(r"\s+", " ", stmt).strip().rstrip(";")
+
+    return stmt
+
+def recordStatement(stmt, seconds):
+    """
+    Record that a statement was run, against its fingerprint and against the command that is running, if any
+    """
+
+    statementFingerprint = fingerprint(stmt) if isinstance(stmt, str) else str(stmt)
+    ms = seconds * 1000
+
+    with statsLock:
+        histogram = statementStats.get(statementFingerprint)
+        if (histogram == None): histogram = statementStats[statementFingerprint] = Histogram()
+        histogram.add(ms)
+
+    invocation = currentInvocation.get()
+    if (invocation): invocation.record(statementFingerprint, ms)
+
+def startCommand(name):
+    """
+    Start tagging statements with a command. Must be called from the task running the command.
+
+    Returns:
+        A token for finishCommand
+    """
+
+    return currentInvocation.set(CommandInvocation(name))
+
+def finishCommand(token):
+    """
+    Stop tagging statements with the command started by startCommand, and add what it ran to the command's statistics
+    """
+
+    invocation = currentInvocation.get()
+
+    #The token can only be reset from the context it was created in
+    try: currentInvocation.reset(token)
+    except ValueError: currentInvocation.set(None)
+
+    if not (invocation): return
+
+    with invocation.lock:
+        counts = dict(invocation.counts)
+        latencies = list(invocation.latencies)
+
+    repeated = {statementFingerprint: count for statementFingerprint, count in counts.items() if count > nPlusOneThreshold}
+
+    with statsLock:
+        stats = commandStats.get(invocation.name)
+        if (stats == None): stats = commandStats[invocation.name] = CommandStats()
+
+        stats.invocations += 1
+        stats.statements += len(latencies)
+        stats.dbTime.add(sum(latencies))
+
+        for ms in latencies: stats.statementLatency.add(ms)
+
+        for statementFingerprint in repeated:
+            stats.nPlusOne[statementFingerprint] = stats.nPlusOne.get(statementFingerprint, 0) + 1
+
+    if (repeated):
+        logInfo(f"Command {invocation.name} ran the same statement more than {nPlusOneThreshold} times, possible N+1 queries", details = repeated)
+
+def summary(command = None, top = 10):
+    """
+    Args:
+        command (str): Only summarize this command
+        top (int): Number of commands and statements to include, by total database time
+
+    Returns:
+        (dict): Statistics for the commands and statements that spent the most time in the database
+    """
+
+    with statsLock:
+        if (command):
+            stats = commandStats.get(command)
+            return {command: stats.summary() if stats else None}
+
+        commands = sorted(commandStats.items(), key = lambda item: item[1].dbTime.total, reverse = True)[:top]
+        statements = sorted(statementStats.items(), key = lambda item: item[1].total, reverse = True)[:top]
+
+        return {
+            "Commands": {name: stats.summary() for name, stats in commands},
+            "Statements": {statementFingerprint: histogram.summary() for statementFingerprint, histogram in statements}
+        }
+
+def reset():
+
+    with statsLock:
+        commandStats.clear()
+        statementStats.clear()
+
+async def summaryLoop():
+
+    while True:
+        await asyncio.sleep(summaryMinutes * 60)
+
+        try: logInfo("Database query summary", details = summary())
+        except Exception as e: logError(e)
+
+def startSummaries():
+    """Start writing a summary to the log every summaryMinutes, unless it has already been started. Must be called from the event loop."""
+
+    global summaryTask
+
+    if (summaryTask or summaryMinutes <= 0): return
+
+    summaryTask = asyncio.get_running_loop().create_task(summaryLoop())
@@ -22,14 +22,28 @@ if [ ! -f ".env" ] ; then
 
     TEST_CHANNEL_ID=
 
+    DB_BACKEND=mysql
+    DB_SQLITE_PATH=
+
     DB_USER=
     DB_PASS=
     DB_HOST=
     DB_DATABASE=
     DB_PORT=
+    DB_POOL_SIZE=5
+    DB_POOL_TIMEOUT=10
+    DB_NPLUSONE_THRESHOLD=10
+    DB_STATS_SUMMARY_MINUTES=60
 
     IMGUR_CLIENT_ID=
-    IMGUR_CLIENT_SECRET="
+    IMGUR_CLIENT_SECRET=
+
+    LOG_LEVEL=INFO
+
+    SAVEGAME_FORMAT=json
+    SAVEGAME_CACHE_MB=256
+    GAMERULE_CACHE_MB=64
+    WORLD_CACHE_MB=128"
 
     echo "$env" > .env
 